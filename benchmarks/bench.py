@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+
+""" Benchmark suite for the three assignments, with a history of results """
+
+__author__ = "Shuai Wang"
+__email__ = "info.shuai@gmail.com"
+
+# imports one per line
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASS1 = os.path.join(ROOT, "inf1340_ass1")
+ASS2 = os.path.join(ROOT, "inf1340_ass2")
+ASS3 = os.path.join(ROOT, "inf1340_ass3")
+for directory in (ASS1, ASS2, ASS3):
+    if directory not in sys.path:
+        sys.path.append(directory)
+
+# default history file and regression threshold (fraction slower)
+HISTORY_FILE = os.path.join(ROOT, "benchmarks", "history.json")
+THRESHOLD = 0.10
+
+# date that the visas of example_entries.json are checked on: they date from
+# 2014, so on the current date most of them would be expired
+EXAMPLES_DATE = datetime.date(2015, 1, 1)
+
+# registered benchmarks: (name, sizes, quick sizes, setup)
+BENCHMARKS = []
+
+
+def benchmark(name, sizes, quick_sizes):
+    """
+    Registers a benchmark. The decorated setup function is called as
+    setup(size, work_dir) and returns the function to time, which takes no
+    arguments.
+
+    :param name: name of the benchmark
+    :param sizes: input sizes of a full run
+    :param quick_sizes: input sizes of a quick run
+    :return: the decorator
+    """
+    def register(setup):
+        BENCHMARKS.append((name, sizes, quick_sizes, setup))
+        return setup
+    return register
+
+
+@benchmark("papers.decide", [100, 1000, 10000], [100])
+def setup_decide(size, work_dir):
+    import papers
+    with open(os.path.join(ASS2, "example_entries.json")) as file_handle:
+        examples = json.load(file_handle)
+    entries_file = os.path.join(work_dir, "entries_{0}.json".format(size))
+    with open(entries_file, "w") as file_handle:
+        json.dump([examples[i % len(examples)] for i in range(size)],
+                  file_handle)
+    watchlist_file = os.path.join(ASS2, "watchlist.json")
+    countries_file = os.path.join(ASS2, "countries.json")
+    return lambda: papers.decide(entries_file, watchlist_file, countries_file,
+                                 today=EXAMPLES_DATE)
+
+
+@benchmark("mining.Stock", [1, 10, 100], [1])
+def setup_stock(size, work_dir):
+    import mining
+    stock_file = scaled_stock_file(os.path.join(ASS3, "data", "GOOG.json"),
+                                   size, work_dir)
+    return lambda: mining.Stock("GOOG", stock_file)
+
+
+@benchmark("mining.Stock[TSE-SO]", [1, 10], [1])
+def setup_tse(size, work_dir):
+    import mining
+    stock_file = scaled_stock_file(os.path.join(ASS3, "data", "TSE-SO.json"),
+                                   size, work_dir)
+    return lambda: mining.Stock("TSE-SO", stock_file)
+
+
+@benchmark("mining.calculate_average", [1, 10, 100], [1])
+def setup_average(size, work_dir):
+    import mining
+    stock = mining.Stock("GOOG", scaled_stock_file(
+        os.path.join(ASS3, "data", "GOOG.json"), size, work_dir))
+    return stock.calculate_average
+
+
+@benchmark("exercise1.grade_to_gpa", [1000, 100000], [1000])
+def setup_grade_to_gpa(size, work_dir):
+    import exercise1
+    grades = random_grades(size)
+
+    def convert():
+        for grade in grades:
+            try:
+                exercise1.grade_to_gpa(grade)
+            except (TypeError, ValueError):
+                pass
+    return convert
+
+
+@benchmark("exercise1.grades_to_gpa", [1000, 100000, 1000000], [1000])
+def setup_grades_to_gpa(size, work_dir):
+    import exercise1
+    grades = random_grades(size)
+    return lambda: exercise1.grades_to_gpa(grades)
+
+
+@benchmark("exercise2.checksum", [1000, 100000], [1000])
+def setup_checksum(size, work_dir):
+    import exercise2
+    upcs = random_upcs(size)
+
+    def validate():
+        for upc in upcs:
+            try:
+                exercise2.checksum(upc)
+            except (TypeError, ValueError):
+                pass
+    return validate
+
+
+@benchmark("exercise2.checksums", [1000, 100000, 1000000], [1000])
+def setup_checksums(size, work_dir):
+    import exercise2
+    lines = "\n".join(random_upcs(size)).encode()
+    return lambda: exercise2.checksums(lines)
+
+
+@benchmark("exercise3.decide_rps", [1000, 100000], [1000])
+def setup_decide_rps(size, work_dir):
+    import exercise3
+    player1, player2 = random_moves(size)
+
+    def decide():
+        for move1, move2 in zip(player1, player2):
+            exercise3.decide_rps(move1, move2)
+    return decide
+
+
+@benchmark("exercise3.decide_rounds", [1000, 100000, 1000000], [1000])
+def setup_decide_rounds(size, work_dir):
+    import exercise3
+    player1, player2 = random_moves(size)
+    codes1 = exercise3.encode_moves(player1)
+    codes2 = exercise3.encode_moves(player2)
+    return lambda: exercise3.decide_rounds(codes1, codes2)
+
+
+def scaled_stock_file(stock_file, scale, work_dir):
+    """
+    Writes a copy of a stock file with scale times as many trading days:
+    the rows are repeated, each copy moved further back in time by the
+    number of days the rows span, plus one, so that no two rows share a
+    date.
+
+    :param stock_file: name of the stock file to copy
+    :param scale: number of copies of the rows
+    :param work_dir: directory to write the copy to
+    :return: the name of the copy
+    """
+    if scale == 1:
+        return stock_file
+    with open(stock_file) as file_handle:
+        rows = json.load(file_handle)
+    dates = [datetime.date.fromisoformat(row["Date"]) for row in rows]
+    span = max(dates) - min(dates) + datetime.timedelta(days=1)
+    copy = []
+    for number in range(scale):
+        shift = span * number
+        for row in rows:
+            date = datetime.date.fromisoformat(row["Date"]) - shift
+            copy.append(dict(row, Date=date.isoformat()))
+    copy_file = os.path.join(work_dir, "{0}_x{1}.json".format(
+        os.path.splitext(os.path.basename(stock_file))[0], scale))
+    with open(copy_file, "w") as file_handle:
+        json.dump(copy, file_handle)
+    return copy_file
+
+
+def random_grades(size):
+    """
+    :return: a list of size valid and invalid grades
+    """
+    generator = random.Random(size)
+    grades = ["A+", "A", "A-", "B+", "B", "B-", "FZ", "C", 101, -1]
+    return [generator.choice(grades) if generator.random() < 0.3
+            else generator.randrange(0, 101) for _ in range(size)]
+
+
+def random_upcs(size):
+    """
+    :return: a list of size strings of 12 digits
+    """
+    generator = random.Random(size)
+    return ["{0:012d}".format(generator.randrange(10 ** 12))
+            for _ in range(size)]
+
+
+def random_moves(size):
+    """
+    :return: a tuple of two lists of size moves
+    """
+    generator = random.Random(size)
+    moves = ["Rock", "Paper", "Scissors"]
+    return ([generator.choice(moves) for _ in range(size)],
+            [generator.choice(moves) for _ in range(size)])
+
+
+def time_function(function, repeats=5):
+    """
+    Times a function like timeit: calls it enough times in a row to take at
+    least 0.2 seconds, repeats that, and keeps the fastest repeat.
+
+    :param function: a function without arguments
+    :param repeats: number of repeats
+    :return: a dict with the best "seconds" per call, the number of calls
+        per repeat and the number of repeats
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeats, number))
+    return {"seconds": best / number, "number": number, "repeats": repeats}
+
+
+def run(names=None, quick=False, repeats=5, output=None):
+    """
+    Runs the benchmarks
+
+    :param names: names of the benchmarks to run (default: all)
+    :param quick: whether to run only the quick sizes
+    :param repeats: number of repeats of each timing
+    :param output: where to print each result as it is measured (a file,
+        or None)
+    :return: a dict mapping "name[size]" to its timing
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, sizes, quick_sizes, setup in BENCHMARKS:
+            if names and name not in names:
+                continue
+            for size in quick_sizes if quick else sizes:
+                key = "{0}[{1}]".format(name, size)
+                results[key] = time_function(setup(size, work_dir), repeats)
+                if output is not None:
+                    print("{0:<40} {1:>12.6f} s".format(
+                        key, results[key]["seconds"]), file=output)
+    return results
+
+
+def load_history(history_file):
+    """
+    :return: the list of runs in history_file (empty if it does not exist)
+    """
+    if not os.path.exists(history_file):
+        return []
+    with open(history_file) as file_handle:
+        return json.load(file_handle)
+
+
+def save_run(history_file, results, label=None):
+    """
+    Appends a run to history_file
+
+    :param results: the results of run()
+    :param label: optional label of the run, e.g. a commit or branch name
+    :return: the run added
+    """
+    history = load_history(history_file)
+    entry = {"time": datetime.datetime.now().isoformat(timespec="seconds"),
+             "label": label,
+             "python": platform.python_version(),
+             "machine": platform.machine(),
+             "results": results}
+    history.append(entry)
+    with open(history_file, "w") as file_handle:
+        json.dump(history, file_handle, indent=1)
+    return entry
+
+
+def find_run(history, reference):
+    """
+    Finds a run in the history
+
+    :param reference: an index into the history (e.g. -1 for the last run),
+        or the label of a run (the last run with that label)
+    :return: the run
+    :raises: LookupError if there is no such run
+    """
+    try:
+        return history[int(reference)]
+    except ValueError:
+        pass
+    except IndexError:
+        raise LookupError("No run {0} in the history".format(reference))
+    for entry in reversed(history):
+        if entry["label"] == reference:
+            return entry
+    raise LookupError("No run labelled {0}".format(reference))
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """
+    Compares the benchmarks two runs have in common
+
+    :param baseline: the run compared to
+    :param current: the run compared
+    :param threshold: fraction by which a benchmark must be slower (or
+        faster) to count as a regression (or an improvement)
+    :return: a list of (key, baseline seconds, current seconds, ratio,
+        status) tuples, status being "regression", "improvement" or "same"
+    """
+    comparison = []
+    for key, timing in current["results"].items():
+        if key not in baseline["results"]:
+            continue
+        before = baseline["results"][key]["seconds"]
+        after = timing["seconds"]
+        ratio = after / before if before > 0 else float("inf")
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold):
+            status = "improvement"
+        else:
+            status = "same"
+        comparison.append((key, before, after, ratio, status))
+    return comparison
+
+
+def main(arguments=None):
+    """
+    Command line entry point:
+        run: runs the benchmarks and adds the results to the history
+        compare: compares two runs of the history; exits with status 1 if
+            there are regressions
+        list: lists the benchmarks
+
+    :return: the exit status
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--history", default=HISTORY_FILE)
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("names", nargs="*")
+    run_parser.add_argument("--quick", action="store_true")
+    run_parser.add_argument("--repeats", type=int, default=5)
+    run_parser.add_argument("--label", default=None)
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("baseline", nargs="?", default="-2",
+                                help="index or label (default: -2)")
+    compare_parser.add_argument("current", nargs="?", default="-1",
+                                help="index or label (default: -1)")
+    compare_parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    commands.add_parser("list")
+    args = parser.parse_args(arguments)
+
+    if args.command == "list":
+        for name, sizes, quick_sizes, setup in BENCHMARKS:
+            print("{0:<30} sizes {1}".format(name, sizes))
+        return 0
+
+    if args.command == "run":
+        results = run(args.names, args.quick, args.repeats, sys.stdout)
+        save_run(args.history, results, args.label)
+        return 0
+
+    history = load_history(args.history)
+    try:
+        baseline = find_run(history, args.baseline)
+        current = find_run(history, args.current)
+    except LookupError as error:
+        print(error, file=sys.stderr)
+        return 2
+    comparison = compare(baseline, current, args.threshold)
+    for key, before, after, ratio, status in comparison:
+        print("{0:<40} {1:>12.6f} {2:>12.6f} {3:>7.2f}x  {4}".format(
+            key, before, after, ratio, status))
+    regressions = [key for key, before, after, ratio, status in comparison
+                   if status == "regression"]
+    if regressions:
+        print("{0} regression(s) beyond {1:.0%}".format(
+            len(regressions), args.threshold), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
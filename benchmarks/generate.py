@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+
+"""
+Seeded generator of large inputs: traveller entries and watchlists for
+papers.decide, stock price series in the format of mining.Stock, and
+streams of UPC-A barcodes and grades for exercise1 and exercise2
+
+Values are generated in blocks and written to disk as they are generated,
+so files of any size can be made with little memory. The same seed always
+gives the same values: dates are relative to a fixed REFERENCE_DATE unless
+another date is given.
+"""
+
+__author__ = "Shuai Wang"
+__email__ = "info.shuai@gmail.com"
+
+# imports one per line
+import argparse
+import datetime
+import json
+import os
+import random
+import string
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COUNTRIES_FILE = os.path.join(ROOT, "inf1340_ass2", "countries.json")
+
+# date that generated entries and prices lead up to by default, so that a
+# seed gives the same files whenever they are generated
+REFERENCE_DATE = datetime.date(2015, 1, 2)
+
+# number of values generated from one seed: the values of a block do not
+# depend on how many blocks come before it
+BLOCK_SIZE = 10000
+
+# number of values written to disk at a time
+CHUNK_SIZE = 10000
+
+HOME_COUNTRY = "KAN"
+PASSPORT_CHARACTERS = string.ascii_uppercase + string.digits
+FIRST_NAMES = ("AMELIA", "BRUNO", "CARMEN", "DOUGLAS", "ELENA", "FARID",
+               "GABRIELA", "HIRO", "INGRID", "JAMAL", "KATYA", "LUIS",
+               "MEI", "NIGEL", "OLGA", "PRIYA", "QUINN", "RAFAEL", "SANNA",
+               "TOMAS")
+LAST_NAMES = ("ABBOTT", "BUCKLEY", "CHEN", "DUBOIS", "ESPOSITO", "FISCHER",
+              "GARCIA", "HAAS", "IVANOV", "JENSEN", "KOWALSKI", "LARSEN",
+              "MASTERS", "NAKAMURA", "OKAFOR", "PETROV", "QUINTERO", "ROSSI",
+              "SOLIZ", "TANAKA")
+CITIES = ("Urella", "Desmond", "Platica", "Redux", "Dowel", "Chilliwack")
+REGIONS = ("Parsol", "Ohio", "Encerta", "Partii", "Wood", "BC")
+REQUIRED_FIELDS = ("first_name", "last_name", "from", "entry_reason",
+                   "passport", "birth_date", "home")
+
+# ways an invalid entry is made invalid
+INVALID_KINDS = ("missing_field", "passport", "birth_date", "visa_date",
+                 "expired_visa")
+
+# valid and invalid grades of exercise1
+LETTER_GRADES = ("A+", "A", "A-", "B+", "B", "B-", "FZ")
+INVALID_GRADES = ("C", "a+", "", 101, -1, 85.5, None)
+
+
+def block_random(seed, stream, block):
+    """
+    :param seed: seed of all the values
+    :param stream: name of the kind of values
+    :param block: number of the block
+    :return: a random.Random for one block of values of one kind
+    """
+    return random.Random("{0}:{1}:{2}".format(seed, stream, block))
+
+
+def generate_blocks(count, seed, stream, make_block):
+    """
+    Generates count values, one block at a time
+
+    :param count: number of values
+    :param seed: seed of all the values
+    :param stream: name of the kind of values
+    :param make_block: function of (generator, first index, size) returning
+        a list of size values
+    :return: generator of values
+    """
+    for block, start in enumerate(range(0, count, BLOCK_SIZE)):
+        generator = block_random(seed, stream, block)
+        yield from make_block(generator, start, min(BLOCK_SIZE, count - start))
+
+
+def load_countries(countries_file=COUNTRIES_FILE):
+    """
+    :param countries_file: name of a JSON file of country data
+    :return: a dict of lists of country codes: "all", "medical_advisory",
+        "visitor_visa" and "transit_visa"
+    """
+    with open(countries_file) as file_handle:
+        countries = json.load(file_handle)
+    return {"all": sorted(countries),
+            "medical_advisory": sorted(
+                code for code in countries
+                if countries[code]["medical_advisory"] != ""),
+            "visitor_visa": sorted(
+                code for code in countries
+                if countries[code]["visitor_visa_required"] == "1"),
+            "transit_visa": sorted(
+                code for code in countries
+                if countries[code]["transit_visa_required"] == "1")}
+
+
+def random_passport(generator):
+    """
+    :return: a passport number of five groups of five characters
+    """
+    characters = "".join(generator.choices(PASSPORT_CHARACTERS, k=25))
+    return "-".join(characters[i:i + 5] for i in range(0, 25, 5))
+
+
+def random_date(generator, first, last):
+    """
+    :param first: ordinal of the earliest date
+    :param last: ordinal of the latest date
+    :return: a YYYY-mm-dd date between first and last
+    """
+    return datetime.date.fromordinal(generator.randint(first, last)).isoformat()
+
+
+def random_location(generator, country):
+    """
+    :return: a location record in country
+    """
+    return {"city": generator.choice(CITIES),
+            "region": generator.choice(REGIONS),
+            "country": country}
+
+
+def watchlist_row(index, seed=0):
+    """
+    Generates one row of a watchlist. A row has either a name or a passport
+    number, like the rows of watchlist.json.
+
+    :param index: position of the row in the watchlist
+    :param seed: seed of the watchlist
+    :return: a dict with "first_name", "last_name" and "passport"
+    """
+    generator = random.Random("{0}:watchlist:{1}".format(seed, index))
+    if generator.random() < 0.5:
+        return {"first_name": "", "last_name": "",
+                "passport": random_passport(generator)}
+    return {"first_name": generator.choice(FIRST_NAMES),
+            "last_name": generator.choice(LAST_NAMES) + str(index),
+            "passport": ""}
+
+
+def watchlist_rows(count, seed=0):
+    """
+    :param count: number of rows
+    :param seed: seed of the watchlist
+    :return: generator of the rows of a watchlist
+    """
+    return (watchlist_row(index, seed) for index in range(count))
+
+
+def traveller_entries(count, seed=0, countries=None, invalid_rate=0.1,
+                      watchlist_size=0, watchlist_rate=0.0,
+                      today=REFERENCE_DATE,
+                      invalid_kinds=INVALID_KINDS):
+    """
+    Generates traveller entries for papers.decide: returning citizens,
+    visitors and travellers in transit, some of them with a visa or coming
+    via another country. Invalid entries miss a required field or have a
+    malformed passport number, birth date or visa date, or an expired visa.
+
+    :param count: number of entries
+    :param seed: seed of the entries
+    :param countries: the result of load_countries (default: the countries
+        of countries.json)
+    :param invalid_rate: fraction of entries made invalid
+    :param watchlist_size: number of rows of the watchlist generated with
+        the same seed
+    :param watchlist_rate: fraction of entries that match a row of that
+        watchlist
+    :param today: date that visas are valid on
+    :param invalid_kinds: ways of making entries invalid, from
+        INVALID_KINDS
+    :return: generator of entry records
+    """
+    if countries is None:
+        countries = load_countries()
+    if watchlist_rate and not watchlist_size:
+        raise ValueError("Watchlist matches need a watchlist size")
+    today = today.toordinal()
+    visa_countries = {"visit": set(countries["visitor_visa"]),
+                      "transit": set(countries["transit_visa"])}
+
+    def make_block(generator, start, size):
+        return [make_entry(generator) for _ in range(size)]
+
+    def make_entry(generator):
+        reason = generator.choice(("returning", "visit", "visit", "transit"))
+        origin = generator.choice(countries["all"])
+        home = HOME_COUNTRY if reason == "returning" else origin
+        entry = {"passport": random_passport(generator),
+                 "first_name": generator.choice(FIRST_NAMES),
+                 "last_name": generator.choice(LAST_NAMES),
+                 "birth_date": random_date(generator, today - 36500,
+                                           today - 365),
+                 "home": random_location(generator, home),
+                 "entry_reason": reason,
+                 "from": random_location(generator, origin)}
+        if generator.random() < 0.3:
+            entry["via"] = random_location(generator,
+                                           generator.choice(countries["all"]))
+        if origin in visa_countries.get(reason, ()) or \
+                generator.random() < 0.05:
+            entry["visa"] = {"date": random_date(generator, today - 729,
+                                                 today),
+                             "code": random_passport(generator)[:11]}
+
+        if generator.random() < watchlist_rate:
+            row = watchlist_row(generator.randrange(watchlist_size), seed)
+            if row["passport"]:
+                entry["passport"] = row["passport"]
+            else:
+                entry["first_name"] = row["first_name"]
+                entry["last_name"] = row["last_name"]
+
+        if generator.random() < invalid_rate:
+            kind = generator.choice(invalid_kinds)
+            if kind == "missing_field":
+                del entry[generator.choice(REQUIRED_FIELDS)]
+            elif kind == "passport":
+                entry["passport"] = generator.choice(
+                    (entry["passport"][:23], entry["passport"][:-1] + "#",
+                     entry["passport"].replace("-", "")))
+            elif kind == "birth_date":
+                entry["birth_date"] = generator.choice(
+                    ("1970-02-30", "1970-13-01", "70-01-01", "01/02/1970",
+                     ""))
+            else:
+                visa = entry.setdefault(
+                    "visa", {"code": random_passport(generator)[:11]})
+                if kind == "visa_date":
+                    visa["date"] = generator.choice(("2014-4-31", "20140430",
+                                                     "next week"))
+                else:
+                    visa["date"] = random_date(generator, today - 7300,
+                                               today - 730)
+        return entry
+
+    return generate_blocks(count, seed, "entries", make_block)
+
+
+def price_rows(days, seed=0, last_date=REFERENCE_DATE,
+               last_close=500.0, volatility=0.02):
+    """
+    Generates daily prices of a stock in the format of the stock files of
+    mining.Stock, from last_date back in time (the order of the stock
+    files), one row per weekday. Closing prices follow a random walk.
+
+    :param days: number of trading days (about 261 a year)
+    :param seed: seed of the prices
+    :param last_date: the last trading day (moved back to a weekday)
+    :param last_close: the closing price on the last trading day
+    :param volatility: standard deviation of the daily log return
+    :return: generator of dicts with "Date", "Open", "High", "Low", "Close"
+        and "Volume"
+    """
+    date = last_date.toordinal()
+    while datetime.date.fromordinal(date).weekday() > 4:
+        date -= 1
+    close = last_close
+
+    for block, start in enumerate(range(0, days, BLOCK_SIZE)):
+        size = min(BLOCK_SIZE, days - start)
+        generator = np.random.default_rng([seed, block])
+        # going back in time, each close is the next close divided by the
+        # day's return
+        returns = generator.normal(0.0, volatility, size)
+        closes = close * np.exp(-np.cumsum(np.concatenate(([0.0],
+                                                           returns[:-1]))))
+        opens = closes * np.exp(generator.normal(0.0, volatility / 2, size))
+        spread = np.abs(generator.normal(0.0, volatility / 2, (2, size)))
+        highs = np.maximum(opens, closes) * (1 + spread[0])
+        lows = np.minimum(opens, closes) * (1 - spread[1])
+        volumes = generator.lognormal(15, 0.5, size).astype(np.int64)
+        close = float(closes[-1] / np.exp(returns[-1]))
+
+        for row in zip(opens.round(2).tolist(), highs.round(2).tolist(),
+                       lows.round(2).tolist(), closes.round(2).tolist(),
+                       volumes.tolist()):
+            day = datetime.date.fromordinal(date)
+            yield {"Date": day.isoformat(), "Open": row[0], "High": row[1],
+                   "Low": row[2], "Close": row[3], "Volume": row[4]}
+            date -= 3 if day.weekday() == 0 else 1
+
+
+def upc_codes(count, seed=0, invalid_rate=0.1):
+    """
+    Generates UPC-A barcodes for exercise2. Invalid barcodes have a wrong
+    check digit, too few or too many digits, or a character that is not a
+    digit.
+
+    :param count: number of barcodes
+    :param seed: seed of the barcodes
+    :param invalid_rate: fraction of barcodes made invalid
+    :return: generator of strings
+    """
+    weights = np.array([3, 1] * 5 + [3], dtype=np.int64)
+
+    def make_block(generator, start, size):
+        digits = np.random.default_rng(
+            generator.getrandbits(64)).integers(0, 10, (size, 12))
+        digits[:, 11] = -(digits[:, :11] @ weights) % 10
+        codes = ["".join(map(str, row)) for row in digits.tolist()]
+        for i in range(size):
+            if generator.random() < invalid_rate:
+                codes[i] = make_invalid(generator, codes[i])
+        return codes
+
+    def make_invalid(generator, code):
+        kind = generator.randrange(4)
+        if kind == 0:
+            return code[:11] + str((int(code[11]) + generator.randint(1, 9)) %
+                                   10)
+        if kind == 1:
+            return code[:generator.randrange(12)]
+        if kind == 2:
+            return code + str(generator.randrange(10))
+        position = generator.randrange(12)
+        return code[:position] + generator.choice("xO -") + \
+            code[position + 1:]
+
+    return generate_blocks(count, seed, "upcs", make_block)
+
+
+def grade_values(count, seed=0, invalid_rate=0.1, letter_rate=0.3):
+    """
+    Generates grades for exercise1: numbers from 0 to 100 and letter
+    grades, some of them invalid.
+
+    :param count: number of grades
+    :param seed: seed of the grades
+    :param invalid_rate: fraction of invalid grades
+    :param letter_rate: fraction of letter grades among the valid grades
+    :return: generator of ints, strings and invalid values
+    """
+    def make_block(generator, start, size):
+        grades = []
+        for _ in range(size):
+            if generator.random() < invalid_rate:
+                grades.append(generator.choice(INVALID_GRADES))
+            elif generator.random() < letter_rate:
+                grades.append(generator.choice(LETTER_GRADES))
+            else:
+                grades.append(generator.randint(0, 100))
+        return grades
+
+    return generate_blocks(count, seed, "grades", make_block)
+
+
+def write_json_array(file_name, values, chunk_size=CHUNK_SIZE):
+    """
+    Writes values to a file as a JSON array, one value per line, chunk_size
+    values at a time
+
+    :param file_name: name of the file to write
+    :param values: iterable of values
+    :param chunk_size: number of values written at a time
+    :return: the number of values written
+    """
+    encode = json.JSONEncoder(separators=(",", ":")).encode
+    count = 0
+    with open(file_name, "w") as file_handle:
+        file_handle.write("[")
+        for chunk in chunks(values, chunk_size):
+            file_handle.write(("," if count else "") + "\n" +
+                              ",\n".join(map(encode, chunk)))
+            count += len(chunk)
+        file_handle.write("\n]\n")
+    return count
+
+
+def write_json_lines(file_name, values, chunk_size=CHUNK_SIZE):
+    """
+    Writes values to a file as JSON Lines (one JSON value per line),
+    chunk_size values at a time
+
+    :param file_name: name of the file to write
+    :param values: iterable of values
+    :param chunk_size: number of values written at a time
+    :return: the number of values written
+    """
+    encode = json.JSONEncoder(separators=(",", ":")).encode
+    count = 0
+    with open(file_name, "w") as file_handle:
+        for chunk in chunks(values, chunk_size):
+            file_handle.write("\n".join(map(encode, chunk)) + "\n")
+            count += len(chunk)
+    return count
+
+
+def write_lines(file_name, values, chunk_size=CHUNK_SIZE):
+    """
+    Writes strings to a file, one per line, chunk_size strings at a time
+
+    :param file_name: name of the file to write
+    :param values: iterable of strings without line breaks
+    :param chunk_size: number of strings written at a time
+    :return: the number of strings written
+    """
+    count = 0
+    with open(file_name, "w") as file_handle:
+        for chunk in chunks(values, chunk_size):
+            file_handle.write("\n".join(chunk) + "\n")
+            count += len(chunk)
+    return count
+
+
+def chunks(values, size):
+    """
+    Splits an iterable into lists of at most size values
+
+    :param values: iterable of values
+    :param size: maximum number of values per list
+    :return: generator of lists
+    """
+    chunk = []
+    for value in values:
+        chunk.append(value)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def main(arguments=None):
+    """
+    Command line entry point: writes one kind of generated values to a file
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("kind", choices=["entries", "watchlist", "prices",
+                                         "upcs", "grades"])
+    parser.add_argument("output")
+    parser.add_argument("--count", type=int, default=1000000,
+                        help="number of values (trading days for prices)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--invalid-rate", type=float, default=0.1)
+    parser.add_argument("--watchlist-size", type=int, default=0)
+    parser.add_argument("--watchlist-rate", type=float, default=0.0)
+    parser.add_argument("--json-lines", action="store_true",
+                        help="write entries as JSON Lines")
+    parser.add_argument("--today", type=datetime.date.fromisoformat,
+                        default=REFERENCE_DATE,
+                        help="date that visas are valid on and prices end "
+                             "on, as YYYY-MM-DD (default: %(default)s)")
+    args = parser.parse_args(arguments)
+
+    if args.kind == "entries":
+        values = traveller_entries(args.count, args.seed,
+                                   invalid_rate=args.invalid_rate,
+                                   watchlist_size=args.watchlist_size,
+                                   watchlist_rate=args.watchlist_rate,
+                                   today=args.today)
+        write = write_json_lines if args.json_lines else write_json_array
+        return write(args.output, values)
+    if args.kind == "watchlist":
+        return write_json_array(args.output,
+                                watchlist_rows(args.count, args.seed))
+    if args.kind == "prices":
+        return write_json_array(args.output,
+                                price_rows(args.count, args.seed,
+                                           args.today))
+    if args.kind == "upcs":
+        return write_lines(args.output, upc_codes(args.count, args.seed,
+                                                  args.invalid_rate))
+    return write_json_lines(args.output, grade_values(args.count, args.seed,
+                                                      args.invalid_rate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+""" Module to test bench.py """
+
+__author__ = "Shuai Wang"
+__email__ = "info.shuai@gmail.com"
+
+# imports one per line
+from bench import *
+import pytest
+import json
+import os
+
+
+def test_compare():
+    """
+    Test flagging regressions and improvements between two runs
+    """
+    baseline = {"results": {"a[1]": {"seconds": 1.0},
+                            "b[1]": {"seconds": 1.0},
+                            "c[1]": {"seconds": 1.0},
+                            "d[1]": {"seconds": 1.0}}}
+    current = {"results": {"a[1]": {"seconds": 1.05},
+                           "b[1]": {"seconds": 1.5},
+                           "c[1]": {"seconds": 0.5},
+                           "e[1]": {"seconds": 1.0}}}
+    assert [(key, status) for key, before, after, ratio, status
+            in compare(baseline, current)] == \
+        [("a[1]", "same"), ("b[1]", "regression"), ("c[1]", "improvement")]
+    assert compare(baseline, current, threshold=0.01)[0][4] == "regression"
+
+
+def test_find_run():
+    """
+    Test finding runs by index and by label
+    """
+    history = [{"label": "base"}, {"label": None}, {"label": "base"}]
+    assert find_run(history, "-1") is history[2]
+    assert find_run(history, 0) is history[0]
+    assert find_run(history, "base") is history[2]
+    with pytest.raises(LookupError):
+        find_run(history, "5")
+    with pytest.raises(LookupError):
+        find_run(history, "missing")
+
+
+def test_run_and_compare(tmpdir):
+    """
+    Test a quick run of some benchmarks saved to a history file
+    """
+    history_file = str(tmpdir.join("history.json"))
+    names = ["exercise3.decide_rounds", "mining.calculate_average"]
+    results = run(names, quick=True, repeats=1)
+    assert sorted(results) == ["exercise3.decide_rounds[1000]",
+                               "mining.calculate_average[1]"]
+    assert all(timing["seconds"] > 0 for timing in results.values())
+
+    save_run(history_file, results, "first")
+    assert main(["--history", history_file, "run", "--quick",
+                 "--repeats", "1"] + names) == 0
+    history = load_history(history_file)
+    assert [entry["label"] for entry in history] == ["first", None]
+    assert main(["--history", history_file, "compare", "first", "-1",
+                 "--threshold", "1000"]) == 0
+    assert main(["--history", history_file, "compare", "nothing"]) == 2
+
+
+def test_scaled_stock_file(tmpdir):
+    """
+    Test that scaled copies of a stock file never repeat a date
+    """
+    for name in ["GOOG.json", "TSE-SO.json"]:
+        stock_file = os.path.join(ASS3, "data", name)
+        assert scaled_stock_file(stock_file, 1, str(tmpdir)) == stock_file
+        with open(stock_file) as file_handle:
+            rows = json.load(file_handle)
+        with open(scaled_stock_file(stock_file, 3, str(tmpdir))) as \
+                file_handle:
+            copy = json.load(file_handle)
+        dates = [row["Date"] for row in copy]
+        assert len(copy) == 3 * len(rows)
+        assert len(set(dates)) == len(dates)
+
+
+def run_tests():
+    """
+    Run all tests above.
+    """
+    test_compare()
+    test_find_run()
+
+run_tests()
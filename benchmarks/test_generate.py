@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+""" Module to test generate.py """
+
+__author__ = "Shuai Wang"
+__email__ = "info.shuai@gmail.com"
+
+# imports one per line
+import datetime
+import json
+import os
+from generate import *
+import bench
+import mining
+import papers
+
+
+def test_seeds():
+    """
+    Test that the same seed gives the same values, block by block
+    """
+    assert list(upc_codes(25000, 5)) == list(upc_codes(25000, 5))
+    assert list(upc_codes(25000, 5))[:BLOCK_SIZE] == \
+        list(upc_codes(BLOCK_SIZE, 5))
+    assert list(upc_codes(100, 5)) != list(upc_codes(100, 6))
+    assert list(traveller_entries(50, 1)) == list(traveller_entries(50, 1))
+    assert list(price_rows(30, 2)) == list(price_rows(30, 2))
+    assert list(grade_values(30, 2)) == list(grade_values(30, 2))
+
+
+def test_values():
+    """
+    Test that generated values are valid unless made invalid
+    """
+    assert all(len(upc) == 12 and upc.isdigit() and
+               exercise_checksum(upc) for upc in upc_codes(1000, 0, 0.0))
+    assert all(isinstance(grade, int) or grade in LETTER_GRADES
+               for grade in grade_values(1000, 0, 0.0))
+
+    rows = list(price_rows(600, 0, datetime.date(2015, 1, 4), 100.0))
+    assert rows[0]["Date"] == "2015-01-02" and rows[0]["Close"] == 100.0
+    assert [row["Date"] for row in rows] == \
+        sorted((row["Date"] for row in rows), reverse=True)
+    assert all(datetime.date.fromisoformat(row["Date"]).weekday() < 5 and
+               row["Low"] <= min(row["Open"], row["Close"]) and
+               row["High"] >= max(row["Open"], row["Close"])
+               for row in rows)
+
+    entries = list(traveller_entries(1000, 0, invalid_rate=0.0))
+    assert all(papers.complete_info(entry) and
+               papers.valid_passport_format(entry["passport"]) and
+               papers.valid_date_format(entry["birth_date"])
+               for entry in entries)
+
+
+def exercise_checksum(upc):
+    """
+    :return: whether the check digit of upc is right
+    """
+    digits = [int(digit) for digit in upc]
+    return (3 * sum(digits[0:11:2]) + sum(digits[1:11:2]) +
+            digits[11]) % 10 == 0
+
+
+def test_files(tmpdir):
+    """
+    Test that generated files are read by papers and mining
+    """
+    entries_file = str(tmpdir.join("entries.json"))
+    lines_file = str(tmpdir.join("entries.jsonl"))
+    watchlist_file = str(tmpdir.join("watchlist.json"))
+    prices_file = str(tmpdir.join("prices.json"))
+    kinds = ("passport", "birth_date", "expired_visa")
+
+    assert write_json_array(watchlist_file, watchlist_rows(100, 3)) == 100
+    assert write_json_array(entries_file, traveller_entries(
+        2500, 3, watchlist_size=100, watchlist_rate=0.1, invalid_kinds=kinds),
+        chunk_size=1000) == 2500
+    write_json_lines(lines_file, traveller_entries(
+        2500, 3, watchlist_size=100, watchlist_rate=0.1, invalid_kinds=kinds))
+    countries_file = os.path.join(bench.ASS2, "countries.json")
+    decisions = papers.decide(entries_file, watchlist_file, countries_file,
+                              today=REFERENCE_DATE)
+    assert len(decisions) == 2500
+    assert set(decisions) == {"Accept", "Reject", "Secondary", "Quarantine"}
+    assert papers.decide(lines_file, watchlist_file, countries_file,
+                         today=REFERENCE_DATE) == decisions
+
+    # checked on the date they were generated for, valid entries are not
+    # rejected, but those with an expired visa are, if they need a visa
+    write_json_lines(lines_file, traveller_entries(1000, 3, invalid_rate=0.0))
+    assert "Reject" not in papers.decide(lines_file, watchlist_file,
+                                         countries_file, today=REFERENCE_DATE)
+    write_json_lines(lines_file, traveller_entries(
+        1000, 3, invalid_rate=1.0, invalid_kinds=("expired_visa",)))
+    assert "Reject" in papers.decide(lines_file, watchlist_file,
+                                     countries_file, today=REFERENCE_DATE)
+
+    assert write_json_array(prices_file, price_rows(2000, 4)) == 2000
+    stock = mining.Stock("SYN", prices_file)
+    assert len(stock.six_best_months()) == 6
+
+    # the command line writes the same values, up to the date given
+    main(["entries", lines_file, "--count", "50", "--json-lines"])
+    assert list(papers.iter_json(lines_file)) == \
+        list(traveller_entries(50, 0))
+    main(["entries", lines_file, "--count", "50", "--json-lines",
+          "--invalid-rate", "0", "--today", "2020-06-01"])
+    visas = [entry["visa"]["date"] for entry in papers.iter_json(lines_file)
+             if "visa" in entry]
+    assert visas and all("2018-06-02" <= visa <= "2020-06-01"
+                         for visa in visas)
+    main(["prices", prices_file, "--count", "5", "--today", "2020-06-01"])
+    with open(prices_file) as file_handle:
+        assert json.load(file_handle)[0]["Date"] == "2020-06-01"
+
+    assert write_json_array(prices_file, []) == 0
+    with open(prices_file) as file_handle:
+        assert json.load(file_handle) == []
+
+
+def run_tests():
+    """
+    Run all tests above.
+    """
+    test_seeds()
+    test_values()
+
+run_tests()
@@ -6,9 +6,9 @@
     Purpose of Assignment: to create a program that converts letter and numerical grades to corresponding GPA according
     to the University of Toronto Graduate Student grading scheme
 
-    The program contains only one function: grade_to_gpa. The function parameters can either be a
-    letter grade (A+, A, A-, B+, B, B-, or FZ) or an integer (0-100). An error message will be given for any other types
-    of inputs.
+    The program's main function is grade_to_gpa. The function parameters can either be a letter grade (A+, A, A-, B+,
+    B, B-, or FZ) or an integer (0-100). An error message will be given for any other types of inputs. grades_to_gpa
+    converts many grades at once (e.g. a NumPy array) and reports an error code per grade instead of raising.
 
 """
 
@@ -20,6 +20,51 @@ __license__ = "MIT License"
 
 __status__ = "Complete"
 
+import itertools
+import numpy as np
+
+# GPA of each letter grade
+LETTER_GRADE_GPA = {"A+": 4.0,
+                    "A": 4.0,
+                    "A-": 3.7,
+                    "B+": 3.3,
+                    "B": 3.0,
+                    "B-": 2.7,
+                    "FZ": 0.0}
+
+# GPA of each letter grade, looked up by the character codes of its (one or two ASCII) characters
+LETTER_GRADE_GPA_ARRAY = np.full(128 * 128, np.nan)
+LETTER_GRADE_GPA_ARRAY[[ord(letter[0]) * 128 + ord(letter[1:] or "\0") for letter in LETTER_GRADE_GPA]] = \
+    list(LETTER_GRADE_GPA.values())
+
+# (lowest grade, highest grade, GPA) of each range of numerical grades
+NUMERICAL_GRADE_RANGES = ((85, 100, 4.0),
+                          (80, 84, 3.7),
+                          (77, 79, 3.3),
+                          (73, 76, 3.0),
+                          (70, 72, 2.7),
+                          (0, 69, 0.0))
+
+# GPA of each numerical grade 0-100, looked up by grade
+NUMERICAL_GRADE_GPA = tuple(gpa for grade in range(101)
+                            for lowest, highest, gpa in NUMERICAL_GRADE_RANGES if lowest <= grade <= highest)
+NUMERICAL_GRADE_GPA_ARRAY = np.array(NUMERICAL_GRADE_GPA)
+
+# GPA of every valid grade, letter or numerical, to convert lists of both at once; only exact integers and strings
+# are grades (not subclasses such as bool)
+GRADE_GPA = dict(itertools.chain(LETTER_GRADE_GPA.items(), enumerate(NUMERICAL_GRADE_GPA)))
+GRADE_TYPES = frozenset((int, str))
+
+# error codes of grades_to_gpa, and the error grade_to_gpa raises for each
+NO_ERROR = 0
+INVALID_TYPE = 1
+INVALID_LETTER_GRADE = 2
+INVALID_NUMERICAL_GRADE = 3
+GRADE_ERRORS = {
+    INVALID_TYPE: (TypeError, "Please enter a valid University of Toronto Graduate School grade (string or integer)"),
+    INVALID_LETTER_GRADE: (ValueError, "Please enter a valid University of Toronto Graduate School letter grade"),
+    INVALID_NUMERICAL_GRADE: (ValueError, "Please enter a valid University of Toronto Graduate School numerical grade")}
+
 
 def grade_to_gpa(grade):
     """
@@ -42,35 +87,170 @@ def grade_to_gpa(grade):
     """
 
     if type(grade) is str:
-        alphabetical_grade_gpa_dict = {"A+": 4.0,
-                                       "A" : 4.0,
-                                       "A-": 3.7,
-                                       "B+": 3.3,
-                                       "B" : 3.0,
-                                       "B-": 2.7,
-                                       "FZ": 0.0}         
-        if grade in alphabetical_grade_gpa_dict:
-            gpa = alphabetical_grade_gpa_dict[grade]
+        if grade in LETTER_GRADE_GPA:
+            gpa = LETTER_GRADE_GPA[grade]
         else:
-            raise ValueError("Please enter a valid University of Toronto Graduate School letter grade")
+            raise grade_error(INVALID_LETTER_GRADE)
 
     elif type(grade) is int:
-        if 85 <= grade <= 100:
-            gpa = 4.0
-        elif 80 <= grade <= 84:
-            gpa = 3.7
-        elif 77 <= grade <= 79:
-            gpa = 3.3
-        elif 73 <= grade <= 76:
-            gpa = 3.0
-        elif 70 <= grade <= 72:
-            gpa = 2.7
-        elif 0 <= grade <= 69:
-            gpa = 0.0
+        if 0 <= grade <= 100:
+            gpa = NUMERICAL_GRADE_GPA[grade]
         else:
-            raise ValueError("Please enter a valid University of Toronto Graduate School numerical grade")
-            
+            raise grade_error(INVALID_NUMERICAL_GRADE)
+
     else:
-        raise TypeError("Please enter a valid University of Toronto Graduate School grade (string or integer)")
+        raise grade_error(INVALID_TYPE)
 
     return gpa
+
+
+def grade_error(code):
+    """
+    The function grade_error returns the error grade_to_gpa raises for a grade that grades_to_gpa reports with code.
+
+    :param:
+        code (integer): an error code other than NO_ERROR
+
+    :return:
+        TypeError or ValueError: the error, with its message
+    """
+
+    error_type, message = GRADE_ERRORS[code]
+    return error_type(message)
+
+
+def grades_to_gpa(grades):
+    """
+    The function grades_to_gpa converts many grades to University of Toronto Graduate GPA at once, with the same
+    rules as grade_to_gpa. NumPy arrays and lists of integers or of letter grades are converted without calling
+    grade_to_gpa for each grade; NumPy integer arrays with a precomputed table and no Python loop at all. Lists that
+    mix types, and NumPy object arrays, are looked up at once in one table of all the valid grades.
+
+    :param:
+        grades (iterable or one-dimensional NumPy array): Grades to be converted, each an integer (0-100) or a string
+            (A+, A, A-, B+, B, B-, FZ). Integers and strings in NumPy arrays count as integers and strings.
+
+    :return:
+        tuple (gpas, errors) of NumPy arrays with one item per grade:
+            gpas holds the GPA of each grade (floats), NaN where the grade is not valid.
+            errors holds the error code of each grade (NO_ERROR, INVALID_TYPE, INVALID_LETTER_GRADE or
+            INVALID_NUMERICAL_GRADE); grade_error(code) is the error grade_to_gpa would raise.
+
+    :raises:
+        A ValueError will be raised if grades is a NumPy array with more than one dimension.
+    """
+
+    if isinstance(grades, np.ndarray):
+        if grades.ndim != 1:
+            raise ValueError("Please enter a one-dimensional array of grades")
+        return convert_array(grades)
+
+    values = grades if type(grades) is list else list(grades)
+    types = set(map(type, values))
+    if types == {str}:
+        gpas = np.fromiter(map(LETTER_GRADE_GPA.get, values, itertools.repeat(np.nan)), np.float64, len(values))
+        return gpas, np.where(np.isnan(gpas), INVALID_LETTER_GRADE, NO_ERROR).astype(np.int8)
+    if types == {int}:
+        try:
+            return convert_array(np.fromiter(values, np.int64, len(values)))
+        except OverflowError:
+            pass
+    if not types:
+        return convert_array(np.empty(0, dtype=np.int64))
+    return convert_mixed(values, types)
+
+
+def convert_array(grades):
+    """
+    The function convert_array converts a one-dimensional NumPy array of grades for grades_to_gpa.
+
+    :param:
+        grades (NumPy array): Grades to be converted
+
+    :return:
+        tuple (gpas, errors) as returned by grades_to_gpa
+    """
+
+    if grades.dtype.kind in "iu":
+        valid = (grades >= 0) & (grades <= 100)
+        gpas = NUMERICAL_GRADE_GPA_ARRAY[np.where(valid, grades, 0)]
+        gpas[~valid] = np.nan
+        return gpas, np.where(valid, NO_ERROR, INVALID_NUMERICAL_GRADE).astype(np.int8)
+
+    elif grades.dtype.kind == "U":
+        # one row of character codes per grade; longer or non-ASCII grades are not letter grades
+        codes = np.ascontiguousarray(grades).view(np.uint32).reshape(len(grades), grades.dtype.itemsize // 4)
+        first = codes[:, 0]
+        second = codes[:, 1] if codes.shape[1] > 1 else np.zeros_like(first)
+        valid = (first < 128) & (second < 128) & ~codes[:, 2:].any(axis=1)
+        gpas = LETTER_GRADE_GPA_ARRAY[np.where(valid, first * 128 + second, 0)]
+        return gpas, np.where(np.isnan(gpas), INVALID_LETTER_GRADE, NO_ERROR).astype(np.int8)
+
+    elif grades.dtype.kind == "O":
+        return convert_mixed(grades, set(map(type, grades)))
+
+    else:
+        # floats, booleans, bytes, dates... are not grades
+        return np.full(len(grades), np.nan), np.full(len(grades), INVALID_TYPE, dtype=np.int8)
+
+
+def convert_mixed(grades, types):
+    """
+    The function convert_mixed converts a sequence of grades of mixed types for grades_to_gpa. All the grades are
+    looked up at once in GRADE_GPA, which holds both letter and numerical grades; only grades of other types than
+    integers and strings (which are not valid) need one more pass over the grades.
+
+    :param:
+        grades (list or one-dimensional NumPy object array): Grades to be converted
+        types (set): the types of the grades
+
+    :return:
+        tuple (gpas, errors) as returned by grades_to_gpa
+    """
+
+    try:
+        gpas = np.fromiter(map(GRADE_GPA.get, grades, itertools.repeat(np.nan)), np.float64, len(grades))
+    except TypeError:
+        # grades that cannot be looked up, such as lists
+        return convert_one_by_one(grades)
+
+    errors = np.zeros(len(grades), dtype=np.int8)
+    if not types <= GRADE_TYPES:
+        # booleans and floats equal to a numerical grade (True == 1, 85.0 == 85) are found too, but are not grades
+        other = ~np.fromiter(map(GRADE_TYPES.__contains__, map(type, grades)), bool, len(grades))
+        gpas[other] = np.nan
+        errors[other] = INVALID_TYPE
+
+    invalid = np.flatnonzero(np.isnan(gpas) & (errors == NO_ERROR))
+    errors[invalid] = [INVALID_LETTER_GRADE if type(grades[index]) is str else INVALID_NUMERICAL_GRADE
+                       for index in invalid.tolist()]
+    return gpas, errors
+
+
+def convert_one_by_one(grades):
+    """
+    The function convert_one_by_one converts a sequence of grades of mixed types for grades_to_gpa, one at a time.
+
+    :param:
+        grades (sequence): Grades to be converted
+
+    :return:
+        tuple (gpas, errors) as returned by grades_to_gpa
+    """
+
+    gpas = np.full(len(grades), np.nan)
+    errors = np.zeros(len(grades), dtype=np.int8)
+    for index, grade in enumerate(grades):
+        if type(grade) is str:
+            if grade in LETTER_GRADE_GPA:
+                gpas[index] = LETTER_GRADE_GPA[grade]
+            else:
+                errors[index] = INVALID_LETTER_GRADE
+        elif type(grade) is int:
+            if 0 <= grade <= 100:
+                gpas[index] = NUMERICAL_GRADE_GPA[grade]
+            else:
+                errors[index] = INVALID_NUMERICAL_GRADE
+        else:
+            errors[index] = INVALID_TYPE
+    return gpas, errors
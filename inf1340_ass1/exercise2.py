@@ -11,6 +11,9 @@
     UPC-A barcode. Each digit is an integer. A TypeError will be raised if the input is not a string of single
     digit integers. A ValueError will be raised if the string is less or more than 12 digits.
 
+    The function checksums validates many barcodes at once (a list, a bytes buffer or a file of barcodes, one per
+    line) and reports an error code per barcode instead of raising.
+
 
 """
 
@@ -20,6 +23,22 @@ __email__ = "info.shuai@gmail.com, magdaleneschifferer@outlook.com"
 __copyright__ = "2014 Shuai Wang, Magdalene Schifferer"
 __license__ = "MIT License"
 
+import itertools
+import numpy as np
+
+# error codes of checksums, and the type of error checksum raises for each
+NO_ERROR = 0
+INVALID_TYPE = 1
+TOO_MANY_DIGITS = 2
+TOO_FEW_DIGITS = 3
+NOT_A_DIGIT = 4
+UPC_ERRORS = {INVALID_TYPE: TypeError,
+              TOO_MANY_DIGITS: ValueError,
+              TOO_FEW_DIGITS: ValueError,
+              NOT_A_DIGIT: ValueError}
+
+# weight of each of the first eleven digits in the checksum
+UPC_WEIGHTS = np.array([3, 1, 3, 1, 3, 1, 3, 1, 3, 1, 3], dtype=np.uint8)
 
 
 def checksum (upc):
@@ -78,4 +97,139 @@ def checksum (upc):
         return result == last_digit
 
 
+def checksums(upcs):
+    """
+    The function checksums validates many UPC-A barcodes at once, with the same rules as checksum. The barcodes are
+    converted to one matrix of character codes, whose checksums are computed together with NumPy.
+
+    :param:
+        upcs: the barcodes, as a list (or iterable, or NumPy array) of strings, or as a bytes buffer or binary file
+            holding one barcode per line (\n or \r\n line endings).
+
+    :return:
+        tuple (valid, errors) of NumPy arrays with one item per barcode:
+            valid is True where the barcode has the right format and a correct checksum.
+            errors holds the error code of each barcode (NO_ERROR, INVALID_TYPE, TOO_MANY_DIGITS, TOO_FEW_DIGITS or
+            NOT_A_DIGIT); UPC_ERRORS maps each code to the type of error checksum raises for the barcode.
+            Only ASCII digits count as digits.
+    """
+
+    if hasattr(upcs, "read"):
+        upcs = upcs.read()
+    if isinstance(upcs, (bytes, bytearray, memoryview)):
+        return checksums_from_lines(np.frombuffer(upcs, dtype=np.uint8))
+
+    if isinstance(upcs, np.ndarray) and upcs.dtype.kind in "US":
+        # one row of character codes per barcode (NumPy pads shorter strings with zeros)
+        code_type = np.uint32 if upcs.dtype.kind == "U" else np.uint8
+        codes = np.ascontiguousarray(upcs).view(code_type).reshape(len(upcs), -1)
+        lengths = np.char.str_len(upcs) if len(upcs) else np.zeros(0, dtype=np.intp)
+        if codes.shape[1] < 12:
+            codes = np.zeros((len(upcs), 12), dtype=code_type)  # all too short
+        return validate_digits(codes[:, :12], lengths)
+
+    upcs = upcs if type(upcs) is list else list(upcs)
+    is_string = None
+    if not set(map(type, upcs)) <= {str}:
+        is_string = np.fromiter((type(upc) is str for upc in upcs), bool, len(upcs))
+        upcs = [upc if type(upc) is str else "" for upc in upcs]
+
+    # the character codes of the barcodes of 12 characters, from one string of all of them
+    lengths = np.fromiter(map(len, upcs), np.intp, len(upcs))
+    twelve = lengths == 12
+    codes = np.zeros((len(upcs), 12), dtype=np.uint32)
+    joined = "".join(itertools.compress(upcs, twelve)).encode("utf-32-le", "surrogatepass")
+    codes[twelve] = np.frombuffer(joined, dtype=np.uint32).reshape(-1, 12)
+
+    valid, errors = validate_digits(codes, lengths)
+    if is_string is not None:
+        errors[~is_string] = INVALID_TYPE
+        valid[~is_string] = False
+    return valid, errors
+
+
+def checksums_from_lines(buffer):
+    """
+    The function checksums_from_lines validates a buffer of barcodes, one per line, without splitting it into strings.
+
+    :param:
+        buffer (NumPy array of uint8): the bytes of the barcodes
+
+    :return:
+        tuple (valid, errors) as returned by checksums
+    """
+
+    starts, lengths = split_lines(buffer)
+    return validate_digits(first_twelve(buffer, starts), lengths)
+
+
+def split_lines(buffer):
+    """
+    The function split_lines finds the lines of a buffer (\n or \r\n line endings; the last line may have none).
+
+    :param:
+        buffer (NumPy array of uint8): the bytes of the lines
+
+    :return:
+        tuple (starts, lengths) of NumPy arrays: the offset of each line in buffer, and its length without the line
+            ending
+    """
+
+    ends = np.flatnonzero(buffer == ord("\n"))
+    if len(buffer) and buffer[-1] != ord("\n"):
+        ends = np.append(ends, len(buffer))             # last line without a line break
+    starts = np.concatenate([[0], ends[:-1] + 1]).astype(np.intp)
+    lengths = ends - starts
+    # leave out the \r of \r\n line endings
+    if len(buffer):
+        lengths -= (lengths > 0) & (buffer[np.maximum(ends - 1, 0)] == ord("\r"))
+    return starts, lengths
+
+
+def first_twelve(buffer, starts):
+    """
+    The function first_twelve gathers the first 12 bytes of lines of a buffer into a matrix, from a sliding window over
+    the buffer. Rows of lines that end less than 12 bytes before the end of buffer (which must be too short to be
+    barcodes) hold other bytes.
+
+    :param:
+        buffer (NumPy array of uint8): the bytes of the lines
+        starts (NumPy array): the offset of each line in buffer
+
+    :return:
+        NumPy array of uint8 with one row of 12 bytes per line
+    """
+
+    if len(buffer) < 12:
+        return np.zeros((len(starts), 12), dtype=np.uint8)
+    windows = np.lib.stride_tricks.sliding_window_view(buffer, 12)
+    return windows[np.minimum(starts, len(buffer) - 12)]
+
+
+def validate_digits(codes, lengths):
+    """
+    The function validate_digits computes the checksums of a matrix of character codes.
+
+    :param:
+        codes (NumPy array of unsigned integers): the codes of the first 12 characters of each barcode, one row per
+            barcode
+        lengths (NumPy array): the length of each barcode
+
+    :return:
+        tuple (valid, errors) as returned by checksums
+    """
+
+    # codes below "0" wrap around to large numbers, so digits are exactly the values 0-9
+    digits = codes - codes.dtype.type(ord("0"))
+    is_digit = (digits <= 9).all(axis=1)
+
+    errors = np.full(len(lengths), NO_ERROR, dtype=np.int8)
+    errors[lengths < 12] = TOO_FEW_DIGITS
+    errors[lengths > 12] = TOO_MANY_DIGITS
+    errors[(lengths == 12) & ~is_digit] = NOT_A_DIGIT
 
+    # 3 * (odd-numbered digits) + (even-numbered digits) is at most 207, so it fits in the uint8 digits
+    digits = digits.astype(np.uint8)
+    result = (10 - (digits[:, :11] @ UPC_WEIGHTS) % 10) % 10
+    valid = (errors == NO_ERROR) & (result == digits[:, 11])
+    return valid, errors
@@ -13,6 +13,9 @@
     subtracts Player1's choice from Player2' choice. If the result is 0 (a tie), a 0 is returned. If the
     result is 1 (Player1 wins), a 1 is returned. If the result is 2 (Player2 wins), a 2 is returned.
 
+    decide_rounds decides many rounds at once: moves are encoded as small integers (encode_moves) and every round is
+    looked up in one precomputed table of outcomes with NumPy.
+
 
 """
 
@@ -24,6 +27,22 @@ __license__ = "MIT License"
 
 __status__ = "Complete"
 
+import itertools
+import numpy as np
+
+# the moves, and the code of each move
+MOVES = ("Rock", "Paper", "Scissors")
+MOVE_CODES = {move: code for code, move in enumerate(MOVES)}
+
+# code of a move that is not valid, and outcome of a round with one
+INVALID = -1
+
+# outcome of each round, looked up by the codes of the moves of player1 and player2
+OUTCOMES = ((0, 2, 1),
+            (1, 0, 2),
+            (2, 1, 0))
+OUTCOME_TABLE = np.array(OUTCOMES, dtype=np.int8).ravel()
+
 
 def decide_rps(player1, player2):
     """
@@ -59,16 +78,66 @@ def decide_rps(player1, player2):
         as long as player1 - player2 == 1 or -2, player1 wins.
   
     """
-    choices = {"Rock": 0, "Paper": 1, "Scissors": 2}
-    
-    if player1 in choices and player2 in choices:
-        if choices[player1] == choices[player2]:
-            return 0
-        elif (choices[player1] - choices[player2]) in[1, -2]:
-            return 1
-        else:
-            return 2        
+    if player1 in MOVE_CODES and player2 in MOVE_CODES:
+        return OUTCOMES[MOVE_CODES[player1]][MOVE_CODES[player2]]
     else:
         raise ValueError("Invalid value was entered. Please enter only the terms 'Rock',\
             'Paper' or 'Scissors'.")
-        
\ No newline at end of file
+
+
+def encode_moves(moves):
+    """
+    :param: moves: an iterable (or NumPy array) of moves: "Rock", "Paper" or "Scissors"
+
+    :return: NumPy array of int8, the code of each move in MOVE_CODES, or INVALID if it is not a move
+    """
+    if isinstance(moves, np.ndarray) and moves.dtype.kind == "U":
+        codes = np.full(len(moves), INVALID, dtype=np.int8)
+        for move, code in MOVE_CODES.items():
+            codes[moves == move] = code
+        return codes
+
+    moves = moves if type(moves) is list else list(moves)
+    try:
+        return np.fromiter(map(MOVE_CODES.get, moves, itertools.repeat(INVALID)), np.int8, len(moves))
+    except TypeError:
+        # unhashable moves, e.g. lists
+        return np.array([MOVE_CODES.get(move, INVALID) if type(move) is str else INVALID for move in moves],
+                        dtype=np.int8)
+
+
+def decide_rounds(player1, player2):
+    """
+    :param: player1, player2: the moves of each player in every round, either as codes (a NumPy integer array, see
+        MOVE_CODES) or as an iterable of moves ("Rock", "Paper" or "Scissors")
+
+    :return: NumPy array of int8 with the outcome of each round as decide_rps returns it
+        0: if Player1 and Player2 tie
+        1: if Player1 wins
+        2: if Player2 wins
+        INVALID (-1): if a move of the round is not valid
+
+    :raise:
+        ValueError if the players did not play the same number of rounds
+    """
+    player1 = as_codes(player1)
+    player2 = as_codes(player2)
+    if len(player1) != len(player2):
+        raise ValueError("Both players must play the same number of rounds.")
+
+    # codes outside 0-2 (which may overflow below) are not looked up
+    valid = (player1 >= 0) & (player1 <= 2) & (player2 >= 0) & (player2 <= 2)
+    outcomes = OUTCOME_TABLE[np.where(valid, player1 * 3 + player2, 0)]
+    outcomes[~valid] = INVALID
+    return outcomes
+
+
+def as_codes(moves):
+    """
+    :param: moves: codes (a NumPy integer array) or an iterable of moves
+
+    :return: NumPy array of integer codes
+    """
+    if isinstance(moves, np.ndarray) and moves.dtype.kind in "iu":
+        return moves
+    return encode_moves(moves)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+"""
+    INF 1340 (Fall 2014) Assignment 1, Exercise 2 extension
+
+    Purpose: to validate files of UPC-A barcodes (e.g. daily scan logs) with the checksum of exercise2, reporting only
+    the barcodes that fail.
+
+    The file is memory-mapped and validated in chunks straight from the mapped buffer, so memory use does not grow
+    with the size of the file and no string is made for any line. Barcodes are either one per line, or fixed-width
+    records of 12 digits followed by a fixed number of other bytes (e.g. a line break).
+
+"""
+
+__author__ = 'Shuai Wang, Magdalene Schifferer'
+__email__ = "info.shuai@gmail.com, magdaleneschifferer@outlook.com"
+
+__copyright__ = "2014 Shuai Wang, Magdalene Schifferer"
+__license__ = "MIT License"
+
+import argparse
+import mmap
+import os
+import sys
+import time
+import numpy as np
+from exercise2 import TOO_FEW_DIGITS
+from exercise2 import first_twelve
+from exercise2 import split_lines
+from exercise2 import validate_digits
+
+
+def scan_failures(file_name, record_width=None, chunk_size=16 * 1024 * 1024):
+    """
+    The function scan_failures validates a barcode file chunk by chunk and yields the barcodes that fail.
+
+    :param:
+        file_name (string): the barcode file
+        record_width (integer): the number of bytes of each fixed-width record (at least 12), or None if barcodes are
+            one per line
+        chunk_size (integer): the number of bytes validated at a time; a chunk is extended to the end of its last line
+
+    :return:
+        generator of tuples (offsets, errors, count), one per chunk: offsets holds the offset in the file of each
+            failing barcode, errors its error code (NO_ERROR meaning the check digit is wrong) and count is the number
+            of barcodes in the chunk. A fixed-width file that ends with a partial record reports it as TOO_FEW_DIGITS.
+
+    :raises:
+        A ValueError will be raised if record_width is less than 12.
+    """
+
+    if record_width is not None and record_width < 12:
+        raise ValueError("Records must be at least 12 bytes wide")
+    size = os.path.getsize(file_name)
+    if size == 0:
+        return
+
+    with open(file_name, "rb") as file_handle, \
+            mmap.mmap(file_handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        start = 0
+        released = 0
+        while start < size:
+            if record_width is None:
+                # end the chunk after its last line break (or the next one, for a line longer than the chunk)
+                end = size
+                if start + chunk_size < size:
+                    end = (mapped.rfind(b"\n", start, start + chunk_size) + 1 or
+                           mapped.find(b"\n", start + chunk_size) + 1 or size)
+                buffer = np.frombuffer(mapped, dtype=np.uint8, count=end - start, offset=start)
+                starts, lengths = split_lines(buffer)
+                valid, errors = validate_digits(first_twelve(buffer, starts), lengths)
+            else:
+                count = max(chunk_size // record_width, 1)
+                end = min(start + count * record_width, size - (size - start) % record_width)
+                if end == start:
+                    # a partial record at the end of the file
+                    end = size
+                    starts = np.zeros(1, dtype=np.intp)
+                    valid = np.zeros(1, dtype=bool)
+                    errors = np.full(1, TOO_FEW_DIGITS, dtype=np.int8)
+                else:
+                    buffer = np.frombuffer(mapped, dtype=np.uint8, count=end - start, offset=start)
+                    records = buffer.reshape(-1, record_width)
+                    starts = np.arange(0, end - start, record_width)
+                    valid, errors = validate_digits(records[:, :12], np.full(len(records), 12))
+                    del records
+
+            # no view of the mapped file may outlive the loop, so the file can be unmapped
+            buffer = None
+            failing = np.flatnonzero(~valid)
+            yield starts[failing].astype(np.int64) + start, errors[failing], len(valid)
+
+            # pages already validated need not stay in memory (they are read again from the file if needed)
+            if hasattr(mmap, "MADV_DONTNEED") and end >= released + mmap.PAGESIZE:
+                mapped.madvise(mmap.MADV_DONTNEED, released, end - end % mmap.PAGESIZE - released)
+                released = end - end % mmap.PAGESIZE
+            start = end
+
+
+def scan_file(file_name, output=None, record_width=None, chunk_size=16 * 1024 * 1024):
+    """
+    The function scan_file validates a barcode file, writing the offset and error code of each failing barcode to
+    output, and measures the throughput.
+
+    :param:
+        file_name (string): the barcode file
+        output (text file): where to write a line "offset error_code" per failing barcode (None: nowhere)
+        record_width (integer): the number of bytes of each fixed-width record, or None if barcodes are one per line
+        chunk_size (integer): the number of bytes validated at a time
+
+    :return:
+        dict: the numbers of "barcodes" and "failures", the "bytes" of the file, the "seconds" taken and the
+            "barcodes_per_second"
+    """
+
+    barcodes = 0
+    failures = 0
+    start_time = time.perf_counter()
+    for offsets, errors, count in scan_failures(file_name, record_width, chunk_size):
+        barcodes += count
+        failures += len(offsets)
+        if output is not None and len(offsets):
+            output.write("".join("{0} {1}\n".format(offset, error)
+                                 for offset, error in zip(offsets.tolist(), errors.tolist())))
+    seconds = time.perf_counter() - start_time
+
+    return {"barcodes": barcodes,
+            "failures": failures,
+            "bytes": os.path.getsize(file_name),
+            "seconds": round(seconds, 6),
+            "barcodes_per_second": round(barcodes / seconds, 1) if seconds > 0 else None}
+
+
+def main():
+    """
+    The function main is the command line entry point: it prints the failing barcodes, then the throughput on
+    standard error.
+    """
+
+    parser = argparse.ArgumentParser(description="Validate a file of UPC-A barcodes")
+    parser.add_argument("file_name")
+    parser.add_argument("--record-width", type=int, default=None,
+                        help="bytes per fixed-width record (default: one barcode per line)")
+    parser.add_argument("--chunk-size", type=int, default=16 * 1024 * 1024)
+    args = parser.parse_args()
+
+    stats = scan_file(args.file_name, sys.stdout, args.record_width, args.chunk_size)
+    print("{barcodes} barcodes, {failures} failures, {seconds} s, {barcodes_per_second} barcodes/s".format(**stats),
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
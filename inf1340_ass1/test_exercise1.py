@@ -11,7 +11,8 @@ __license__ = "MIT License"
 __status__ = "Complete"
 
 import pytest
-from exercise1 import grade_to_gpa
+import numpy as np
+from exercise1 import *
 
 
 def test_letter_grade():
@@ -85,8 +86,79 @@ def test_bool_input():
     with pytest.raises(TypeError):
         grade_to_gpa(True)
         grade_to_gpa(False)
- 
-      
+
+
+def test_bulk_grades():
+    """
+    Many grades at once, as a list or a NumPy array
+    """
+    grades = ["A+", "A", "A-", "B+", "B", "B-", "FZ", 100, 84, 79, 76, 72, 69, 0]
+    gpas, errors = grades_to_gpa(grades)
+    assert list(gpas) == [grade_to_gpa(grade) for grade in grades]
+    assert not errors.any()
+
+    # every numerical grade, as a list and as arrays of several integer types
+    numbers = list(range(-5, 106))
+    expected = [grade_to_gpa(grade) if 0 <= grade <= 100 else None for grade in numbers]
+    for bulk in [numbers, np.array(numbers), np.array(numbers, dtype=np.int16), iter(numbers)]:
+        gpas, errors = grades_to_gpa(bulk)
+        assert [None if np.isnan(gpa) else gpa for gpa in gpas] == expected
+        assert list(np.flatnonzero(errors)) == [0, 1, 2, 3, 4, 106, 107, 108, 109, 110]
+        assert set(errors[errors != NO_ERROR]) == {INVALID_NUMERICAL_GRADE}
+
+    # letter grades as an array
+    gpas, errors = grades_to_gpa(np.array(["B-", "C", "A+", "", "A++", "FZ"]))
+    assert list(gpas[[0, 2, 5]]) == [2.7, 4.0, 0.0]
+    assert list(errors) == [NO_ERROR, INVALID_LETTER_GRADE, NO_ERROR, INVALID_LETTER_GRADE, INVALID_LETTER_GRADE,
+                            NO_ERROR]
+
+
+def test_bulk_errors():
+    """
+    Invalid grades are reported with the error grade_to_gpa raises
+    """
+    grades = [82.5, True, "q", 101, "A", None, 2 ** 70]
+    gpas, errors = grades_to_gpa(grades)
+    assert np.isnan(gpas[errors != NO_ERROR]).all()
+    assert gpas[4] == 4.0
+    for grade, code in zip(grades, errors):
+        if code != NO_ERROR:
+            with pytest.raises(type(grade_error(code))) as error:
+                grade_to_gpa(grade)
+            assert str(error.value) == str(grade_error(code))
+
+    assert list(grades_to_gpa(np.array([1.0, 2.0]))[1]) == [INVALID_TYPE, INVALID_TYPE]
+    assert list(grades_to_gpa(np.array([True]))[1]) == [INVALID_TYPE]
+    assert list(grades_to_gpa(np.array([85, "A"], dtype=object))[0]) == [4.0, 4.0]
+    assert list(grades_to_gpa([[85], "A", 85])[1]) == [INVALID_TYPE, NO_ERROR, NO_ERROR]
+    assert len(grades_to_gpa([])[0]) == 0
+    with pytest.raises(ValueError):
+        grades_to_gpa(np.zeros((2, 2), dtype=int))
+
+
+def test_mixed_grades():
+    """
+    Letter and numerical grades mixed in one list or object array, with values of other types equal to grades
+    """
+    grades = (["A+", 85, "FZ", 0, "C", -1, 101, "B-", 100, "", 72] * 50 +
+              [True, False, 85.0, None, b"A", np.int64(85), 2 ** 70])
+    expected = []
+    for grade in grades:
+        try:
+            expected.append(grade_to_gpa(grade))
+        except (TypeError, ValueError):
+            expected.append(None)
+
+    for bulk in [grades, np.array(grades, dtype=object)]:
+        gpas, errors = grades_to_gpa(bulk)
+        assert [None if np.isnan(gpa) else gpa for gpa in gpas] == expected
+        for grade, code in zip(grades, errors):
+            if code != NO_ERROR:
+                with pytest.raises(type(grade_error(code))) as error:
+                    grade_to_gpa(grade)
+                assert str(error.value) == str(grade_error(code))
+
+
 def run_test():
     """
     Test function that runs all tests above.
@@ -95,5 +167,8 @@ def run_test():
     test_percentage_grade()
     test_float_input()
     test_bool_input()
+    test_bulk_grades()
+    test_bulk_errors()
+    test_mixed_grades()
     
 run_test()
\ No newline at end of file
@@ -11,8 +11,10 @@ __license__ = "MIT License"
 __status__ = "Prototype"
 
 
+import io
 import pytest
-from exercise2 import checksum
+import numpy as np
+from exercise2 import *
 
 
 def test_checksum():
@@ -41,11 +43,43 @@ def test_input():
         checksum("1234567890123")   # len 13
 
 
+def test_checksums():
+    """
+    Many barcodes at once, as a list, an array, a buffer and a file
+    """
+    upcs = ["786936224306", "085392132225", "717951000841", "1", "1234567890123", "78693622430a", "７86936224306",
+            1.0, None, "", "036000291452"]
+    valid, errors = checksums(upcs)
+    assert list(valid) == [True, True, False, False, False, False, False, False, False, False, True]
+    assert list(errors) == [NO_ERROR, NO_ERROR, NO_ERROR, TOO_FEW_DIGITS, TOO_MANY_DIGITS, NOT_A_DIGIT, NOT_A_DIGIT,
+                            INVALID_TYPE, INVALID_TYPE, TOO_FEW_DIGITS, NO_ERROR]
+
+    # errors are those checksum raises
+    for upc, code in zip(upcs, errors):
+        if code != NO_ERROR and upc != "７86936224306":
+            with pytest.raises(UPC_ERRORS[code]):
+                checksum(upc)
+
+    strings = [upc for upc in upcs if type(upc) is str and upc.isascii()]
+    expected = checksums(strings)
+    lines = "\n".join(strings).encode()
+    for bulk in [np.array(strings), np.array(strings, dtype=bytes), lines, lines + b"\n", lines.replace(b"\n", b"\r\n"),
+                 io.BytesIO(lines), iter(strings)]:
+        valid, errors = checksums(bulk)
+        assert list(valid) == list(expected[0])
+        assert list(errors) == list(expected[1])
+
+    assert len(checksums([])[0]) == 0
+    assert len(checksums(b"")[0]) == 0
+    assert list(checksums(np.array(["1", "22"]))[1]) == [TOO_FEW_DIGITS, TOO_FEW_DIGITS]
+
+
 def run_test():
     """
     Test function that runs all tests above.
     """
     test_checksum()
     test_input()
+    test_checksums()
     
 run_test()   
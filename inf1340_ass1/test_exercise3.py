@@ -11,8 +11,10 @@ __license__ = "MIT License"
 __status__ = "Complete"
 
 
+import itertools
 import pytest
-from exercise3 import decide_rps
+import numpy as np
+from exercise3 import *
 
 
 def test_rps():
@@ -38,6 +40,30 @@ def test_rps():
         decide_rps("Rock", "P")         # player2 invalid
         decide_rps("R", "S")            # both invalid
         decide_rps(True, 12)            # both invalid - non-string type
-    
 
-test_rps()
\ No newline at end of file
+
+def test_rounds():
+    """
+    Test function for decide_rounds().
+    """
+    # all 9 possibilities, as moves and as codes
+    pairs = list(itertools.product(MOVES, repeat=2))
+    player1 = [move1 for move1, move2 in pairs]
+    player2 = [move2 for move1, move2 in pairs]
+    expected = [decide_rps(move1, move2) for move1, move2 in pairs]
+    assert list(decide_rounds(player1, player2)) == expected
+    assert list(decide_rounds(np.array(player1), np.array(player2))) == expected
+    assert list(decide_rounds(encode_moves(player1), encode_moves(player2))) == expected
+    assert list(encode_moves(player1)) == [MOVE_CODES[move] for move in player1]
+
+    # invalid moves do not stop the other rounds
+    assert list(decide_rounds(["R", "Rock", True, "Paper", [1]], ["Paper", "Scissors", "Rock", 12, "Rock"])) == \
+        [INVALID, 1, INVALID, INVALID, INVALID]
+    assert list(decide_rounds(np.array([0, 3, -1, 2]), np.array([1, 0, 0, 1]))) == [2, INVALID, INVALID, 1]
+
+    with pytest.raises(ValueError):
+        decide_rounds(["Rock"], ["Rock", "Paper"])
+
+
+test_rps()
+test_rounds()
\ No newline at end of file
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+""" Module to test scanner.py """
+
+__author__ = 'Shuai Wang'
+__email__ = "info.shuai@gmail.com"
+
+__copyright__ = "2014 Shuai Wang"
+__license__ = "MIT License"
+
+__status__ = "Prototype"
+
+
+import io
+import pytest
+from exercise2 import *
+from scanner import *
+
+
+def test_scan_lines(tmpdir):
+    """
+    Barcodes one per line, validated in chunks of several sizes
+    """
+    upcs = ["786936224306", "085392132225", "717951000841", "1", "1234567890123", "78693622430a", "", "036000291452"]
+    valid, errors = checksums(upcs)
+    for line_end in ["\n", "\r\n"]:
+        scan_log = tmpdir.join("scan.log")
+        scan_log.write_binary((line_end.join(upcs) + line_end).encode())
+        offsets = [sum(len(upc) + len(line_end) for upc in upcs[:index]) for index in range(len(upcs))]
+        expected = [(offsets[index], errors[index]) for index in range(len(upcs)) if not valid[index]]
+
+        for chunk_size in [1, 20, 1000]:
+            failures = []
+            barcodes = 0
+            for failing, codes, count in scan_failures(str(scan_log), chunk_size=chunk_size):
+                failures += zip(failing.tolist(), codes.tolist())
+                barcodes += count
+            assert failures == expected
+            assert barcodes == len(upcs)
+
+    output = io.StringIO()
+    stats = scan_file(str(scan_log), output)
+    assert stats["barcodes"] == 8
+    assert stats["failures"] == 5
+    assert output.getvalue().splitlines()[0] == "28 0"      # wrong check digit of the third barcode
+
+
+def test_scan_records(tmpdir):
+    """
+    Fixed-width records, with a partial record at the end
+    """
+    scan_log = tmpdir.join("scan.dat")
+    scan_log.write_binary(b"786936224306\n717951000841\n78693622430a\n085392132225\n08539")
+    failures = [(offset, code) for failing, codes, count in scan_failures(str(scan_log), 13, chunk_size=26)
+                for offset, code in zip(failing.tolist(), codes.tolist())]
+    assert failures == [(13, NO_ERROR), (26, NOT_A_DIGIT), (52, TOO_FEW_DIGITS)]
+
+    scan_log.write_binary(b"")
+    assert scan_file(str(scan_log))["barcodes"] == 0
+
+
+def test_record_width():
+    """
+    Records must hold a barcode
+    """
+    with pytest.raises(ValueError):
+        list(scan_failures("scan.dat", 11))
+
+
+def run_test():
+    """
+    Test function that runs all tests above.
+    """
+    test_record_width()
+
+run_test()
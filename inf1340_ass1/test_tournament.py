@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+""" Module to test tournament.py """
+
+__author__ = 'Shuai Wang'
+__email__ = "info.shuai@gmail.com"
+
+__copyright__ = "2014 Shuai Wang"
+__license__ = "MIT License"
+
+__status__ = "Complete"
+
+
+from tournament import *
+
+PLAYERS = {"rocky": [1.0, 0.0, 0.0],
+           "papyrus": [0.0, 1.0, 0.0],
+           "edward": [0.0, 0.0, 1.0],
+           "random": [1 / 3, 1 / 3, 1 / 3],
+           "mostly paper": [0.1, 0.8, 0.1]}
+
+
+def test_match():
+    """
+    Test playing one match
+    """
+    assert play_match((0, ("rocky", [1, 0, 0]), ("papyrus", [0, 1, 0]), 1000, 0)) == ("rocky", "papyrus", 0, 1000, 0)
+    name1, name2, wins1, wins2, ties = play_match((1, ("random", PLAYERS["random"]), ("rocky", [1, 0, 0]), 3000, 7))
+    assert wins1 + wins2 + ties == 3000
+    assert 800 < wins1 < 1200
+    # the same match and seed give the same moves
+    assert play_match((1, ("random", PLAYERS["random"]), ("rocky", [1, 0, 0]), 3000, 7))[2:] == (wins1, wins2, ties)
+
+
+def test_leaderboard():
+    """
+    Test updating standings one result at a time
+    """
+    leaderboard = Leaderboard(["a", "b", "c"])
+    leaderboard.record(("a", "b", 10, 5, 0))
+    leaderboard.record(("b", "c", 3, 3, 4))
+    leaderboard.record_bye("c")
+    assert [name for name, record in leaderboard.standings()] == ["c", "a", "b"]
+    assert leaderboard.records["a"]["points"] == WIN_POINTS
+    assert leaderboard.records["b"] == {"points": DRAW_POINTS, "matches": 2, "wins": 0, "draws": 1, "losses": 1,
+                                        "rounds_won": 8, "rounds_lost": 13}
+    assert leaderboard.played == {frozenset(["a", "b"]), frozenset(["b", "c"])}
+
+
+def test_tournaments():
+    """
+    Test round-robin and Swiss tournaments, on one and on several processes
+    """
+    updates = []
+    serial = run_tournament(PLAYERS, 2000, workers=1, seed=3,
+                            on_result=lambda result, leaderboard: updates.append(result))
+    assert len(updates) == 10
+    assert all(record["matches"] == 4 for record in serial.records.values())
+    assert ("rocky", "papyrus", 0, 2000, 0) in updates      # paper always beats rock
+    parallel = run_tournament(PLAYERS, 2000, workers=2, seed=3)
+    assert parallel.standings() == serial.standings()
+
+    swiss = run_tournament(PLAYERS, 500, swiss_rounds=3, workers=1)
+    assert len(swiss.byes) == 3
+    assert len(swiss.played) == 6                          # two matches per round, no rematches
+    assert sum(record["matches"] for record in swiss.records.values()) == 12
+
+
+def test_pairings():
+    """
+    Test Swiss pairings that need backtracking or rematches
+    """
+    # pairing in order (a-b, then c-d) gives a rematch; a-c and b-d does not
+    played = {frozenset(pair) for pair in [("c", "d"), ("a", "d")]}
+    assert pair_new_opponents(["a", "b", "c", "d"], played) == [("a", "c"), ("b", "d")]
+    assert pair_new_opponents(["a", "b", "c", "d"], played, limit=0) is None
+    assert pair_fewest_rematches(["a", "b", "c", "d"], played) == [("a", "c"), ("b", "d")]
+
+    # d has met everyone: one rematch is unavoidable, and only one
+    played = {frozenset(pair) for pair in [("a", "d"), ("b", "d"), ("c", "d"), ("a", "b")]}
+    pairings = pair_fewest_rematches(["a", "b", "c", "d"], played)
+    assert sorted(name for pair in pairings for name in pair) == ["a", "b", "c", "d"]
+    assert sum(frozenset(pair) in played for pair in pairings) == 1
+
+
+def test_long_swiss():
+    """
+    Test a Swiss tournament of as many rounds as a round-robin, where late rounds are hard to pair
+    """
+    players = {"player{0}".format(number): [1 / 3, 1 / 3, 1 / 3] for number in range(30)}
+    swiss = run_tournament(players, 10, swiss_rounds=29, workers=1, seed=5)
+    assert all(record["matches"] == 29 for record in swiss.records.values())
+    assert len(swiss.played) == 30 * 29 // 2                # every pair once: no rematches were needed
+
+
+def run_test():
+    """
+    Test function that runs all tests above.
+    """
+    test_match()
+    test_leaderboard()
+    test_pairings()
+
+run_test()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+""" Module to test transcripts.py """
+
+__author__ = 'Shuai Wang'
+__email__ = "info.shuai@gmail.com"
+
+__copyright__ = "2014 Shuai Wang"
+__license__ = "MIT License"
+
+__status__ = "Complete"
+
+import json
+import pytest
+import exercise1
+from transcripts import *
+
+
+def test_aggregate():
+    """
+    Credit-weighted GPAs of batches of rows
+    """
+    batches = [(["ann", "ann", "bob"], ["2014F", "2015W", "2014F"], [1.0, 0.5, 1.0], ["A", 72, "B-"], 0),
+               (["ann", "bob", "bob"], ["2015W", "2014F", "2014F"], [0.5, float("nan"), 1.0], ["FZ", 90, 101], 2)]
+    totals = aggregate(batches)
+    assert totals["rows"] == 8
+    assert totals["errors"] == 4
+    assert totals["students"] == {"ann": [2.0, 4.0 + 0.5 * 2.7], "bob": [1.0, 2.7]}
+
+    report = gpa_report(totals)
+    assert report["ann"]["gpa"] == pytest.approx((4.0 + 0.5 * 2.7) / 2)
+    assert report["ann"]["terms"] == {"2014F": 4.0, "2015W": pytest.approx(2.7 / 2)}
+    assert report["bob"] == {"credits": 1.0, "gpa": 2.7, "terms": {"2014F": 2.7}}
+
+    # totals computed separately add up to the same totals
+    merged = merge_totals(aggregate(batches[:1]), aggregate(batches[1:]))
+    assert merged == totals
+
+    # a student with no valid rows has no GPA
+    assert gpa_report(aggregate([(["cy"], ["2014F"], [1.0], ["C"], 0)]))["cy"]["gpa"] is None
+
+
+def test_files(tmpdir):
+    """
+    CSV and JSON lines exports, on one and on several processes
+    """
+    rows = [{"student": "s" + str(number % 7), "course": "INF" + str(number), "term": "T" + str(number % 3),
+             "weight": [0.5, 1.0][number % 2], "grade": ["A+", 85, "B", 70, 65, "FZ", "Q"][number % 7]}
+            for number in range(200)]
+
+    csv_file = tmpdir.join("export.csv")
+    csv_file.write("course,student,term,grade,weight\n" +
+                   "".join("{course},{student},{term},{grade},{weight}\n".format(**row) for row in rows) +
+                   "broken\n")
+    jsonl_file = tmpdir.join("export.jsonl")
+    jsonl_file.write("".join(json.dumps(row) + "\n" for row in rows) + "{broken\n")
+
+    expected = aggregate_file(str(csv_file))
+    assert expected["rows"] == 201
+    assert expected["errors"] == 200 // 7 + 1
+    assert len(expected["students"]) == 7
+    assert len(expected["terms"]) == 21
+
+    for file_name in [str(csv_file), str(jsonl_file)]:
+        for workers, range_size in [(1, 1000), (2, 100), (2, 1)]:
+            totals = aggregate_file(file_name, workers, batch_size=16, range_size=range_size)
+            assert totals["rows"] == expected["rows"]
+            assert totals["errors"] == expected["errors"]
+            for name in ["students", "terms"]:
+                assert totals[name].keys() == expected[name].keys()
+                for key, (credit, point) in totals[name].items():
+                    assert credit == pytest.approx(expected[name][key][0])
+                    assert point == pytest.approx(expected[name][key][1])
+
+    csv_file.write("name,grade\nann,A\n")
+    with pytest.raises(ValueError):
+        aggregate_file(str(csv_file))
+
+
+def test_mixed_grades(monkeypatch):
+    """
+    Batches that mix letter and numerical grades are converted at once
+    """
+    lines = ["ann,2014F,{0},0.5\n".format(grade) for grade in ["A", "85", "085", " 90", "101", "-1", "x", "85.0"]]
+    students, terms, weights, grades, skipped = parse_lines(lines, [0, 1, 3, 2])
+    assert grades == ["A", 85, 85, 90, 101, -1, "x", "85.0"]
+
+    monkeypatch.setattr(exercise1, "convert_one_by_one", None)
+    totals = aggregate([(students, terms, weights, grades, skipped)])
+    assert totals["students"] == {"ann": [2.0, 4 * 0.5 * 4.0]}
+    assert totals["errors"] == 4
+
+
+def run_test():
+    """
+    Test function that runs all tests above.
+    """
+    test_aggregate()
+
+run_test()
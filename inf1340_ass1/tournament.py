@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+
+"""
+    INF 1340 (Fall 2014) Assignment 1, Exercise 3 extension
+
+    Purpose: to run rock, paper, scissors tournaments between players, scoring every round with decide_rounds of
+    exercise3.
+
+    A player is a name and the probability of each of its moves (rock, paper, scissors). A match is a number of
+    rounds between two players: the player who wins more rounds wins the match (3 points) and a drawn match gives
+    both players 1 point. Tournaments are round-robin (every player meets every other player once) or Swiss (in each
+    round, players with similar standings meet, without rematches). Matches run on a pool of processes and the
+    leaderboard is updated as each match result comes in.
+
+"""
+
+__author__ = 'Shuai Wang, Magdalene Schifferer'
+__email__ = "info.shuai@gmail.com, magdaleneschifferer@outlook.com"
+
+__copyright__ = "2014 Shuai Wang, Magdalene Schifferer"
+__license__ = "MIT License"
+
+__status__ = "Complete"
+
+import argparse
+import itertools
+import multiprocessing
+import numpy as np
+from exercise3 import decide_rounds
+
+# points for winning, drawing and losing a match
+WIN_POINTS = 3
+DRAW_POINTS = 1
+LOSS_POINTS = 0
+
+# rounds of a match played at a time, so that long matches use little memory
+ROUNDS_PER_BATCH = 1 << 20
+
+# pairings tried by the search for a Swiss round without rematches before a maximum matching is used instead
+BACKTRACK_LIMIT = 10000
+
+
+class Leaderboard:
+    """
+    Class for the standings of a tournament, updated one match result at a time.
+    """
+
+    def __init__(self, names):
+        """
+        (Leaderboard, iterable) -> NoneType
+        Creates a new Leaderboard of the players with the given names, with no matches played.
+        """
+        self.records = {name: {"points": 0, "matches": 0, "wins": 0, "draws": 0, "losses": 0,
+                               "rounds_won": 0, "rounds_lost": 0}
+                        for name in names}
+        self.played = set()
+        self.byes = set()
+
+    def record(self, result):
+        """
+        Adds a match result to the standings
+
+        :param: result: a tuple (name1, name2, wins1, wins2, ties) as returned by play_match
+        """
+        name1, name2, wins1, wins2, ties = result
+        for name, won, lost in [(name1, wins1, wins2), (name2, wins2, wins1)]:
+            record = self.records[name]
+            record["matches"] += 1
+            record["rounds_won"] += won
+            record["rounds_lost"] += lost
+            if won > lost:
+                record["wins"] += 1
+                record["points"] += WIN_POINTS
+            elif won == lost:
+                record["draws"] += 1
+                record["points"] += DRAW_POINTS
+            else:
+                record["losses"] += 1
+                record["points"] += LOSS_POINTS
+        self.played.add(frozenset([name1, name2]))
+
+    def record_bye(self, name):
+        """
+        Gives a player without an opponent in a Swiss round the points of a win
+        """
+        self.records[name]["points"] += WIN_POINTS
+        self.byes.add(name)
+
+    def standings(self):
+        """
+        :return: a list of (name, record) tuples, by points, then by difference of rounds won and lost, then by name
+        """
+        return sorted(self.records.items(),
+                      key=lambda item: (-item[1]["points"], item[1]["rounds_lost"] - item[1]["rounds_won"],
+                                        str(item[0])))
+
+
+def play_match(match):
+    """
+    Plays one match (used by run_tournament on worker processes)
+
+    :param: match: a tuple (match_id, player1, player2, rounds, seed), each player being a tuple (name, weights) with
+        the probabilities of rock, paper and scissors. The moves depend only on seed and match_id.
+
+    :return: a tuple (name1, name2, wins1, wins2, ties): the number of rounds won by each player and the number tied
+    """
+    match_id, (name1, weights1), (name2, weights2), rounds, seed = match
+    generator = np.random.default_rng([seed, match_id])
+    counts = np.zeros(3, dtype=np.int64)
+    for start in range(0, rounds, ROUNDS_PER_BATCH):
+        size = min(ROUNDS_PER_BATCH, rounds - start)
+        moves1 = generator.choice(3, size=size, p=weights1).astype(np.int8)
+        moves2 = generator.choice(3, size=size, p=weights2).astype(np.int8)
+        counts += np.bincount(decide_rounds(moves1, moves2), minlength=3)
+    ties, wins1, wins2 = counts.tolist()
+    return name1, name2, wins1, wins2, ties
+
+
+def round_robin_pairings(names):
+    """
+    :param: names: the names of the players
+
+    :return: a list of (name1, name2) tuples, every pair of players once
+    """
+    return list(itertools.combinations(names, 2))
+
+
+def swiss_pairings(leaderboard):
+    """
+    Pairs players for a Swiss round: in order of the standings, each player meets the next player they have not met
+    yet, going back on earlier pairings (for a bounded number of steps) if the last players have all met. If that finds
+    no pairing, a maximum matching of the players who have not met gives the pairing with the fewest rematches. With an
+    odd number of players, the lowest ranked player without a bye gets one.
+
+    :param: leaderboard: the Leaderboard of the tournament so far
+
+    :return: a tuple (pairings, bye): a list of (name1, name2) tuples, and the name of the player with a bye or None
+    """
+    waiting = [name for name, record in leaderboard.standings()]
+    bye = None
+    if len(waiting) % 2:
+        bye = next((name for name in reversed(waiting) if name not in leaderboard.byes), waiting[-1])
+        waiting.remove(bye)
+
+    pairings = pair_new_opponents(waiting, leaderboard.played)
+    if pairings is None:
+        pairings = pair_fewest_rematches(waiting, leaderboard.played)
+    return pairings, bye
+
+
+def pair_new_opponents(names, played, limit=BACKTRACK_LIMIT):
+    """
+    :param: names: the names of the players to pair, in order of the standings
+    :param: played: a set of frozensets of the pairs of players who have met
+    :param: limit: the number of pairings tried before giving up
+
+    :return: a list of (name1, name2) tuples pairing every player with one they have not met, the first player with
+        the highest ranked possible opponent and so on; None if no such pairing is found within limit tries
+    """
+    budget = [limit]
+
+    def search(names):
+        if not names:
+            return []
+        first = names[0]
+        for opponent in names[1:]:
+            if frozenset([first, opponent]) not in played:
+                budget[0] -= 1
+                if budget[0] < 0:
+                    return None
+                rest = search([name for name in names[1:] if name != opponent])
+                if rest is not None:
+                    return [(first, opponent)] + rest
+        return None
+
+    return search(list(names))
+
+
+def pair_fewest_rematches(names, played):
+    """
+    Pairs players with as few rematches as possible: a maximum matching (Edmonds' blossom algorithm, polynomial time)
+    of the players who have not met, starting from a greedy pairing in order of the standings; the players it leaves
+    unmatched meet in order of the standings.
+
+    :param: names: the names of the players to pair (an even number), in order of the standings
+    :param: played: a set of frozensets of the pairs of players who have met
+
+    :return: a list of (name1, name2) tuples, ordered by the standing of the higher ranked player
+    """
+    count = len(names)
+    adjacent = [[other for other in range(count)
+                 if other != player and frozenset([names[player], names[other]]) not in played]
+                for player in range(count)]
+
+    match = [-1] * count
+    for player in range(count):
+        if match[player] == -1:
+            opponent = next((other for other in adjacent[player] if other > player and match[other] == -1), -1)
+            if opponent != -1:
+                match[player], match[opponent] = opponent, player
+    maximum_matching(adjacent, match)
+
+    unmatched = [player for player in range(count) if match[player] == -1]
+    for player, opponent in zip(unmatched[0::2], unmatched[1::2]):
+        match[player], match[opponent] = opponent, player
+    return [(names[player], names[match[player]]) for player in range(count) if player < match[player]]
+
+
+def maximum_matching(adjacent, match):
+    """
+    Grows a matching of a graph into a maximum matching by augmenting paths (Edmonds' blossom algorithm)
+
+    :param: adjacent: for each vertex, the list of its neighbours
+    :param: match: for each vertex, the vertex it is matched with or -1; updated
+    """
+    count = len(adjacent)
+
+    def find_augmenting_path(root):
+        used = [False] * count
+        parent = [-1] * count
+        base = list(range(count))
+        used[root] = True
+        queue = [root]
+
+        def common_base(a, b):
+            seen = [False] * count
+            while True:
+                a = base[a]
+                seen[a] = True
+                if match[a] == -1:
+                    break
+                a = parent[match[a]]
+            while True:
+                b = base[b]
+                if seen[b]:
+                    return b
+                b = parent[match[b]]
+
+        def mark_path(vertex, blossom_base, child, blossom):
+            while base[vertex] != blossom_base:
+                blossom[base[vertex]] = blossom[base[match[vertex]]] = True
+                parent[vertex] = child
+                child = match[vertex]
+                vertex = parent[match[vertex]]
+
+        for vertex in queue:
+            for other in adjacent[vertex]:
+                if base[vertex] == base[other] or match[vertex] == other:
+                    continue
+                if other == root or (match[other] != -1 and parent[match[other]] != -1):
+                    # an odd cycle: contract the blossom into its base
+                    blossom_base = common_base(vertex, other)
+                    blossom = [False] * count
+                    mark_path(vertex, blossom_base, other, blossom)
+                    mark_path(other, blossom_base, vertex, blossom)
+                    for member in range(count):
+                        if blossom[base[member]]:
+                            base[member] = blossom_base
+                            if not used[member]:
+                                used[member] = True
+                                queue.append(member)
+                elif parent[other] == -1:
+                    parent[other] = vertex
+                    if match[other] == -1:
+                        return other, parent
+                    used[match[other]] = True
+                    queue.append(match[other])
+        return -1, parent
+
+    for root in range(count):
+        if match[root] != -1:
+            continue
+        end, parent = find_augmenting_path(root)
+        while end != -1:
+            previous = parent[end]
+            following = match[previous]
+            match[end], match[previous] = previous, end
+            end = following
+
+
+def run_tournament(players, rounds, swiss_rounds=None, workers=None, seed=0, on_result=None):
+    """
+    Runs a tournament, playing matches on a pool of processes
+
+    :param: players: a dict mapping each player's name to the probabilities of rock, paper and scissors
+    :param: rounds: number of rounds per match
+    :param: swiss_rounds: number of Swiss rounds, or None for a round-robin tournament
+    :param: workers: number of worker processes (None: number of CPUs; 1: no worker processes)
+    :param: seed: seed of all the moves, so that a tournament can be replayed
+    :param: on_result: function called with the result and the Leaderboard after each match
+
+    :return: the Leaderboard at the end of the tournament
+    """
+    leaderboard = Leaderboard(players)
+    pool = multiprocessing.Pool(workers) if workers != 1 else None
+    match_ids = itertools.count()
+
+    def play(pairings):
+        matches = [(next(match_ids), (name1, players[name1]), (name2, players[name2]), rounds, seed)
+                   for name1, name2 in pairings]
+        results = pool.imap_unordered(play_match, matches) if pool is not None else map(play_match, matches)
+        for result in results:
+            leaderboard.record(result)
+            if on_result is not None:
+                on_result(result, leaderboard)
+
+    try:
+        if swiss_rounds is None:
+            play(round_robin_pairings(list(players)))
+        else:
+            for swiss_round in range(swiss_rounds):
+                pairings, bye = swiss_pairings(leaderboard)
+                if bye is not None:
+                    leaderboard.record_bye(bye)
+                play(pairings)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return leaderboard
+
+
+def main():
+    """
+    Command line entry point: runs a tournament between players with random move probabilities and prints the
+    leaderboard.
+    """
+    parser = argparse.ArgumentParser(description="Rock, paper, scissors tournament")
+    parser.add_argument("--players", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=100000, help="rounds per match")
+    parser.add_argument("--swiss", type=int, default=None, help="number of Swiss rounds (default: round-robin)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generator = np.random.default_rng(args.seed)
+    players = {"player{0}".format(number): generator.dirichlet([1, 1, 1]).tolist()
+               for number in range(1, args.players + 1)}
+    leaderboard = run_tournament(players, args.rounds, args.swiss, args.workers, args.seed)
+    for rank, (name, record) in enumerate(leaderboard.standings(), 1):
+        print("{0:>3} {1:<12} {points:>4} pts  {wins}-{draws}-{losses}  rounds {rounds_won}-{rounds_lost}".format(
+            rank, name, **record))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+
+"""
+    INF 1340 (Fall 2014) Assignment 1, Exercise 1 extension
+
+    Purpose: to compute credit-weighted cumulative and per-term GPAs from transcript exports, converting grades with
+    the University of Toronto Graduate Student grading scheme of exercise1.
+
+    A transcript export is a CSV file with a header row, or a JSON lines file (one object per line), with the fields
+    student, term, course, weight (credit weight) and grade (0-100 or A+, A, A-, B+, B, B-, FZ). The file is read in
+    batches, in a single pass, keeping only running credit and grade point totals for each student and each term of
+    a student. Large files can be split into byte ranges that are totalled on several processes.
+
+"""
+
+__author__ = 'Shuai Wang, Magdalene Schifferer'
+__email__ = "info.shuai@gmail.com, magdaleneschifferer@outlook.com"
+
+__copyright__ = "2014 Shuai Wang, Magdalene Schifferer"
+__license__ = "MIT License"
+
+__status__ = "Complete"
+
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import numpy as np
+from exercise1 import LETTER_GRADE_GPA
+from exercise1 import NO_ERROR
+from exercise1 import grades_to_gpa
+
+# fields every transcript row must have (other fields, like course, are ignored)
+FIELDS = ("student", "term", "weight", "grade")
+
+# integer grades as they are usually written in CSV files
+NUMERALS = {str(number): number for number in range(101)}
+
+
+def new_totals():
+    """
+    The function new_totals returns empty running totals.
+
+    :return:
+        dict: "students" maps each student, and "terms" each (student, term) pair, to a list [credits, grade points];
+            "rows" counts the rows read and "errors" the rows left out because they are not valid.
+    """
+
+    return {"students": {}, "terms": {}, "rows": 0, "errors": 0}
+
+
+def read_batches(file_name, start=0, end=None, batch_size=65536):
+    """
+    The function read_batches reads the rows of a transcript export in batches of columns. Only the rows of the lines
+    that start within the byte range [start, end) are read, so that a file can be split into ranges that are read
+    independently; every line belongs to exactly one range.
+
+    :param:
+        file_name (string): a .csv file with a header row, or a JSON lines file
+        start (integer): first byte of the range
+        end (integer): end of the range (default: end of the file)
+        batch_size (integer): number of lines per batch
+
+    :return:
+        generator of tuples (students, terms, weights, grades, skipped): lists of the fields of each valid row, weights
+            being floats (NaN if not a number), and the number of lines skipped because they are not rows.
+
+    :raises:
+        A ValueError will be raised if the header of a CSV file does not have all the FIELDS.
+    """
+
+    is_csv = file_name.lower().endswith(".csv")
+    if end is None:
+        end = os.path.getsize(file_name)
+
+    with open(file_name, "rb") as file_handle:
+        columns = None
+        if is_csv:
+            header = next(csv.reader([file_handle.readline().decode("utf-8-sig")]), [])
+            if not set(FIELDS) <= set(header):
+                raise ValueError("Transcript header must have the fields: " + ", ".join(FIELDS))
+            columns = [header.index(field) for field in FIELDS]
+
+        # the line starting at start belongs to this range, unless start is inside the header
+        position = file_handle.tell()
+        if start > position:
+            file_handle.seek(start - 1)
+            position = start - 1 + len(file_handle.readline())
+
+        lines = []
+        while position < end:
+            line = file_handle.readline()
+            if not line:
+                break
+            position += len(line)
+            lines.append(line.decode("utf-8"))
+            if len(lines) == batch_size:
+                yield parse_lines(lines, columns)
+                lines = []
+        if lines:
+            yield parse_lines(lines, columns)
+
+
+def parse_lines(lines, columns):
+    """
+    The function parse_lines converts a batch of lines of a transcript export into columns.
+
+    :param:
+        lines (list of strings): lines of a CSV file (after its header) or of a JSON lines file
+        columns (list of integers or None): position of each of the FIELDS in a CSV row, None for JSON lines
+
+    :return:
+        tuple (students, terms, weights, grades, skipped) as yielded by read_batches
+    """
+
+    students, terms, weights, grades = [], [], [], []
+    skipped = 0
+
+    if columns is not None:
+        rows = csv.reader(lines)
+        width = max(columns) + 1
+        for row in rows:
+            if len(row) < width:
+                skipped += bool(row)            # blank lines are not counted
+                continue
+            student, term, weight, grade = [row[column] for column in columns]
+            try:
+                weight = float(weight)
+            except ValueError:
+                weight = math.nan
+            students.append(student)
+            terms.append(term)
+            weights.append(weight)
+            grades.append(grade)
+        grades = parse_grades(grades)
+
+    else:
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                student, term, weight, grade = [row[field] for field in FIELDS]
+                hash((student, term))
+            except (ValueError, KeyError, TypeError):
+                skipped += 1
+                continue
+            if type(weight) is not int and type(weight) is not float:
+                weight = math.nan
+            students.append(student)
+            terms.append(term)
+            weights.append(weight)
+            grades.append(grade)
+
+    return students, terms, weights, grades, skipped
+
+
+def parse_grades(grades):
+    """
+    The function parse_grades converts the grades of a batch of CSV rows that are integers to int, keeping the other
+    grades (letter grades, or not grades) as strings, so that grades_to_gpa converts the batch at once. Integers
+    written the usual way are looked up in NUMERALS; int() is only tried on the distinct other strings.
+
+    :param:
+        grades (list of strings): the grades of the rows
+
+    :return:
+        list: the grades, as integers or strings
+    """
+
+    grades = list(map(NUMERALS.get, grades, grades))
+    numbers = {}
+    for grade in set(grades):
+        if type(grade) is str and grade not in LETTER_GRADE_GPA:
+            try:
+                numbers[grade] = int(grade)
+            except ValueError:
+                pass                            # not a grade
+    if numbers:
+        grades = list(map(numbers.get, grades, grades))
+    return grades
+
+
+def aggregate(batches, totals=None):
+    """
+    The function aggregate adds batches of transcript rows to running totals, converting grades with grades_to_gpa.
+    Rows with an invalid grade or weight (not a finite number, or negative) are counted as errors and left out.
+
+    :param:
+        batches (iterable): tuples (students, terms, weights, grades, skipped) as yielded by read_batches
+        totals (dict): running totals to add to (default: new_totals())
+
+    :return:
+        dict: the running totals
+    """
+
+    if totals is None:
+        totals = new_totals()
+
+    for students, terms, weights, grades, skipped in batches:
+        gpas, errors = grades_to_gpa(grades)
+        weights = np.array(weights, dtype=np.float64)
+        valid = (errors == NO_ERROR) & (weights >= 0) & np.isfinite(weights)
+        credits = np.where(valid, weights, 0.0)
+        points = np.where(valid, weights * gpas, 0.0)
+
+        add_grouped(totals["students"], students, credits, points)
+        add_grouped(totals["terms"], list(zip(students, terms)), credits, points)
+        totals["rows"] += len(students) + skipped
+        totals["errors"] += len(students) - int(valid.sum()) + skipped
+
+    return totals
+
+
+def add_grouped(groups, keys, credits, points):
+    """
+    The function add_grouped adds the credits and grade points of a batch of rows to the totals of their keys.
+
+    :param:
+        groups (dict): maps each key to a list [credits, grade points]
+        keys (list): the key of each row
+        credits (NumPy array): the credits of each row
+        points (NumPy array): the grade points (credits * GPA) of each row
+    """
+
+    index = {}
+    codes = np.fromiter((index.setdefault(key, len(index)) for key in keys), np.intp, len(keys))
+    credit_sums = np.bincount(codes, weights=credits, minlength=len(index))
+    point_sums = np.bincount(codes, weights=points, minlength=len(index))
+
+    for key, credit, point in zip(index, credit_sums.tolist(), point_sums.tolist()):
+        total = groups.get(key)
+        if total is None:
+            groups[key] = [credit, point]
+        else:
+            total[0] += credit
+            total[1] += point
+
+
+def merge_totals(totals, other):
+    """
+    The function merge_totals adds running totals computed separately (e.g. on another process) to totals.
+
+    :param:
+        totals (dict): running totals, updated
+        other (dict): running totals to add
+
+    :return:
+        dict: totals
+    """
+
+    for name in ("students", "terms"):
+        groups = totals[name]
+        for key, (credit, point) in other[name].items():
+            total = groups.get(key)
+            if total is None:
+                groups[key] = [credit, point]
+            else:
+                total[0] += credit
+                total[1] += point
+    totals["rows"] += other["rows"]
+    totals["errors"] += other["errors"]
+    return totals
+
+
+def aggregate_range(job):
+    """
+    The function aggregate_range totals one byte range of a transcript export (used by aggregate_file on worker
+    processes).
+
+    :param:
+        job (tuple): (file_name, start, end, batch_size)
+
+    :return:
+        dict: the running totals of the range
+    """
+
+    file_name, start, end, batch_size = job
+    return aggregate(read_batches(file_name, start, end, batch_size))
+
+
+def aggregate_file(file_name, workers=1, batch_size=65536, range_size=64 * 1024 * 1024):
+    """
+    The function aggregate_file totals a transcript export, on several processes if workers is not 1. The file is
+    split into byte ranges of about range_size bytes, whose totals are merged in order. Rows of CSV files must not
+    contain line breaks inside quoted fields, as files are split into lines before parsing.
+
+    :param:
+        file_name (string): a .csv file with a header row, or a JSON lines file
+        workers (integer): number of worker processes (None: number of CPUs; 1: no worker processes)
+        batch_size (integer): number of lines per batch
+        range_size (integer): number of bytes per range
+
+    :return:
+        dict: the running totals of the file
+    """
+
+    size = os.path.getsize(file_name)
+    if workers == 1:
+        return aggregate(read_batches(file_name, 0, size, batch_size))
+
+    jobs = [(file_name, start, min(start + range_size, size), batch_size) for start in range(0, size, range_size)]
+    totals = new_totals()
+    with multiprocessing.Pool(workers) as pool:
+        for partial in pool.imap(aggregate_range, jobs):
+            merge_totals(totals, partial)
+    return totals
+
+
+def gpa_report(totals):
+    """
+    The function gpa_report computes GPAs from running totals.
+
+    :param:
+        totals (dict): running totals
+
+    :return:
+        dict: maps each student to a dict with "credits", "gpa" (cumulative) and "terms", which maps each term to its
+            GPA. A GPA is None if there are no credits to weight it by.
+    """
+
+    def weighted(credit, point):
+        return point / credit if credit > 0 else None
+
+    report = {student: {"credits": credit, "gpa": weighted(credit, point), "terms": {}}
+              for student, (credit, point) in totals["students"].items()}
+    for (student, term), (credit, point) in totals["terms"].items():
+        report[student]["terms"][term] = weighted(credit, point)
+    return report
+
+
+def main():
+    """
+    The function main is the command line entry point: it prints one JSON line per student with their cumulative
+    and per-term GPAs, then a summary line.
+    """
+
+    parser = argparse.ArgumentParser(description="Credit-weighted GPAs from a transcript export")
+    parser.add_argument("file_name")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (0: one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=65536)
+    args = parser.parse_args()
+
+    totals = aggregate_file(args.file_name, args.workers or None, args.batch_size)
+    for student, result in sorted(gpa_report(totals).items(), key=lambda item: str(item[0])):
+        print(json.dumps(dict(student=student, **result)))
+    print(json.dumps({"rows": totals["rows"], "errors": totals["errors"]}))
+
+
+if __name__ == "__main__":
+    main()
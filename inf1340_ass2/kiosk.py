@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+
+""" Border kiosk service: decides entries for Kanadia over a local socket """
+
+__author__ = "Shuai Wang"
+__email__ = "info.shuai@gmail.com"
+
+# imports one per line
+import argparse
+import asyncio
+import json
+import time
+from papers import DecisionContext
+from papers import decide_entry
+from papers import parse_json
+
+# default maximum length in bytes of a request or response line
+LINE_LIMIT = 16 * 1024 * 1024
+
+
+class KioskServer:
+    """
+    Class for an asyncio service that decides traveller entries sent by
+    kiosks. The watchlist and country data stay in memory between requests.
+
+    Protocol (JSON Lines, UTF-8): every request is one line holding either a
+    single entry object or a list of entries (a micro-batch). Every response
+    is one line holding {"decision": str} or {"decisions": [str, ...]}, or
+    {"error": str} if the request could not be decided (including request
+    lines longer than line_limit bytes).
+    """
+
+    def __init__(self, watchlist_file, countries_file, refresh_interval=1.0,
+                 stats=None, line_limit=LINE_LIMIT):
+        """
+        (KioskServer, str, str, float, RuleStats, int) -> NoneType
+        Creates a new KioskServer deciding against watchlist_file and
+        countries_file, which (like the current date) are checked for
+        changes at most once every refresh_interval seconds. If stats is a
+        RuleStats, the rules of every decision are counted and timed in it.
+        Request lines may be up to line_limit bytes long.
+        """
+        self.context = DecisionContext(watchlist_file, countries_file,
+                                       stats=stats)
+        self.refresh_interval = refresh_interval
+        self.last_refresh = time.monotonic()
+        self.line_limit = line_limit
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        """
+        Starts listening on a TCP host and port (0 picks a free port)
+
+        :return: the (host, port) address the server listens on
+        """
+        self.server = await asyncio.start_server(self.handle_client,
+                                                 host, port,
+                                                 limit=self.line_limit)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def start_unix(self, path):
+        """
+        Starts listening on a Unix domain socket at path
+
+        :return: the path the server listens on
+        """
+        self.server = await asyncio.start_unix_server(self.handle_client,
+                                                      path,
+                                                      limit=self.line_limit)
+        return path
+
+    async def close(self):
+        """
+        Stops the server and waits until it is closed.
+        """
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    def respond(self, line):
+        """
+        Decides one request line
+
+        :param line: bytes, one JSON encoded entry or list of entries
+        :return: a dict, the response to send back
+        """
+        now = time.monotonic()
+        if now - self.last_refresh >= self.refresh_interval:
+            self.context.begin_batch()
+            self.last_refresh = now
+
+        try:
+            request = json.loads(line)
+            if type(request) is list:
+                return {"decisions": [decide_entry(entry, self.context)
+                                      for entry in request]}
+            elif type(request) is dict:
+                return {"decision": decide_entry(request, self.context)}
+            else:
+                return {"error": "Request must be an entry or a list"}
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            return {"error": "Invalid entry: {0!r}".format(error)}
+
+    async def handle_client(self, reader, writer):
+        """
+        Answers request lines from one kiosk until it disconnects.
+        """
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as error:
+                    line = error.partial        # last line, without "\n"
+                except asyncio.LimitOverrunError:
+                    await skip_line(reader)
+                    line = None
+                if line is None:
+                    response = {"error": "Request longer than {0} bytes"
+                                .format(self.line_limit)}
+                elif not line:
+                    break
+                elif not line.strip():
+                    continue
+                else:
+                    response = self.respond(line)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def skip_line(reader):
+    """
+    Reads and drops the rest of a line that is longer than the limit of
+    reader, a part at a time
+
+    :param reader: a StreamReader
+    """
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            return
+        except asyncio.IncompleteReadError:
+            return
+        except asyncio.LimitOverrunError as error:
+            await reader.readexactly(error.consumed)
+
+
+class KioskClient:
+    """
+    Class for a kiosk connection to a KioskServer.
+    """
+
+    def __init__(self, reader, writer):
+        """
+        (KioskClient, StreamReader, StreamWriter) -> NoneType
+        Creates a new KioskClient on an open connection.
+        """
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=None, path=None,
+                      line_limit=LINE_LIMIT):
+        """
+        Opens a connection to a server on a TCP port or a Unix socket path
+
+        :param line_limit: maximum length in bytes of a response line
+        :return: a KioskClient
+        """
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(
+                path, limit=line_limit)
+        else:
+            reader, writer = await asyncio.open_connection(
+                host, port, limit=line_limit)
+        return cls(reader, writer)
+
+    async def request(self, payload):
+        """
+        Sends one request and waits for its response
+
+        :param payload: an entry or a list of entries
+        :return: the response dict
+        """
+        self.writer.write(json.dumps(payload).encode() + b"\n")
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection")
+        return json.loads(line)
+
+    async def decide(self, entry):
+        """
+        Decides a single entry
+
+        :param entry: entry record of a traveler
+        :return: a string, the decision
+        """
+        response = await self.request(entry)
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["decision"]
+
+    async def decide_batch(self, entries):
+        """
+        Decides a micro-batch of entries in one request
+
+        :param entries: a list of entry records
+        :return: a list of strings, one decision per entry
+        """
+        response = await self.request(list(entries))
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["decisions"]
+
+    async def close(self):
+        """
+        Closes the connection.
+        """
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def benchmark(entries, requests, concurrency=1, batch_size=1,
+                    host="127.0.0.1", port=None, path=None):
+    """
+    Measures throughput and latency of a running server. Each of the
+    concurrency clients sends its share of requests one after another,
+    cycling through entries.
+
+    :param entries: a list of entry records to send
+    :param requests: total number of requests to send
+    :param concurrency: number of simultaneous client connections
+    :param batch_size: number of entries per request
+    :return: a dict with the number of requests and entries, the elapsed
+        seconds, entries per second and latency percentiles in milliseconds
+    """
+    if not entries:
+        raise ValueError("No entries to send")
+    latencies = []
+
+    async def run_client(client_id):
+        client = await KioskClient.connect(host, port, path)
+        try:
+            for request_id in range(client_id, requests, concurrency):
+                start = request_id * batch_size
+                batch = [entries[(start + i) % len(entries)]
+                         for i in range(batch_size)]
+                sent = time.perf_counter()
+                if batch_size == 1:
+                    await client.request(batch[0])
+                else:
+                    await client.request(batch)
+                latencies.append(time.perf_counter() - sent)
+        finally:
+            await client.close()
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(run_client(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start_time
+
+    latencies.sort()
+
+    def percentile(fraction):
+        index = min(len(latencies) - 1, int(fraction * len(latencies)))
+        return round(latencies[index] * 1000, 3)
+
+    return {"requests": requests,
+            "entries": requests * batch_size,
+            "seconds": round(elapsed, 6),
+            "entries_per_second": round(requests * batch_size / elapsed, 1),
+            "latency_ms": {"p50": percentile(0.50),
+                           "p90": percentile(0.90),
+                           "p99": percentile(0.99),
+                           "max": percentile(1.0)}}
+
+
+async def serve(watchlist_file, countries_file, host, port, path):
+    """
+    Runs a KioskServer until the process is interrupted.
+    """
+    server = KioskServer(watchlist_file, countries_file)
+    if path is not None:
+        print("Listening on {0}".format(await server.start_unix(path)))
+    else:
+        print("Listening on {0}:{1}".format(*await server.start(host, port)))
+    await server.server.serve_forever()
+
+
+def main():
+    """
+    Command line entry point: "serve" runs the service, "bench" runs the
+    benchmark client against a running service.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["serve", "bench"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8340)
+    parser.add_argument("--unix", dest="path", default=None,
+                        help="Unix socket path instead of TCP")
+    parser.add_argument("--watchlist", default="watchlist.json")
+    parser.add_argument("--countries", default="countries.json")
+    parser.add_argument("--entries", default="example_entries.json")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        asyncio.run(serve(args.watchlist, args.countries, args.host,
+                          args.port, args.path))
+    else:
+        result = asyncio.run(benchmark(parse_json(args.entries),
+                                       args.requests, args.concurrency,
+                                       args.batch_size, args.host, args.port,
+                                       args.path))
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
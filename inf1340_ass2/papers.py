@@ -7,11 +7,22 @@ __email__ = "info.shuai@gmail.com"
 
 # imports one per line
 import re
-import datetime
 import json
-
-
-def decide(input_file, watchlist_file, countries_file):
+import codecs
+import collections
+import io
+import os
+import itertools
+import multiprocessing
+import time
+import isodates
+from rule_stats import RuleStats
+from watchlist_index import WatchlistIndex
+from watchlist_index import is_index_file
+
+
+def decide(input_file, watchlist_file, countries_file, stats=None,
+           today=None):
     """
     Decides whether a traveller's entry into Kanadia should be accepted
 
@@ -22,86 +33,525 @@ def decide(input_file, watchlist_file, countries_file):
     :param countries_file: The name of a JSON formatted file that contains
         country data, such as whether an entry or transit visa is required,
         and whether there is currently a medical advisory
+    :param stats: a RuleStats to count and time the rules in (default: the
+        rules are not measured)
+    :param today: datetime.date that visas are checked on (default: the
+        current date)
     :return: List of strings. Possible values of strings are: "Accept",
         "Reject", "Secondary", and "Quarantine"
     """
-    # parse three json files into lists
-    input_content = parse_json(input_file)
-    watchlist_content = parse_json(watchlist_file)
-    first_name, last_name, passport = divide_watchlist(watchlist_content)
-    countries_content = parse_json(countries_file)
-
-    # medical advisory countries (lower case country code)
-    ma_countries = [c.lower() for c in countries_content
-                    if countries_content[c]["medical_advisory"] != ""]
-
-    # visitor visa countries (lower case country code)
-    visitor_countries = [c.lower() for c in countries_content
-                         if countries_content[c]["visitor_visa_required"]
-                         == "1"]
-
-    # transit visa countries (lower case country code)
-    transit_countries = [c.lower() for c in countries_content
-                         if countries_content[c]["transit_visa_required"]
-                         == "1"]
-
-    input_length = len(input_content)
-
-    # default "Accept" unless "Quarantine", "Reject", or "Secondary"
-    output = [["Accept"] for i in range(input_length)]
-
-    # iterate through the entry lists
-    for idx in range(input_length):
-
-        # 1. "Quarantine": a traveler comes from OR via a country that has
-        # a medical advisory
-        if ("from" in input_content[idx] and
-            input_content[idx]["from"]["country"].lower() in ma_countries) or\
-            ("via" in input_content[idx] and input_content[idx]["via"]
-           ["country"].lower() in ma_countries):
-                output[idx].append("Quarantine")
-
-        # 2. "Reject": incomplete info, invalid passport, or invalid date
-        if (not complete_info(input_content[idx])) or\
-            (not valid_passport_format(input_content[idx]["passport"])) or\
-            (not valid_date_format(input_content[idx]["birth_date"])) or\
-            ("visa" in input_content[idx] and not
-             valid_date_format(input_content[idx]["visa"]["date"])):
-                output[idx].append("Reject")
-
-        # "Reject": visit and from a country that needs visitor visa,
-        # no visa or the visa is invalid
-        if "entry_reason" in input_content[idx] and\
-            input_content[idx]["entry_reason"].lower() == "visit" and\
-           input_content[idx]["from"]["country"].lower() in visitor_countries:
-                if "visa" not in input_content[idx]:
-                    output[idx].append("Reject")
-                else:
-                    if not valid_visa(input_content[idx]["visa"]):
-                        output[idx].append("Reject")
-
-        # "Reject": transit and from a country that needs transit visa,
-        # no visa or the visa invalid
-        if "entry_reason" in input_content[idx] and\
-            input_content[idx]["entry_reason"].lower() == "transit" and\
-           input_content[idx]["from"]["country"].lower() in transit_countries:
-                if "visa" not in input_content[idx]:
-                    output[idx].append("Reject")
-                else:
-                    if not valid_visa(input_content[idx]["visa"]):
-                        output[idx].append("Reject")
-
-        # 3. "Secondary": name or passport on the watchlist
-        if ("first_name" in input_content[idx] and
-            input_content[idx]["first_name"].lower() in first_name and
-            "last_name" in input_content[idx] and
-            input_content[idx]["last_name"].lower() in last_name) or\
-            ("passport" in input_content[idx] and
-           input_content[idx]["passport"].lower() in passport):
-                output[idx].append("Secondary")
-
-    # make only one decision
-    return distinct_decision(output)
+    return list(decide_stream(input_file, watchlist_file, countries_file,
+                              stats, today))
+
+
+def decide_stream(input_file, watchlist_file, countries_file, stats=None,
+                  today=None):
+    """
+    Decides traveller entries one at a time, reading the input file
+    incrementally so that memory use does not grow with the number of entries
+
+    :param input_file: The name of a file that contains cases to decide,
+        either as a JSON array or as JSON Lines (one entry per line)
+    :param watchlist_file: The name of a JSON formatted file that contains
+        names and passport numbers on a watchlist
+    :param countries_file: The name of a JSON formatted file that contains
+        country data
+    :param stats: a RuleStats to count and time the rules in (default: the
+        rules are not measured)
+    :param today: datetime.date that visas are checked on (default: the
+        current date)
+    :return: generator of strings, one decision per entry in input order
+    """
+    context = DecisionContext(watchlist_file, countries_file, stats=stats,
+                              today=today)
+    return context.decide_stream(input_file)
+
+
+def explain(input_file, watchlist_file, countries_file, today=None):
+    """
+    Decides traveller entries and gives every reason for each decision
+
+    :param input_file: The name of a file that contains cases to decide
+    :param watchlist_file: The name of a JSON formatted file that contains
+        names and passport numbers on a watchlist
+    :param countries_file: The name of a JSON formatted file that contains
+        country data
+    :param today: datetime.date that visas are checked on (default: the
+        current date)
+    :return: List of tuples (decision, reasons), one per entry, reasons
+        being the names of the rules that flagged the entry (see
+        explain_entry)
+    """
+    context = DecisionContext(watchlist_file, countries_file, today=today)
+    return context.explain(input_file)
+
+
+def decide_parallel(input_file, watchlist_file, countries_file,
+                    workers=None, range_size=1024 * 1024, chunk_size=1000,
+                    stats=None, today=None):
+    """
+    Decides traveller entries on a pool of worker processes. The file is
+    split into byte ranges of about range_size bytes, which the workers read
+    and parse themselves; each worker loads the watchlist and country data
+    once when it starts.
+
+    Ranges start at the first line in them, so a file with one entry per
+    line (JSON Lines, or an array written one item per line) is decided in
+    parallel. As soon as a line does not start with an entry (e.g. in an
+    indented array), the rest of the file is parsed in this process and the
+    entries are sent to the workers in chunks of chunk_size.
+
+    :param input_file: The name of a file that contains cases to decide
+    :param watchlist_file: The name of a JSON formatted file that contains
+        names and passport numbers on a watchlist
+    :param countries_file: The name of a JSON formatted file that contains
+        country data
+    :param workers: number of worker processes (default: number of CPUs)
+    :param range_size: number of bytes per range
+    :param chunk_size: number of entries sent to a worker at a time, once
+        the file cannot be split into ranges
+    :param stats: a RuleStats that the counters of all the workers are
+        added to (default: the rules are not measured)
+    :param today: datetime.date that visas are checked on (default: the
+        current date)
+    :return: List of strings, one decision per entry in input order
+    """
+    if range_size < 1:
+        raise ValueError("Range size must be at least 1")
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be at least 1")
+
+    # fail early (in this process) if a file is missing
+    DecisionContext(watchlist_file, countries_file)
+    in_array, start = json_start(input_file)
+    size = os.path.getsize(input_file)
+
+    # the first range starts at the first entry, the others are guessed
+    jobs = [(input_file, in_array, start, start + range_size,
+             "value or ]" if in_array else "value")]
+    jobs = itertools.chain(jobs, ((input_file, in_array, position,
+                                   position + range_size, None)
+                                  for position in range(start + range_size,
+                                                        size, range_size)))
+
+    # every worker decides visas against the same date
+    day = isodates.today() if today is None else today.toordinal()
+
+    output = []
+    handoff = None
+    with multiprocessing.Pool(workers, init_worker,
+                              (watchlist_file, countries_file,
+                               day, stats is not None)) as pool:
+        # at most two ranges (or chunks) per worker are read ahead
+        window = 2 * (workers or os.cpu_count() or 1)
+        ranges = imap_bounded(pool, decide_range, jobs, window)
+        for job, result in ranges:
+            if handoff is not None and handoff[1] is None:
+                return output       # the file ended in an earlier range
+            if job[4] is None and (result is None or
+                                   result[2] != handoff):
+                break               # the guess was wrong
+            decisions, range_stats, _, handoff = result
+            if stats is not None:
+                stats.merge(range_stats)
+            output.extend(decisions)
+        else:
+            return output
+        ranges.close()
+
+        entries = iter_json_at(input_file, in_array, *handoff)
+        for _, (decisions, chunk_stats) in imap_bounded(
+                pool, decide_chunk, chunks(entries, chunk_size), window):
+            if stats is not None:
+                stats.merge(chunk_stats)
+            output.extend(decisions)
+    return output
+
+
+def imap_bounded(pool, function, jobs, window):
+    """
+    Applies a function to jobs on a pool of processes, like Pool.imap, but
+    submits a job only when fewer than window results are waiting
+
+    :param pool: a multiprocessing.Pool
+    :param function: function of one argument
+    :param jobs: iterable of arguments of the function
+    :param window: maximum number of jobs submitted and not yet returned
+    :return: generator of tuples (job, result), in the order of jobs
+    """
+    pending = collections.deque()
+    for job in jobs:
+        pending.append((job, pool.apply_async(function, (job,))))
+        if len(pending) >= window:
+            job, result = pending.popleft()
+            yield job, result.get()
+    while pending:
+        job, result = pending.popleft()
+        yield job, result.get()
+
+
+# decision context of a worker process, set up by init_worker
+worker_context = None
+
+
+def init_worker(watchlist_file, countries_file, today, measure=False):
+    """
+    Loads the decision context of a worker process
+
+    :param watchlist_file: name of the watchlist file
+    :param countries_file: name of the countries file
+    :param today: ordinal of the date the batch is decided on
+    :param measure: Boolean True to count and time the rules
+    """
+    global worker_context
+    worker_context = DecisionContext(watchlist_file, countries_file,
+                                     stats=RuleStats() if measure else None)
+    worker_context.today = today
+
+
+def decide_range(job):
+    """
+    Reads and decides the entries of a byte range of the input file against
+    the worker's decision context
+
+    :param job: tuple of the arguments of read_range
+    :return: tuple (decisions, stats, first, handoff): a list of strings,
+        one decision per entry, the RuleStats of the range (None if the
+        worker does not measure the rules), and where the range was read
+        from and where the next one starts (see read_range); None if where
+        the range starts was guessed and it cannot be decided from there
+    """
+    try:
+        entries, first, handoff = read_range(*job)
+        decisions = [decide_entry(entry, worker_context)
+                     for entry in entries]
+    except Exception:
+        # a range read from a wrong guess may hold anything
+        if job[4] is not None:
+            raise
+        if worker_context.stats is not None:
+            worker_context.stats.reset()
+        return None
+
+    range_stats = None
+    if worker_context.stats is not None:
+        range_stats = worker_context.stats.take()
+    return decisions, range_stats, first, handoff
+
+
+def decide_chunk(entries):
+    """
+    Decides a chunk of entries, parsed by the parent process, against the
+    worker's decision context
+
+    :param entries: a list of entry records
+    :return: tuple (decisions, stats): a list of strings, one decision per
+        entry, and the RuleStats of the chunk (None if the worker does not
+        measure the rules)
+    """
+    decisions = [decide_entry(entry, worker_context) for entry in entries]
+    chunk_stats = None
+    if worker_context.stats is not None:
+        chunk_stats = worker_context.stats.take()
+    return decisions, chunk_stats
+
+
+def chunks(iterable, size):
+    """
+    Splits an iterable into lists of at most size items
+
+    :param iterable: values to split
+    :param size: maximum number of values per list
+    :return: generator of lists
+    """
+    iterator = iter(iterable)
+    chunk = list(itertools.islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(iterator, size))
+
+
+class DecisionContext:
+    """
+    Class for the watchlist and country data that decisions are made against.
+    The watchlist is parsed once into a WatchlistIndex and the countries into
+    sets, and both are parsed again only when one of the files is modified on
+    disk, so that many batches can share the same context.
+    """
+
+    def __init__(self, watchlist_file, countries_file, phonetic=False,
+                 stats=None, today=None):
+        """
+        (DecisionContext, str, str, bool, RuleStats, date) -> NoneType
+        Creates a new DecisionContext from watchlist_file and countries_file.
+        watchlist_file may be a JSON watchlist or an index saved by
+        WatchlistIndex.save(). If phonetic is True, names that sound like a
+        watchlist name are matched too (JSON watchlists only). If stats is
+        a RuleStats, every rule of every decision is counted and timed in it.
+        If today is a datetime.date, visas are checked on that date rather
+        than on the current date of each batch.
+        """
+        self.watchlist_file = watchlist_file
+        self.countries_file = countries_file
+        self.phonetic = phonetic
+        self.stats = stats
+        self.date = today
+        if stats is not None:
+            stats.register(rule[0] for rule in RULES)
+        self.watchlist = WatchlistIndex.build([])
+        self.ma_countries = frozenset()
+        self.visitor_countries = frozenset()
+        self.transit_countries = frozenset()
+        self.mtimes = None
+        self.today = None
+
+        self.begin_batch()
+
+    def begin_batch(self):
+        """
+        Prepares for a new batch of entries: reloads modified files and
+        reads the current date (unless the context has a fixed date) once
+        for all visa checks in the batch.
+        """
+        self.refresh()
+        if self.date is None:
+            self.today = isodates.today()
+        else:
+            self.today = self.date.toordinal()
+
+    def refresh(self):
+        """
+        Reloads the watchlist and country data if either file has been
+        modified since it was last loaded.
+
+        :return: Boolean True if the files were (re)loaded, False otherwise
+        """
+        try:
+            mtimes = (os.stat(self.watchlist_file).st_mtime_ns,
+                      os.stat(self.countries_file).st_mtime_ns)
+        except FileNotFoundError:
+            raise FileNotFoundError("File not found.")
+
+        if mtimes == self.mtimes:
+            return False
+        self.load()
+        self.mtimes = mtimes
+        return True
+
+    def load(self):
+        """
+        Indexes the watchlist and parses the country file into sets of lower
+        case country codes.
+        """
+        if is_index_file(self.watchlist_file):
+            watchlist = WatchlistIndex.load(self.watchlist_file)
+        else:
+            watchlist = WatchlistIndex.build(
+                iter_json(self.watchlist_file), self.phonetic)
+        try:
+            countries_content = parse_json(self.countries_file)
+        except Exception:
+            watchlist.close()
+            raise
+
+        # the index loaded before (if memory mapped) is no longer used
+        self.watchlist.close()
+        self.watchlist = watchlist
+
+        # medical advisory countries (lower case country code)
+        self.ma_countries = frozenset(
+            c.lower() for c in countries_content
+            if countries_content[c]["medical_advisory"] != "")
+
+        # visitor visa countries (lower case country code)
+        self.visitor_countries = frozenset(
+            c.lower() for c in countries_content
+            if countries_content[c]["visitor_visa_required"] == "1")
+
+        # transit visa countries (lower case country code)
+        self.transit_countries = frozenset(
+            c.lower() for c in countries_content
+            if countries_content[c]["transit_visa_required"] == "1")
+
+    def decide(self, input_file):
+        """
+        Decides all entries in input_file against this context
+
+        :param input_file: The name of a file that contains cases to decide
+        :return: List of strings, one decision per entry
+        """
+        return list(self.decide_stream(input_file))
+
+    def decide_stream(self, input_file):
+        """
+        Decides the entries in input_file one at a time against this context,
+        reloading the watchlist and country data first if they have changed
+
+        :param input_file: The name of a file that contains cases to decide
+        :return: generator of strings, one decision per entry in input order
+        """
+        self.begin_batch()
+        for entry in iter_json(input_file):
+            yield decide_entry(entry, self)
+
+    def explain(self, input_file):
+        """
+        Decides all entries in input_file against this context, giving
+        every reason for each decision
+
+        :param input_file: The name of a file that contains cases to decide
+        :return: List of tuples (decision, reasons), one per entry (see
+            explain_entry)
+        """
+        self.begin_batch()
+        return [explain_entry(entry, self) for entry in iter_json(input_file)]
+
+
+def decide_entry(entry, context):
+    """
+    Decides whether a single traveller's entry into Kanadia should be accepted
+
+    :param entry: entry record of a traveler
+    :param context: DecisionContext holding the watchlist and country data
+    :return: a string, one of "Accept", "Reject", "Secondary", "Quarantine"
+    """
+    if context.stats is not None:
+        return decide_entry_measured(entry, context)
+
+    # the first rule that flags the entry makes the decision, since the
+    # rules are in order of precedence; "Accept" if none does
+    for name, decision, check, requires in RULES:
+        if check(entry, context):
+            return decision
+    return "Accept"
+
+
+def decide_entry_measured(entry, context):
+    """
+    Decides an entry like decide_entry, counting and timing every rule
+    evaluated in context.stats
+
+    :param entry: entry record of a traveler
+    :param context: DecisionContext whose stats is a RuleStats
+    :return: a string, one of "Accept", "Reject", "Secondary", "Quarantine"
+    """
+    stats = context.stats
+    final = "Accept"
+    for name, decision, check, requires in RULES:
+        start = time.perf_counter()
+        hit = check(entry, context)
+        stats.record(name, hit, time.perf_counter() - start)
+        if hit:
+            final = decision
+            break
+
+    stats.record_decision(final)
+    return final
+
+
+def explain_entry(entry, context):
+    """
+    Decides an entry like decide_entry, but goes on evaluating the rules
+    after the decision is made, to find every reason for it. A rule is only
+    skipped if one of the rules it requires has flagged the entry.
+
+    :param entry: entry record of a traveler
+    :param context: DecisionContext holding the watchlist and country data
+    :return: a tuple (decision, reasons): the decision of decide_entry and
+        the list of the names of the rules that flagged the entry, in order
+        of precedence
+    """
+    final = "Accept"
+    reasons = []
+    for name, decision, check, requires in RULES:
+        if requires and any(rule in reasons for rule in requires):
+            continue
+        if check(entry, context):
+            if not reasons:
+                final = decision
+            reasons.append(name)
+    return final, reasons
+
+
+def medical_advisory(entry, context):
+    """
+    "Quarantine": a traveler comes from OR via a country that has a medical
+    advisory
+    """
+    return ("from" in entry and
+            entry["from"]["country"].lower() in context.ma_countries) or\
+        ("via" in entry and
+         entry["via"]["country"].lower() in context.ma_countries)
+
+
+def incomplete_info(entry, context):
+    """
+    "Reject": some of the required info is missing
+    """
+    return not complete_info(entry)
+
+
+def invalid_passport(entry, context):
+    """
+    "Reject": the passport number is not in the right format
+    """
+    return not valid_passport_format(entry["passport"])
+
+
+def invalid_dates(entry, context):
+    """
+    "Reject": the birth date or the visa date is not in the right format
+    """
+    return (not valid_date_format(entry["birth_date"])) or\
+        ("visa" in entry and not valid_date_format(entry["visa"]["date"]))
+
+
+def invalid_visa(entry, context):
+    """
+    "Reject": visit (or transit) and from a country that needs a visitor
+    (or transit) visa, and no visa or the visa is invalid
+    """
+    if "entry_reason" not in entry:
+        return False
+    entry_reason = entry["entry_reason"].lower()
+    if entry_reason == "visit":
+        visa_countries = context.visitor_countries
+    elif entry_reason == "transit":
+        visa_countries = context.transit_countries
+    else:
+        return False
+
+    if entry["from"]["country"].lower() not in visa_countries:
+        return False
+    return "visa" not in entry or not valid_visa(entry["visa"], context.today)
+
+
+def on_watchlist(entry, context):
+    """
+    "Secondary": name (first and last of the same row) or passport on the
+    watchlist
+    """
+    return context.watchlist.match(entry.get("first_name"),
+                                   entry.get("last_name"),
+                                   entry.get("passport")) is not None
+
+
+# rules in order of precedence: (name, decision, check, requires). The
+# decision of the first rule that flags an entry is final, so the rules after
+# it are not evaluated. requires names the rules that must not have flagged
+# the entry for a rule to be evaluated (e.g. the passport of an incomplete
+# entry cannot be checked); as they come first, this only matters when
+# explaining a decision.
+RULES = (("medical_advisory", "Quarantine", medical_advisory, ()),
+         ("completeness", "Reject", incomplete_info, ()),
+         ("passport", "Reject", invalid_passport, ("completeness",)),
+         ("dates", "Reject", invalid_dates, ("completeness",)),
+         ("visa", "Reject", invalid_visa, ("completeness",)),
+         ("watchlist", "Secondary", on_watchlist, ()))
+
+
+# five sets of five alpha-numeric characters separated by dashes
+PASSPORT_FORMAT = re.compile(r"^\w{5}-\w{5}-\w{5}-\w{5}-\w{5}$")
 
 
 def valid_passport_format(passport_number):
@@ -112,9 +562,7 @@ def valid_passport_format(passport_number):
     :param passport_number: alpha-numeric string
     :return: Boolean; True if the format is valid, False otherwise
     """
-    passport_format = re.compile('^\w{5}-\w{5}-\w{5}-\w{5}-\w{5}$')
-
-    if passport_format.match(passport_number):
+    if PASSPORT_FORMAT.match(passport_number):
         return True
     else:
         return False
@@ -127,11 +575,7 @@ def valid_date_format(date_string):
     :param date_string: date to be checked
     :return: Boolean True if the format is valid, False otherwise
     """
-    try:
-        datetime.datetime.strptime(date_string, '%Y-%m-%d')
-        return True
-    except ValueError:
-        return False
+    return isodates.valid_date(date_string)
 
 
 def parse_json(json_file):
@@ -149,6 +593,238 @@ def parse_json(json_file):
         raise FileNotFoundError("File not found.")
 
 
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# a value cut short by the end of the buffer makes the decoder fail at most
+# this many characters before the end (at the start of a literal such as
+# "-Infinity" or of an escape such as "\u00e9"), or with an unterminated
+# string; an error further back is in the text itself
+CUT_MARGIN = 16
+
+
+def iter_json(json_file, chunk_size=65536):
+    """
+    Parses a json file incrementally, yielding one value at a time. The file
+    may hold a single JSON array, whose items are yielded in order, or a
+    sequence of JSON values such as JSON Lines. Only one value (plus one
+    chunk of text) is held in memory at any time.
+
+    Malformed text raises json.JSONDecodeError as soon as it is read: an
+    empty file, items of an array not separated by a single ",", an array
+    that is not closed by "]", or text after it.
+
+    :param json_file: json file
+    :param chunk_size: number of characters to read from the file at a time
+    :return: generator of parsed values
+    """
+    try:
+        file_reader = open(json_file, "r")
+    except FileNotFoundError:
+        raise FileNotFoundError("File not found.")
+
+    with file_reader:
+        yield from scan_json(file_reader.read, chunk_size)
+
+
+def scan_json(read, chunk_size, in_array=None, expected="value", limit=None):
+    """
+    Parses JSON values from text read in chunks (see iter_json)
+
+    :param read: function that returns the next chunk of text, given the
+        number of characters to read, and "" at the end of the text
+    :param chunk_size: number of characters to read at a time
+    :param in_array: Boolean True if the text is inside an array, after its
+        "[", False if it is a sequence of values, None to find out from its
+        first character
+    :param expected: what may come first inside an array: "value or ]"
+        right after "[", "value" after ","
+    :param limit: number of characters: stop at the first value that starts
+        after them (default: parse to the end of the text)
+    :return: generator of parsed values, which returns a tuple of the number
+        of characters before the first value not parsed (or the end of the
+        text) and what may come there (None at the end of the text)
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    dropped = 0         # number of characters dropped from the buffer
+    position = 0
+    eof = False
+
+    while True:
+        position = JSON_WHITESPACE.match(buffer, position).end()
+
+        if position < len(buffer):
+            char = buffer[position]
+            if in_array is None:
+                in_array = char == "["
+                if in_array:
+                    expected = "value or ]"
+                    position += 1
+                continue
+
+            if in_array:
+                if expected == "nothing":
+                    raise json.JSONDecodeError("Extra data", buffer, position)
+                if char == "]" and expected != "value":
+                    expected = "nothing"
+                    position += 1
+                    continue
+                if expected == ", or ]":
+                    if char != ",":
+                        raise json.JSONDecodeError("Expecting ',' delimiter",
+                                                   buffer, position)
+                    expected = "value"
+                    position += 1
+                    continue
+
+            if limit is not None and dropped + position >= limit:
+                return dropped + position, expected
+
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as error:
+                if eof or not (error.msg.startswith("Unterminated string") or
+                               len(buffer) - error.pos <= CUT_MARGIN):
+                    raise
+                end = None
+
+            # a value that runs up to the end of the buffer may be cut short
+            # (e.g. a number), so only accept it once more text is read
+            if end is not None and (end < len(buffer) or eof):
+                position = end
+                if in_array:
+                    expected = ", or ]"
+                yield value
+                continue
+        elif eof:
+            break
+
+        # read at least as much as is pending, so that a long value is not
+        # decoded again for every chunk
+        chunk = read(max(chunk_size, len(buffer) - position))
+        dropped += position
+        buffer = buffer[position:] + chunk
+        position = 0
+        eof = chunk == ""
+
+    if in_array is None:
+        raise json.JSONDecodeError("Expecting value", buffer, position)
+    if in_array and expected != "nothing":
+        raise json.JSONDecodeError(
+            "Expecting ',' delimiter" if expected == ", or ]"
+            else "Expecting value", buffer, position)
+    return dropped + position, None
+
+
+def json_start(json_file, chunk_size=65536):
+    """
+    Finds where the values of a json file start (see iter_json)
+
+    :param json_file: json file
+    :param chunk_size: number of bytes to read from the file at a time
+    :return: tuple of Boolean True if the file holds an array, and the byte
+        position of its first value (after the "[" of an array)
+    """
+    try:
+        file_reader = open(json_file, "rb")
+    except FileNotFoundError:
+        raise FileNotFoundError("File not found.")
+
+    with file_reader:
+        position = 0
+        chunk = file_reader.read(chunk_size)
+        while chunk:
+            text = chunk.lstrip(b" \t\n\r")
+            position += len(chunk) - len(text)
+            if text[:1] == b"[":
+                return True, position + 1
+            if text:
+                return False, position
+            chunk = file_reader.read(chunk_size)
+    raise json.JSONDecodeError("Expecting value", "", position)
+
+
+def iter_json_at(json_file, in_array, start, expected, chunk_size=65536):
+    """
+    Parses a json file incrementally from a byte position at which a value
+    starts, such as where a range ends (see read_range)
+
+    :param json_file: json file
+    :param in_array: Boolean True if the file holds an array
+    :param start: byte position to parse from
+    :param expected: what may come at start inside an array (see
+        scan_json)
+    :param chunk_size: number of characters to read from the file at a time
+    :return: generator of parsed values
+    """
+    with open(json_file, "rb") as file_reader:
+        file_reader.seek(start)
+        with io.TextIOWrapper(file_reader, encoding="utf-8") as text_reader:
+            yield from scan_json(text_reader.read, chunk_size, in_array,
+                                 expected)
+
+
+def read_range(json_file, in_array, start, end, expected=None,
+               chunk_size=65536):
+    """
+    Parses the values of a json file (see iter_json) that start within the
+    byte range [start, end), so that a file can be split into ranges that
+    are parsed independently; every value belongs to exactly one range.
+
+    If expected is None, where the values of the range start is guessed: the
+    first line that starts in the range is taken to start with a value, as
+    in JSON Lines or an array written one item per line. The guess is right
+    if the previous range ends there (see decide_parallel).
+
+    :param json_file: json file
+    :param in_array: Boolean True if the file holds an array
+    :param start: first byte of the range, at which a value starts unless
+        expected is None
+    :param end: end of the range
+    :param expected: what may come at start inside an array (see
+        scan_json), None to guess
+    :param chunk_size: number of bytes to read past the range at a time
+    :return: tuple (values, first, handoff): the parsed values, the position
+        and expectation they were parsed from, and the position and
+        expectation the next range starts from (None at the end of the file)
+    """
+    with open(json_file, "rb") as file_reader:
+        if expected is None:
+            expected = "value"
+            # the line starting at start belongs to this range
+            if start > 0:
+                file_reader.seek(start - 1)
+                start += len(file_reader.readline()) - 1
+        file_reader.seek(start)
+
+        utf8 = codecs.getincrementaldecoder("utf-8")()
+        owned = utf8.decode(file_reader.read(max(end - start, 0)))
+        text = []
+
+        def read(size):
+            if not text and owned:
+                text.append(owned)
+            else:
+                data = file_reader.read(size)
+                text.append(utf8.decode(data, not data))
+            return text[-1]
+
+        values = []
+        scanner = scan_json(read, chunk_size, in_array, expected,
+                            len(owned))
+        try:
+            while True:
+                values.append(next(scanner))
+        except StopIteration as stop:
+            consumed, handoff = stop.value
+
+    text = "".join(text)
+    first = JSON_WHITESPACE.match(text).end()
+    return (values,
+            (start + len(text[:first].encode("utf-8")), expected),
+            (start + len(text[:consumed].encode("utf-8")), handoff))
+
+
 def complete_info(entry):
     """
     Checks whether the entry is complete (containing all required info)
@@ -167,49 +843,49 @@ def complete_info(entry):
     return if_complete
 
 
-def divide_watchlist(watchlist):
-    """
-    Divide a watchlist into three sets: first_name, last_name and passport
-
-    :param watchlist: a list containing watchlist content
-    :return: three sets containing first_name, last_name and passport
-    """
-    first_name = set(entry["first_name"].lower() for entry in watchlist)
-    last_name = set(entry["last_name"].lower() for entry in watchlist)
-    passport = set(entry["passport"].lower() for entry in watchlist)
-    return first_name, last_name, passport
-
-
-def valid_visa(visa):
+def valid_visa(visa, today=None):
     """
     Checks whether a visa is valid
 
     :param visa: a traveler's visa info
-    :return: Boolean True if visa is valid, False otherwise
+    :param today: ordinal of the current date (default: read the clock)
+    :return: Boolean True if visa is valid, False otherwise (including if
+        its date is not valid)
     """
-    if dates_difference(visa["date"]) < 730:
+    days = dates_difference(visa["date"], today)
+    if days is not None and days < 730:
         return True
     return False
 
 
-def dates_difference(date_string):
+def dates_difference(date_string, today=None):
     """
     Calculates the difference in days of date given and current date
 
     :param date_string: date to be checked
+    :param today: ordinal of the current date (default: read the clock)
     :return: the difference of two dates in days
     """
-    if valid_date_format(date_string):
-        year = datetime.datetime.now().year
-        month = datetime.datetime.now().month
-        day = datetime.datetime.now().day
-        current_date = datetime.date(year, month, day)
+    return isodates.days_since(date_string, today)
+
 
-        visa_year, visa_month, visa_day = date_string.split("-")
-        visa_date = datetime.date(int(visa_year), int(visa_month),
-                                  int(visa_day))
+def final_decision(decisions):
+    """
+    Picks the single immigration decision for one entry, in order of
+    priority: "Quarantine", "Reject", "Secondary", then "Accept"
 
-        return (current_date - visa_date).days
+    :param decisions: a list containing one to four of the following
+        strings: "Accept", "Reject", "Secondary", and "Quarantine"
+    :return: a string, the unique decision for that entry
+    """
+    if "Quarantine" in decisions:
+        return "Quarantine"
+    elif "Reject" in decisions:
+        return "Reject"
+    elif "Secondary" in decisions:
+        return "Secondary"
+    else:
+        return "Accept"
 
 
 def distinct_decision(decisions_list):
@@ -221,16 +897,4 @@ def distinct_decision(decisions_list):
     :return: a list of strings each represents the unique decision for that
         entry
     """
-    output = []
-
-    for entry in decisions_list:
-        if "Quarantine" in entry:
-            output.append("Quarantine")
-        elif "Reject" in entry:
-            output.append("Reject")
-        elif "Secondary" in entry:
-            output.append("Secondary")
-        else:
-            output.append("Accept")
-
-    return output
+    return [final_decision(entry) for entry in decisions_list]
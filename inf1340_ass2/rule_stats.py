@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+""" Per-rule counters and timings of immigration decisions """
+
+__author__ = "Shuai Wang"
+__email__ = "info.shuai@gmail.com"
+
+# imports one per line
+import json
+
+
+class RuleStats:
+    """
+    Class for the counters of the rules of papers.decide: for each rule, the
+    number of entries it was evaluated on (calls), the number of entries it
+    flagged (hits) and the time spent evaluating it (seconds), plus the
+    number of entries given each final decision.
+
+    Decisions are only measured when a RuleStats is given to the
+    DecisionContext (or to decide); otherwise nothing is counted or timed.
+    """
+
+    def __init__(self, rules=()):
+        """
+        (RuleStats, iterable) -> NoneType
+        Creates a new RuleStats with all counters at zero for the rules
+        with the given names.
+        """
+        self.rules = {}
+        self.decisions = {}
+        self.entries = 0
+        self.register(rules)
+
+    def register(self, rules):
+        """
+        Adds counters for the rules with the given names, so that they are
+        reported (in that order) even if they are never evaluated.
+        """
+        for rule in rules:
+            self.rules.setdefault(rule, [0, 0, 0.0])
+
+    def record(self, rule, hit, seconds):
+        """
+        Counts one evaluation of a rule
+
+        :param rule: name of the rule
+        :param hit: Boolean True if the rule flagged the entry
+        :param seconds: time the evaluation took
+        """
+        counters = self.rules.get(rule)
+        if counters is None:
+            counters = self.rules[rule] = [0, 0, 0.0]
+        counters[0] += 1
+        counters[1] += bool(hit)
+        counters[2] += seconds
+
+    def record_decision(self, decision):
+        """
+        Counts one entry given decision
+        """
+        self.entries += 1
+        self.decisions[decision] = self.decisions.get(decision, 0) + 1
+
+    def merge(self, other):
+        """
+        Adds the counters of other (e.g. from a worker process)
+
+        :param other: a RuleStats
+        :return: this RuleStats
+        """
+        for rule, (calls, hits, seconds) in other.rules.items():
+            counters = self.rules.setdefault(rule, [0, 0, 0.0])
+            counters[0] += calls
+            counters[1] += hits
+            counters[2] += seconds
+        for decision, count in other.decisions.items():
+            self.decisions[decision] = self.decisions.get(decision, 0) + count
+        self.entries += other.entries
+        return self
+
+    def reset(self):
+        """
+        Sets all counters back to zero, keeping the rules registered.
+        """
+        self.rules = {rule: [0, 0, 0.0] for rule in self.rules}
+        self.decisions = {}
+        self.entries = 0
+
+    def take(self):
+        """
+        :return: a copy of this RuleStats, which is then reset
+        """
+        taken = RuleStats().merge(self)
+        self.reset()
+        return taken
+
+    def as_dict(self):
+        """
+        :return: a dict with the number of "entries", the count of each of
+            the "decisions" and, for each of the "rules", its "calls",
+            "hits" and "seconds"
+        """
+        return {"entries": self.entries,
+                "decisions": dict(self.decisions),
+                "rules": {rule: {"calls": calls, "hits": hits,
+                                 "seconds": seconds}
+                          for rule, (calls, hits, seconds)
+                          in self.rules.items()}}
+
+    def to_json(self, indent=None):
+        """
+        :return: the counters as a JSON string (see as_dict)
+        """
+        return json.dumps(self.as_dict(), indent=indent)
+
+    def to_prometheus(self, prefix="papers"):
+        """
+        :param prefix: prefix of the metric names
+        :return: the counters in the Prometheus text exposition format
+        """
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append("# HELP {0}_{1} {2}".format(prefix, name,
+                                                      help_text))
+            lines.append("# TYPE {0}_{1} counter".format(prefix, name))
+            for labels, value in samples:
+                lines.append("{0}_{1}{2} {3!r}".format(prefix, name, labels,
+                                                       value))
+
+        metric("entries_total", "Entries decided.", [("", self.entries)])
+        metric("decisions_total", "Entries decided, by decision.",
+               [('{{decision="{0}"}}'.format(decision), count)
+                for decision, count in self.decisions.items()])
+        for name, position, help_text in [
+                ("rule_calls_total", 0, "Entries each rule was evaluated on."),
+                ("rule_hits_total", 1, "Entries each rule flagged."),
+                ("rule_seconds_total", 2, "Time spent evaluating each rule.")]:
+            metric(name, help_text,
+                   [('{{rule="{0}"}}'.format(rule), counters[position])
+                    for rule, counters in self.rules.items()])
+        return "\n".join(lines) + "\n"
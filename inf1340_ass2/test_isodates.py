@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+""" Module to test isodates.py  """
+
+__author__ = "Shuai Wang"
+__email__ = "info.shuai@gmail.com"
+
+
+# imports one per line
+import datetime
+from isodates import parse_date
+from isodates import parse_dates
+from isodates import valid_date
+from isodates import days_since
+
+
+def strptime_valid(date_string):
+    """
+    The reference check isodates replaces
+    """
+    try:
+        datetime.datetime.strptime(date_string, "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
+
+def test_valid_date():
+    """
+    Test that exactly the dates strptime accepts are valid
+    """
+    dates = ["2014-04-30", "2014-4-3", "2014-04- 3", "2016-02-29",
+             "2015-02-29", "2014-02-31", "2014-13-01", "2014-00-10",
+             "0000-01-01", "201-04-30", "2014-04-301", "2014-04-30 ",
+             "2014/04/30", "2014-04-0", ""]
+    for date_string in dates:
+        assert valid_date(date_string) == strptime_valid(date_string)
+
+
+def test_parse_date():
+    """
+    Test date ordinals and differences
+    """
+    assert parse_date("2014-04-30") == datetime.date(2014, 4, 30).toordinal()
+    assert parse_date("2014-4-3") == datetime.date(2014, 4, 3).toordinal()
+    assert parse_date("2014-02-31") is None
+    assert parse_dates(["0001-01-01", "x", "0001-01-02"]) == [1, None, 2]
+
+    today = datetime.date(2015, 1, 1).toordinal()
+    assert days_since("2014-12-31", today) == 1
+    assert days_since("2013-01-01", today) == 730
+    assert days_since("2014-12-32", today) is None
+    assert days_since(datetime.date.today().isoformat()) == 0
+
+
+def run_tests():
+    """
+    Runs all tests above
+    """
+    test_valid_date()
+    test_parse_date()
+
+
+run_tests()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+""" Module to test kiosk.py  """
+
+__author__ = "Shuai Wang"
+__email__ = "info.shuai@gmail.com"
+
+
+# imports one per line
+import asyncio
+import json
+import pytest
+from kiosk import KioskServer
+from kiosk import KioskClient
+from kiosk import benchmark
+from papers import decide
+from papers import parse_json
+
+
+async def decide_over_socket(entries):
+    """
+    Starts a server on a free port and decides entries one by one and as
+    one micro-batch
+    """
+    server = KioskServer("watchlist.json", "countries.json")
+    host, port = await server.start()
+    try:
+        client = await KioskClient.connect(host, port)
+        singles = [await client.decide(entry) for entry in entries]
+        batch = await client.decide_batch(entries)
+
+        # invalid requests get an error response, the connection stays open
+        with pytest.raises(ValueError):
+            await client.decide({"from": "KAN"})
+        # an incomplete entry is rejected before its visa is checked
+        assert await client.decide({"entry_reason": "visit"}) == "Reject"
+        assert "error" in await client.request("Accept")
+        assert await client.decide(entries[0]) == singles[0]
+        await client.close()
+
+        result = await benchmark(entries, 20, concurrency=2, batch_size=3,
+                                 host=host, port=port)
+    finally:
+        await server.close()
+    return singles, batch, result
+
+
+def test_kiosk():
+    """
+    Test the kiosk service against the file based decide
+    """
+    entries = parse_json("example_entries.json")
+    singles, batch, result = asyncio.run(decide_over_socket(entries))
+
+    expected = decide("example_entries.json", "watchlist.json",
+                      "countries.json")
+    assert singles == expected
+    assert batch == expected
+
+    assert result["requests"] == 20
+    assert result["entries"] == 60
+    assert result["latency_ms"]["p50"] <= result["latency_ms"]["max"]
+
+
+async def send_large_batches(entries):
+    """
+    Sends micro-batches longer than the default line limit of asyncio
+    streams, and one longer than the limit of the server
+    """
+    server = KioskServer("watchlist.json", "countries.json",
+                         line_limit=200000)
+    address = await server.start()
+    try:
+        client = await KioskClient.connect(*address)
+        large = await client.decide_batch(entries * 4)
+        with pytest.raises(ValueError):
+            await client.decide_batch(entries * 20)
+        # the connection stays open, even after a line without "\n"
+        after = await client.decide(entries[0])
+        client.writer.write(b"[" + b" " * 500000)
+        client.writer.write_eof()
+        assert "error" in json.loads(await client.reader.readline())
+        await client.close()
+    finally:
+        await server.close()
+    return large, after
+
+
+def test_large_batch():
+    """
+    Test micro-batches of many entries
+    """
+    entries = parse_json("example_entries.json")
+    large, after = asyncio.run(send_large_batches(entries))
+    expected = decide("example_entries.json", "watchlist.json",
+                      "countries.json")
+    assert large == expected * 4
+    assert after == expected[0]
+
+
+def run_tests():
+    """
+    Runs all tests above
+    """
+    test_kiosk()
+    test_large_batch()
+
+
+run_tests()
@@ -8,7 +8,18 @@ __email__ = "info.shuai@gmail.com"
 
 # imports one per line
 import pytest
+import datetime
+import json
+import os
+import papers
 from papers import decide
+from papers import decide_stream
+from papers import iter_json
+from papers import DecisionContext
+from papers import decide_parallel
+from papers import imap_bounded
+from papers import explain
+from papers import explain_entry
 
 
 def test_complete_info():
@@ -48,6 +59,15 @@ def test_visit():
     assert decide("json_test/test_visit.json", "watchlist.json",
                   "countries.json") == ["Accept", "Accept", "Reject"]
 
+    # visas are checked on the date given rather than on the current date
+    later = datetime.date(2030, 1, 1)
+    assert decide("json_test/test_visit.json", "watchlist.json",
+                  "countries.json", today=later) ==\
+        ["Accept", "Reject", "Reject"]
+    assert decide_parallel("json_test/test_visit.json", "watchlist.json",
+                           "countries.json", workers=1, today=later) ==\
+        ["Accept", "Reject", "Reject"]
+
 
 def test_transit():
     """
@@ -83,6 +103,210 @@ def test_files():
         decide("", "", "")
 
 
+def test_stream(tmpdir):
+    """
+    Test streaming decisions against the list API
+    """
+    # a JSON array gives the same decisions one entry at a time
+    stream = decide_stream("example_entries.json", "watchlist.json",
+                           "countries.json")
+    assert list(stream) == decide("example_entries.json", "watchlist.json",
+                                  "countries.json")
+
+    # JSON Lines input gives the same decisions as a JSON array
+    entries = list(iter_json("example_entries.json"))
+    jsonl_file = tmpdir.join("entries.jsonl")
+    jsonl_file.write("\n".join(json.dumps(entry) for entry in entries))
+    assert decide(str(jsonl_file), "watchlist.json", "countries.json") ==\
+        decide("example_entries.json", "watchlist.json", "countries.json")
+
+    # reading in tiny chunks does not change the parsed entries
+    assert list(iter_json("example_entries.json", chunk_size=3)) == entries
+    assert list(iter_json(str(jsonl_file), chunk_size=3)) == entries
+
+    # malformed files raise, whatever the chunk size
+    bad_file = tmpdir.join("bad.json")
+    for text in ["", " \n", "[1 2]", "[,,1]", "[1,]", "[1,,2]", "[1", "[1,",
+                 "[", "[1] 2", "[1]]", "1, 2", '[{"a": tru}]', '["a]']:
+        bad_file.write(text)
+        for chunk_size in [1, 3, 65536]:
+            with pytest.raises(json.JSONDecodeError):
+                list(iter_json(str(bad_file), chunk_size))
+    bad_file.write("[ ]\n")
+    assert list(iter_json(str(bad_file), chunk_size=1)) == []
+
+    # an error near the start raises before the rest of the file is read
+    # (here, bytes that are not valid UTF-8)
+    bad_file.write_binary(b"[1, 2 3, " + b"4, " * 10000 + b"\xff]")
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json(str(bad_file), chunk_size=16))
+
+    # input file not found
+    with pytest.raises(FileNotFoundError):
+        list(decide_stream("", "watchlist.json", "countries.json"))
+
+
+def test_context(tmpdir):
+    """
+    Test reusing one decision context for several batches
+    """
+    context = DecisionContext("watchlist.json", "countries.json")
+    assert context.decide("example_entries.json") ==\
+        decide("example_entries.json", "watchlist.json", "countries.json")
+    assert context.decide("json_test/test_watchlist.json") ==\
+        ["Secondary", "Secondary"]
+
+    # files are only parsed again once they are modified
+    watchlist_file = tmpdir.join("watchlist.json")
+    watchlist_file.write("[]")
+    context = DecisionContext(str(watchlist_file), "countries.json")
+    assert context.refresh() is False
+    assert context.decide("json_test/test_watchlist.json") ==\
+        ["Accept", "Accept"]
+
+    with open("watchlist.json") as file_reader:
+        watchlist_file.write(file_reader.read())
+    stat = os.stat(str(watchlist_file))
+    os.utime(str(watchlist_file), ns=(stat.st_atime_ns,
+                                      stat.st_mtime_ns + 10 ** 9))
+    assert context.decide("json_test/test_watchlist.json") ==\
+        ["Secondary", "Secondary"]
+
+    with pytest.raises(FileNotFoundError):
+        DecisionContext("", "countries.json")
+
+
+def test_parallel():
+    """
+    Test deciding entries on several worker processes
+    """
+    # same decisions in the same order, whatever the ranges
+    expected = decide("example_entries.json", "watchlist.json",
+                      "countries.json")
+    for range_size in [64, 1000, 1024 * 1024]:
+        assert decide_parallel("example_entries.json", "watchlist.json",
+                               "countries.json", workers=2,
+                               range_size=range_size) == expected
+
+    with pytest.raises(ValueError):
+        decide_parallel("example_entries.json", "watchlist.json",
+                        "countries.json", range_size=0)
+    with pytest.raises(ValueError):
+        decide_parallel("example_entries.json", "watchlist.json",
+                        "countries.json", chunk_size=0)
+    with pytest.raises(FileNotFoundError):
+        decide_parallel("example_entries.json", "", "countries.json")
+
+
+def test_parallel_lines(tmpdir):
+    """
+    Test deciding files with one entry per line on several worker processes
+    """
+    entries = list(iter_json("example_entries.json"))
+    expected = decide("example_entries.json", "watchlist.json",
+                      "countries.json")
+    lines = [json.dumps(entry) for entry in entries]
+    jsonl_file = tmpdir.join("entries.jsonl")
+    jsonl_file.write("\n".join(lines) + "\n")
+    array_file = tmpdir.join("entries.json")
+    array_file.write("[\n" + ",\n".join(lines) + "\n]\n")
+
+    for input_file in [jsonl_file, array_file]:
+        for range_size in [50, 1000, 1024 * 1024]:
+            assert decide_parallel(str(input_file), "watchlist.json",
+                                   "countries.json", workers=2,
+                                   range_size=range_size) == expected
+
+    # malformed files raise, whatever the ranges
+    bad_file = tmpdir.join("bad.json")
+    for text in ["", "[\n" + ",\n".join(lines) + "\n",
+                 "[\n" + ",\n".join(lines) + "\n]\n[]",
+                 "[\n" + "\n".join(lines) + "\n]",
+                 "\n".join(lines[:20] + ["{"] + lines[20:])]:
+        bad_file.write(text)
+        for range_size in [100, 1024 * 1024]:
+            with pytest.raises(json.JSONDecodeError):
+                decide_parallel(str(bad_file), "watchlist.json",
+                                "countries.json", workers=2,
+                                range_size=range_size)
+
+
+def test_parallel_indented(tmpdir, monkeypatch):
+    """
+    Test that an indented array is parsed once, not range by range
+    """
+    expected = decide("example_entries.json", "watchlist.json",
+                      "countries.json")
+    indented_file = tmpdir.join("indented.json")
+    indented_file.write(json.dumps(list(iter_json("example_entries.json")),
+                                   indent=4))
+
+    results = []
+
+    def imap_recorded(pool, function, jobs, window):
+        for job, result in imap_bounded(pool, function, jobs, window):
+            results.append(function.__name__)
+            yield job, result
+
+    monkeypatch.setattr(papers, "imap_bounded", imap_recorded)
+    assert decide_parallel(str(indented_file), "watchlist.json",
+                           "countries.json", workers=2, range_size=1000,
+                           chunk_size=7) == expected
+    # the first range, and the first guess, which is wrong
+    assert results.count("decide_range") == 2
+    assert results.count("decide_chunk") > 1
+
+
+def test_explain():
+    """
+    Test that explaining gives the same decisions and every reason
+    """
+    explained = explain("example_entries.json", "watchlist.json",
+                        "countries.json")
+    assert [decision for decision, reasons in explained] ==\
+        decide("example_entries.json", "watchlist.json", "countries.json")
+    assert ("Accept", []) in explained
+
+    assert explain("json_test/test_quarantine.json", "watchlist.json",
+                   "countries.json")[0] == ("Quarantine",
+                                            ["medical_advisory"])
+
+    context = DecisionContext("watchlist.json", "countries.json")
+    entry = list(iter_json("json_test/test_watchlist.json"))[0]
+    assert explain_entry(entry, context) == ("Secondary", ["watchlist"])
+
+    # all the reasons, in order of precedence
+    entry = dict(entry, passport="ABC", birth_date="1990-13-01")
+    assert explain_entry(entry, context) ==\
+        ("Reject", ["passport", "dates", "watchlist"])
+
+    # an incomplete entry is not checked further, but for the rules that
+    # do not need the missing info
+    del entry["from"]
+    assert explain_entry(entry, context) == ("Reject",
+                                             ["completeness", "watchlist"])
+
+    assert context.explain("json_test/test_quarantine.json") ==\
+        [("Quarantine", ["medical_advisory"])] * 2
+
+    # every rule but the visa check flags an entry coming via a country
+    # with a medical advisory, under a name on the watchlist
+    quarantined = list(iter_json("json_test/test_quarantine.json"))
+    entry = dict(quarantined[1], first_name="DUANE", last_name="LESLIE",
+                 passport="ABC", birth_date="1990-13-01")
+    assert explain_entry(entry, context) ==\
+        ("Quarantine", ["medical_advisory", "passport", "dates",
+                        "watchlist"])
+
+    # without the medical advisory and the watchlist, an incomplete entry
+    # is only rejected for being incomplete: its passport and dates are not
+    # checked
+    entry = dict(quarantined[0], passport="ABC", birth_date="1990-13-01")
+    entry["from"] = entry["home"]
+    del entry["entry_reason"]
+    assert explain_entry(entry, context) == ("Reject", ["completeness"])
+
+
 def run_tests():
     """
     Runs all tests above
@@ -93,6 +317,8 @@ def run_tests():
     test_transit()
     test_valid_format()
     test_files()
+    test_parallel()
+    test_explain()
 
 
 run_tests()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+""" Module to test rule_stats.py """
+
+__author__ = "Shuai Wang"
+__email__ = "info.shuai@gmail.com"
+
+# imports one per line
+import json
+from papers import decide
+from papers import decide_parallel
+from papers import RULES
+from rule_stats import RuleStats
+
+
+def test_counters():
+    """
+    Test counting, merging and resetting rule counters
+    """
+    stats = RuleStats(["a", "b"])
+    stats.record("b", True, 0.5)
+    stats.record("b", False, 0.25)
+    stats.record("c", 1, 1.0)
+    stats.record_decision("Reject")
+    stats.record_decision("Reject")
+    assert stats.as_dict() == {
+        "entries": 2, "decisions": {"Reject": 2},
+        "rules": {"a": {"calls": 0, "hits": 0, "seconds": 0.0},
+                  "b": {"calls": 2, "hits": 1, "seconds": 0.75},
+                  "c": {"calls": 1, "hits": 1, "seconds": 1.0}}}
+    assert json.loads(stats.to_json()) == stats.as_dict()
+
+    other = RuleStats().merge(stats).merge(stats)
+    assert other.entries == 4
+    assert other.rules["b"] == [4, 2, 1.5]
+
+    taken = stats.take()
+    assert taken.rules["b"] == [2, 1, 0.75]
+    assert stats.entries == 0 and stats.decisions == {}
+    assert stats.rules == {"a": [0, 0, 0.0], "b": [0, 0, 0.0],
+                           "c": [0, 0, 0.0]}
+
+
+def test_prometheus():
+    """
+    Test the Prometheus text format
+    """
+    stats = RuleStats(["passport"])
+    stats.record("passport", True, 0.5)
+    stats.record_decision("Reject")
+    lines = stats.to_prometheus().splitlines()
+    assert "# TYPE papers_rule_hits_total counter" in lines
+    assert 'papers_rule_calls_total{rule="passport"} 1' in lines
+    assert 'papers_rule_seconds_total{rule="passport"} 0.5' in lines
+    assert 'papers_decisions_total{decision="Reject"} 1' in lines
+    assert "papers_entries_total 1" in lines
+    assert "kiosk_entries_total 1" in stats.to_prometheus("kiosk")
+
+
+def test_decide():
+    """
+    Test measuring the rules of decide, on one and on several processes
+    """
+    stats = RuleStats()
+    decisions = decide("json_test/test_complete_info.json", "watchlist.json",
+                       "countries.json", stats)
+    assert decisions == decide("json_test/test_complete_info.json",
+                               "watchlist.json", "countries.json")
+    assert list(stats.rules) == [rule[0] for rule in RULES]
+    assert stats.entries == 8
+    assert stats.decisions == {"Accept": 1, "Reject": 7}
+    assert stats.rules["completeness"][:2] == [8, 7]
+    # the passport and dates of incomplete entries are not checked
+    assert stats.rules["passport"][:2] == [1, 0]
+    assert stats.rules["dates"][:2] == [1, 0]
+    assert all(seconds >= 0 for calls, hits, seconds in stats.rules.values())
+
+    stats = RuleStats()
+    parallel_stats = RuleStats()
+    expected = decide("example_entries.json", "watchlist.json",
+                      "countries.json", stats)
+    assert decide_parallel("example_entries.json", "watchlist.json",
+                           "countries.json", workers=2, range_size=1000,
+                           stats=parallel_stats) == expected
+    assert parallel_stats.entries == stats.entries == len(expected)
+    assert parallel_stats.decisions == stats.decisions
+    for rule, (calls, hits, seconds) in stats.rules.items():
+        assert parallel_stats.rules[rule][:2] == [calls, hits]
+
+
+def run_tests():
+    """
+    Runs all tests above
+    """
+    test_counters()
+    test_prometheus()
+    test_decide()
+
+
+run_tests()
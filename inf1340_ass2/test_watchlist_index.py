@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+""" Module to test watchlist_index.py  """
+
+__author__ = "Shuai Wang"
+__email__ = "info.shuai@gmail.com"
+
+
+# imports one per line
+import os
+import pytest
+from watchlist_index import WatchlistIndex
+from watchlist_index import soundex
+from watchlist_index import is_index_file
+from papers import DecisionContext
+from papers import parse_json
+
+WATCHLIST = [{"first_name": "JOEL", "last_name": "LEUNG", "passport": ""},
+             {"first_name": "PATRIA", "last_name": "OGLESBY",
+              "passport": ""},
+             {"first_name": "", "last_name": "",
+              "passport": "QEMSB-PS4OG-3CV7S-8XKLZ-Y4XM2"}]
+
+
+def test_match():
+    """
+    Test name pairs and passports
+    """
+    index = WatchlistIndex.build(WATCHLIST)
+    assert len(index) == 3
+
+    # names must both come from the same row, in any case
+    assert index.match("Joel", "Leung") == "name"
+    assert index.match("JOEL", "OGLESBY") is None
+    assert index.match("PATRIA", "LEUNG") is None
+    assert index.match("JOEL", None) is None
+
+    assert index.match(passport="qemsb-ps4og-3cv7s-8xklz-y4xm2") == \
+        "passport"
+    assert index.match("A", "B", "QEMSB-PS4OG-3CV7S-8XKLZ-Y4XM2") == \
+        "passport"
+
+    # empty names and passports are not on the watchlist
+    assert index.match("", "", "") is None
+
+    # names that only sound alike need a phonetic index
+    assert index.match("Joell", "Leong") is None
+    index = WatchlistIndex.build(WATCHLIST, phonetic=True)
+    assert index.match("Joell", "Leong") == "phonetic"
+    assert index.match("Joel", "Leung") == "name"
+
+    # names without latin letters have no phonetic key, so they do not all
+    # match each other
+    index = WatchlistIndex.build(WATCHLIST + [
+        {"first_name": "张", "last_name": "伟", "passport": ""},
+        {"first_name": "JOEL", "last_name": "Иванов", "passport": ""}],
+        phonetic=True)
+    assert index.match("Алексей", "Иванов") is None
+    assert index.match("李", "娜") is None
+    assert index.match("Joell", "伟") is None
+    assert index.match("张", "伟") == "name"
+    assert index.match("Joel", "Иванов") == "name"
+
+
+def test_soundex():
+    """
+    Test phonetic keys
+    """
+    assert soundex("Robert") == "r163"
+    assert soundex("Rupert") == "r163"
+    assert soundex("Ashcraft") == "a261"
+    assert soundex("Tymczak") == "t522"
+    assert soundex("Zoë") == soundex("Zoe")
+    assert soundex("--") == ""
+
+
+def test_save_load(tmpdir):
+    """
+    Test the on-disk index format
+    """
+    watchlist = parse_json("watchlist.json")
+    index = WatchlistIndex.build(watchlist)
+    index_file = str(tmpdir.join("watchlist.wlix"))
+    index.save(index_file)
+    assert is_index_file(index_file)
+    assert not is_index_file("watchlist.json")
+
+    loaded = WatchlistIndex.load(index_file)
+    assert len(loaded) == len(index)
+    for row in watchlist:
+        assert loaded.match(row["first_name"], row["last_name"],
+                            row["passport"]) is not None
+    assert loaded.match("JOEL", "OGLESBY") is None
+    loaded.close()
+
+    with pytest.raises(ValueError):
+        WatchlistIndex.load("watchlist.json")
+
+    # a decision context can use the saved index instead of the JSON file
+    context = DecisionContext(index_file, "countries.json")
+    assert context.decide("json_test/test_watchlist.json") == \
+        ["Secondary", "Secondary"]
+
+    # saving over a mapped index replaces the file: the old mapping stays
+    # readable, and the context maps the new index and closes the old one
+    old_index = context.watchlist
+    loaded = WatchlistIndex.load(index_file)
+    WatchlistIndex.build(WATCHLIST[1:2]).save(index_file)
+    assert loaded.match("DUANE", "LESLIE") == "name"
+    loaded.close()
+    stat = os.stat(index_file)
+    os.utime(index_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert context.refresh() is True
+    assert old_index.buffer is None
+    assert context.watchlist.match("PATRIA", "OGLESBY") == "name"
+    assert context.watchlist.match("DUANE", "LESLIE") is None
+    assert context.decide("json_test/test_watchlist.json") == \
+        ["Accept", "Accept"]
+    assert sorted(os.listdir(str(tmpdir))) == ["watchlist.wlix"]
+
+
+def run_tests():
+    """
+    Runs all tests above
+    """
+    test_match()
+    test_soundex()
+
+
+run_tests()
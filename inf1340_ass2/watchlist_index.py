@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+
+""" Indexed watchlist for the immigration office of Kanadia """
+
+__author__ = "Shuai Wang"
+__email__ = "info.shuai@gmail.com"
+
+# imports one per line
+import array
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import unicodedata
+
+# file header: magic, version, flags, unused, number of keys, number of slots
+HEADER = struct.Struct("<4sIIIQQ")
+MAGIC = b"WLIX"
+VERSION = 1
+FLAG_PHONETIC = 1
+
+# soundex digit of each consonant; vowels and h, w, y have none
+SOUNDEX_CODES = {}
+for letters, digit in [("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"),
+                       ("l", "4"), ("mn", "5"), ("r", "6")]:
+    for letter in letters:
+        SOUNDEX_CODES[letter] = digit
+
+
+class WatchlistIndex:
+    """
+    Class for a hashed watchlist. A traveller is on the watchlist when their
+    (first name, last name) pair matches the names of one watchlist row, or
+    their passport number matches one, ignoring case. Optionally, names can
+    also be matched by their normalised phonetic (soundex) keys.
+
+    Every key is stored as a 64-bit hash in one open-addressing table (an
+    array of unsigned integers), so lookups are O(1) on average and each key
+    costs at most 16 bytes. The table is saved to disk as it is and memory
+    mapped when loaded.
+    """
+
+    def __init__(self, table, count, phonetic=False, buffer=None):
+        """
+        (WatchlistIndex, sequence, int, bool, mmap) -> NoneType
+        Creates a WatchlistIndex over a hash table with a power of two
+        number of slots. Use build() or load() instead of calling this.
+        """
+        self.table = table
+        self.count = count
+        self.phonetic = phonetic
+        self.mask = len(table) - 1
+        self.buffer = buffer
+
+    @classmethod
+    def build(cls, watchlist, phonetic=False):
+        """
+        Builds an index from watchlist rows. Empty names and passport
+        numbers are not indexed.
+
+        :param watchlist: an iterable of dicts with "first_name",
+            "last_name" and "passport"
+        :param phonetic: Boolean True to also index phonetic name keys
+        :return: a WatchlistIndex
+        """
+        hashes = array.array("Q")
+        for row in watchlist:
+            first_name = row.get("first_name", "")
+            last_name = row.get("last_name", "")
+            passport = row.get("passport", "")
+            if first_name and last_name:
+                hashes.append(name_hash(first_name, last_name))
+                key = phonetic_hash(first_name, last_name) \
+                    if phonetic else None
+                if key is not None:
+                    hashes.append(key)
+            if passport:
+                hashes.append(passport_hash(passport))
+
+        table = array.array("Q", bytes(8 * table_size(len(hashes))))
+        mask = len(table) - 1
+        count = 0
+        for key in hashes:
+            slot = key & mask
+            while table[slot] and table[slot] != key:
+                slot = (slot + 1) & mask
+            if not table[slot]:
+                table[slot] = key
+                count += 1
+        return cls(table, count, phonetic)
+
+    @classmethod
+    def load(cls, index_file):
+        """
+        Memory maps an index saved by save()
+
+        :param index_file: name of the index file
+        :return: a WatchlistIndex
+        """
+        with open(index_file, "rb") as file_reader:
+            header = file_reader.read(HEADER.size)
+            if not is_index_header(header):
+                raise ValueError("Not a watchlist index file")
+            magic, version, flags, unused, count, slots = \
+                HEADER.unpack(header)
+            if version != VERSION:
+                raise ValueError("Unsupported watchlist index version")
+
+            if sys.byteorder == "little":
+                buffer = mmap.mmap(file_reader.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+                table = memoryview(buffer)[HEADER.size:
+                                           HEADER.size + 8 * slots].cast("Q")
+            else:
+                buffer = None
+                table = array.array("Q")
+                table.fromfile(file_reader, slots)
+                table.byteswap()
+
+        return cls(table, count, bool(flags & FLAG_PHONETIC), buffer)
+
+    def save(self, index_file):
+        """
+        Writes the index to index_file in a form that load() can map. The
+        index is written to a temporary file that then replaces index_file,
+        so that processes which have the old file mapped keep reading it
+        (rewriting a mapped file in place would crash them).
+
+        :param index_file: name of the index file
+        """
+        table = array.array("Q", self.table)
+        if sys.byteorder != "little":
+            table.byteswap()
+        flags = FLAG_PHONETIC if self.phonetic else 0
+        file_descriptor, temporary_file = tempfile.mkstemp(
+            prefix=os.path.basename(index_file) + ".",
+            dir=os.path.dirname(os.path.abspath(index_file)))
+        try:
+            with os.fdopen(file_descriptor, "wb") as file_writer:
+                file_writer.write(HEADER.pack(MAGIC, VERSION, flags, 0,
+                                              self.count, len(table)))
+                table.tofile(file_writer)
+            # mkstemp makes the file private; keep the usual permissions
+            mode = os.stat(index_file).st_mode \
+                if os.path.exists(index_file) else 0o644
+            os.chmod(temporary_file, mode & 0o7777)
+            os.replace(temporary_file, index_file)
+        except BaseException:
+            os.unlink(temporary_file)
+            raise
+
+    def close(self):
+        """
+        Releases the memory map of a loaded index.
+        """
+        if self.buffer is not None:
+            self.table.release()
+            self.buffer.close()
+            self.buffer = None
+
+    def __len__(self):
+        """
+        :return: the number of distinct keys in the index
+        """
+        return self.count
+
+    def contains(self, key):
+        """
+        Looks up a key hash by linear probing
+
+        :param key: a key hash
+        :return: Boolean True if the key is in the index, False otherwise
+        """
+        table = self.table
+        mask = self.mask
+        slot = key & mask
+        while table[slot]:
+            if table[slot] == key:
+                return True
+            slot = (slot + 1) & mask
+        return False
+
+    def match(self, first_name=None, last_name=None, passport=None):
+        """
+        Checks a traveller against the watchlist
+
+        :param first_name: traveller's first name (or None)
+        :param last_name: traveller's last name (or None)
+        :param passport: traveller's passport number (or None)
+        :return: "passport" or "name" or "phonetic" for the first kind of
+            key that matched, None if the traveller is not on the watchlist
+        """
+        if passport and self.contains(passport_hash(passport)):
+            return "passport"
+        if first_name and last_name:
+            if self.contains(name_hash(first_name, last_name)):
+                return "name"
+            if self.phonetic:
+                key = phonetic_hash(first_name, last_name)
+                if key is not None and self.contains(key):
+                    return "phonetic"
+        return None
+
+
+def table_size(count):
+    """
+    Finds the number of slots for a table holding count keys, the smallest
+    power of two that keeps the table at most half full
+
+    :param count: number of keys
+    :return: int, the number of slots
+    """
+    size = 8
+    while size < 2 * count:
+        size *= 2
+    return size
+
+
+def key_hash(*parts):
+    """
+    Hashes a key to a stable, non-zero 64-bit integer (zero marks an empty
+    slot). Unlike hash(), the value is the same in every process.
+
+    :param parts: strings making up the key
+    :return: int
+    """
+    digest = hashlib.blake2b("\x1f".join(parts).encode("utf-8"),
+                             digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+def name_hash(first_name, last_name):
+    """
+    :return: the key hash of a (first name, last name) pair, ignoring case
+    """
+    return key_hash("n", first_name.lower(), last_name.lower())
+
+
+def passport_hash(passport):
+    """
+    :return: the key hash of a passport number, ignoring case
+    """
+    return key_hash("p", passport.lower())
+
+
+def phonetic_hash(first_name, last_name):
+    """
+    :return: the key hash of the soundex codes of a (first name, last name)
+        pair; None if either name has no letters to code (e.g. a name in
+        another script), as all such names would share the same key
+    """
+    first_code = soundex(first_name)
+    last_code = soundex(last_name)
+    if not first_code or not last_code:
+        return None
+    return key_hash("s", first_code, last_code)
+
+
+def normalise_name(name):
+    """
+    Normalises a name for fuzzy matching: accents are removed and only the
+    lower case letters are kept, e.g. "O'Brien-Zoë" becomes "obrienzoe"
+
+    :param name: a name
+    :return: the normalised name
+    """
+    decomposed = unicodedata.normalize("NFKD", name.lower())
+    return "".join(c for c in decomposed if "a" <= c <= "z")
+
+
+def soundex(name):
+    """
+    Computes the American soundex code of a name, e.g. "Robert" and "Rupert"
+    both give "r163"
+
+    :param name: a name
+    :return: a four character code, or "" if the name has no letters
+    """
+    letters = normalise_name(name)
+    if not letters:
+        return ""
+
+    code = letters[0]
+    previous = SOUNDEX_CODES.get(letters[0], "")
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES.get(letter, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # h and w do not separate letters with the same code
+        if letter not in "hw":
+            previous = digit
+    return (code + "000")[:4]
+
+
+def is_index_header(header):
+    """
+    :param header: the first bytes of a file
+    :return: Boolean True if they start a watchlist index file
+    """
+    return len(header) >= HEADER.size and header[:len(MAGIC)] == MAGIC
+
+
+def is_index_file(file_name):
+    """
+    :param file_name: name of a file
+    :return: Boolean True if the file is a saved watchlist index
+    """
+    with open(file_name, "rb") as file_reader:
+        return is_index_header(file_reader.read(HEADER.size))
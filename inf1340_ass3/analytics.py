@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+
+""" Resampling and rolling-window analytics on the price of stock data."""
+
+__author__ = 'Joanna Kolbe, Shuai Wang'
+__email__ = "joannakolbe@gmail.com, info.shuai@gmail.com"
+__copyright__ = "2014 Joanna Kolbe, Shuai Wang"
+__status__ = "Prototype"
+
+# imports one per line
+import numpy as np
+
+# resampling periods: day, week, month, quarter and year
+PERIODS = ("D", "W", "M", "Q", "Y")
+
+
+class PriceSeries:
+    """
+    Class for the daily prices of a stock in time order. Every statistic is
+    computed in O(n) from running (cumulative) sums or running maxima, and
+    the running sums are shared between all window sizes, so any number of
+    windows costs one pass over the data plus one subtraction per window.
+    """
+
+    def __init__(self, stock):
+        """
+        (PriceSeries, Stock) -> NoneType
+        Creates a new PriceSeries from the prices of stock, sorted by date.
+        """
+        stock.ensure_prices()
+        order = np.argsort(stock.prices["date"], kind="stable")
+        prices = stock.prices[order]
+        self.dates = prices["date"]
+        self.close = prices["close"].astype(np.float64)
+        self.volume = prices["volume"].astype(np.float64)
+        self.sums = {}
+
+    def __len__(self):
+        """
+        :return: the number of trading days
+        """
+        return len(self.dates)
+
+    def running_sum(self, name, values):
+        """
+        Returns the running sum of values with a leading zero, so that the
+        sum of values[i:j] is running_sum[j] - running_sum[i]. Running sums
+        are cached by name.
+
+        :param name: cache key of values
+        :param values: an array of numbers
+        :return: an array one longer than values
+        """
+        if name not in self.sums:
+            self.sums[name] = np.concatenate([[0.0], np.cumsum(values)])
+        return self.sums[name]
+
+    def resample_vwap(self, period="M"):
+        """
+        Computes the volume weighted average closing price of each calendar
+        period, like Stock.calculate_average does for months (unrounded).
+
+        :param period: "D" (day), "W" (week starting on Monday), "M"
+            (month), "Q" (quarter) or "Y" (year)
+        :return: a tuple (starts, averages): the first day of each period
+            with trading days, in time order, and its average (NaN if the
+            period's volume is zero)
+        """
+        keys = period_keys(self.dates, period)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        numerator = np.bincount(inverse, weights=self.volume * self.close)
+        denominator = np.bincount(inverse, weights=self.volume)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            averages = np.where(denominator > 0, numerator / denominator,
+                                np.nan)
+        return period_starts(unique_keys, period), averages
+
+    def moving_average(self, windows):
+        """
+        Computes simple moving averages of the closing price
+
+        :param windows: an iterable of window sizes in trading days
+        :return: a dict mapping each window to an array aligned with dates,
+            NaN until the window is full
+        """
+        sums = self.running_sum("close", self.close)
+        return {window: window_mean(sums, window, len(self))
+                for window in windows}
+
+    def rolling_vwap(self, windows):
+        """
+        Computes volume weighted average closing prices over trailing windows
+
+        :param windows: an iterable of window sizes in trading days
+        :return: a dict mapping each window to an array aligned with dates,
+            NaN until the window is full or if its volume is zero
+        """
+        weighted = self.running_sum("volume_close", self.volume * self.close)
+        volume = self.running_sum("volume", self.volume)
+        result = {}
+        for window in windows:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                result[window] = (window_mean(weighted, window, len(self)) /
+                                  window_mean(volume, window, len(self)))
+        return result
+
+    def returns(self):
+        """
+        :return: the daily returns close[i] / close[i - 1] - 1, aligned with
+            dates (NaN on the first day)
+        """
+        result = np.full(len(self), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result[1:] = self.close[1:] / self.close[:-1] - 1
+        return result
+
+    def rolling_volatility(self, windows):
+        """
+        Computes the standard deviation (population, as stdev() does) of
+        daily returns over trailing windows
+
+        :param windows: an iterable of window sizes in days of returns
+        :return: a dict mapping each window to an array aligned with dates,
+            NaN until the window is full
+        """
+        returns = self.returns()[1:]
+        # centre the returns first so the sums of squares do not lose
+        # precision when the returns are small compared to their mean
+        centred = returns - (returns.mean() if len(returns) else 0.0)
+        sums = self.running_sum("returns", centred)
+        squares = self.running_sum("returns_squared", centred * centred)
+
+        result = {}
+        for window in windows:
+            volatility = np.full(len(self), np.nan)
+            mean = window_mean(sums, window, len(returns))
+            mean_square = window_mean(squares, window, len(returns))
+            volatility[1:] = np.sqrt(np.maximum(mean_square - mean * mean,
+                                                0.0))
+            result[window] = volatility
+        return result
+
+    def drawdown(self):
+        """
+        Computes the drawdown of the closing price from its running maximum
+
+        :return: a tuple (drawdowns, maximum): an array aligned with dates of
+            close / highest close so far - 1 (zero or negative), and the
+            largest drawdown as a positive fraction
+        """
+        peaks = np.maximum.accumulate(self.close)
+        drawdowns = self.close / peaks - 1
+        maximum = float(-drawdowns.min()) if len(drawdowns) else 0.0
+        return drawdowns, maximum
+
+    def analyse(self, windows):
+        """
+        Computes moving averages, rolling volume weighted averages and
+        rolling volatility for several window sizes at once
+
+        :param windows: an iterable of window sizes in trading days
+        :return: a dict with "moving_average", "rolling_vwap" and
+            "rolling_volatility", each mapping window to array
+        """
+        windows = list(windows)
+        return {"moving_average": self.moving_average(windows),
+                "rolling_vwap": self.rolling_vwap(windows),
+                "rolling_volatility": self.rolling_volatility(windows)}
+
+
+def window_mean(running_sum, window, length):
+    """
+    Computes the mean of each trailing window from a running sum
+
+    :param running_sum: a running sum with a leading zero
+    :param window: window size
+    :param length: number of values summed
+    :return: an array of length means, NaN until the window is full
+    """
+    if window < 1:
+        raise ValueError("Window must be at least 1")
+    means = np.full(length, np.nan)
+    if window <= length:
+        means[window - 1:] = (running_sum[window:length + 1] -
+                              running_sum[:length + 1 - window]) / window
+    return means
+
+
+def period_keys(dates, period):
+    """
+    Numbers the calendar period of each date
+
+    :param dates: an array of datetime64[D]
+    :param period: one of PERIODS
+    :return: an array of ints, increasing with time
+    """
+    if period not in PERIODS:
+        raise ValueError("Unknown period: {0}".format(period))
+    days = dates.astype("datetime64[D]").astype(np.int64)
+    if period == "D":
+        return days
+    if period == "W":
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday
+        return (days + 3) // 7
+    months = dates.astype("datetime64[M]").astype(np.int64)
+    if period == "M":
+        return months
+    if period == "Q":
+        return months // 3
+    return months // 12
+
+
+def period_starts(keys, period):
+    """
+    Finds the first day of numbered calendar periods
+
+    :param keys: period numbers from period_keys()
+    :param period: one of PERIODS
+    :return: an array of datetime64[D]
+    """
+    if period == "D":
+        return keys.astype("datetime64[D]")
+    if period == "W":
+        return (keys * 7 - 3).astype("datetime64[D]")
+    months = {"M": 1, "Q": 3, "Y": 12}[period] * keys
+    return months.astype("datetime64[M]").astype("datetime64[D]")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+""" Fast parsing and validation of YYYY-mm-dd dates """
+
+__author__ = "Shuai Wang"
+__email__ = "info.shuai@gmail.com"
+
+# imports one per line
+import datetime
+import functools
+import re
+import time
+
+# the same dates datetime.strptime(date, "%Y-%m-%d") accepts
+DATE_FORMAT = re.compile(r"(\d\d\d\d)-(1[0-2]|0[1-9]|[1-9])-"
+                         r"(3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9])")
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_date(date_string):
+    """
+    Parses a date of the format YYYY-mm-dd into its proleptic Gregorian
+    ordinal (days since 0001-01-01, plus one). Results are cached, since
+    the same dates (birth dates, trading days) come up again and again.
+
+    :param date_string: date to be parsed
+    :return: int, the ordinal of the date; None if the date is not valid
+    """
+    match = DATE_FORMAT.fullmatch(date_string)
+    if match is None:
+        return None
+    try:
+        return datetime.date(int(match.group(1)), int(match.group(2)),
+                             int(match.group(3))).toordinal()
+    except ValueError:
+        return None
+
+
+def parse_dates(date_strings):
+    """
+    Parses many dates of the format YYYY-mm-dd
+
+    :param date_strings: an iterable of dates
+    :return: a list of ints (date ordinals), None for each invalid date
+    """
+    return list(map(parse_date, date_strings))
+
+
+def valid_date(date_string):
+    """
+    Checks whether a date has the format YYYY-mm-dd in numbers
+
+    :param date_string: date to be checked
+    :return: Boolean True if the format is valid, False otherwise
+    """
+    return parse_date(date_string) is not None
+
+
+def today():
+    """
+    :return: int, the ordinal of the current local date. Read it once per
+        batch and pass it on, rather than asking the clock for every entry.
+    """
+    return datetime.date.today().toordinal()
+
+
+def days_since(date_string, current=None):
+    """
+    Calculates the difference in days of date given and current date
+
+    :param date_string: date of the format YYYY-mm-dd
+    :param current: ordinal of the current date (default: today())
+    :return: int, the number of days; None if the date is not valid
+    """
+    ordinal = parse_date(date_string)
+    if ordinal is None:
+        return None
+    if current is None:
+        current = today()
+    return current - ordinal
+
+
+def benchmark(count=100000, distinct=20000):
+    """
+    Times validating count dates, drawn from distinct different dates, with
+    datetime.strptime and with parse_date
+
+    :param count: number of dates to validate
+    :param distinct: number of different dates among them
+    :return: a dict of seconds taken by each method and the speedups
+    """
+    start = datetime.date(1920, 1, 1).toordinal()
+    dates = [datetime.date.fromordinal(start + i % distinct).isoformat()
+             for i in range(count)]
+
+    def strptime_valid(date_string):
+        try:
+            datetime.datetime.strptime(date_string, "%Y-%m-%d")
+            return True
+        except ValueError:
+            return False
+
+    begin = time.perf_counter()
+    for date_string in dates:
+        strptime_valid(date_string)
+    strptime_seconds = time.perf_counter() - begin
+
+    parse_date.cache_clear()
+    begin = time.perf_counter()
+    for date_string in dates:
+        valid_date(date_string)
+    cached_seconds = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    for date_string in dates:
+        parse_date.__wrapped__(date_string)
+    uncached_seconds = time.perf_counter() - begin
+
+    return {"dates": count,
+            "distinct": distinct,
+            "strptime_seconds": round(strptime_seconds, 4),
+            "uncached_seconds": round(uncached_seconds, 4),
+            "cached_seconds": round(cached_seconds, 4),
+            "uncached_speedup": round(strptime_seconds / uncached_seconds, 1),
+            "cached_speedup": round(strptime_seconds / cached_seconds, 1)}
+
+
+if __name__ == "__main__":
+    for key, value in benchmark().items():
+        print("{0}: {1}".format(key, value))
@@ -9,11 +9,33 @@ __status__ = "Prototype"
 
 # imports one per line
 import json
+import re
 import datetime
 import math
+import bisect
+import heapq
+import hashlib
+import os
+import tempfile
+import multiprocessing
 import matplotlib.pyplot as plt
 import numpy as np
 import tkinter as tk
+import isodates
+
+# one row per trading day; dates are days since 1970-01-01
+PRICE_DTYPE = np.dtype([("date", "datetime64[D]"), ("open", np.float64),
+                        ("high", np.float64), ("low", np.float64),
+                        ("close", np.float64), ("volume", np.int64)])
+
+# date ordinal of 1970-01-01, the datetime64 epoch
+UNIX_EPOCH = datetime.date(1970, 1, 1).toordinal()
+
+# types accepted for the closing price
+NUMBER_TYPES = (int, float)
+
+# JSON whitespace between the items of an array
+WHITESPACE = re.compile(r"[ \t\n\r]*")
 
 
 class Stock:
@@ -21,23 +43,70 @@ class Stock:
     Class for stock data.
     """
 
-    def __init__(self, stock_name, stock_file_name):
+    def __init__(self, stock_name, stock_file_name, cache_dir=None,
+                 lazy=False):
         """
-        (Stock, str, str) -> NoneType
+        (Stock, str, str, str, bool) -> NoneType
         Creates a new Stock object with stock_name from stock_file_name, and
-        initializes some variables.
+        initializes some variables. If cache_dir is given, the parsed prices
+        are memory mapped from a binary cache there when it is up to date
+        with stock_file_name, and written to it otherwise.
+
+        If lazy is True, nothing is read yet: the prices are loaded on first
+        use (e.g. by span()), and the monthly averages are computed on first
+        use (e.g. by average() or six_best_months()). Errors in the stock
+        file are then raised by that first use instead of here.
         """
         self.stock_name = stock_name
         self.stock_file_name = stock_file_name
+        self.cache_dir = cache_dir
+        self.reset()
+
+        if not lazy:
+            self.ensure_averages()
+
+    def reset(self):
+        """
+        Empties all data loaded or computed from the stock file.
+        """
+        self.stages = set()
         self.stock_data = []
-        self.months = {}
+        self.prices = np.empty(0, dtype=PRICE_DTYPE)
+        self.month_keys = []
+        self.month_positions = {}
+        self.month_index = np.empty(0, dtype=np.intp)
+        self.numerators = np.empty(0)
+        self.denominators = np.empty(0)
+        self.month_averages = []
         self.monthly_averages = []
+        self.order = None
+        self.views = {}
 
-        # some method calls for later use
-        self.read_json_from_file()
-        self.initialize_months()
-        self.calculate_average()
-        self.sort_by_price()
+    def ensure_prices(self):
+        """
+        Loads prices and months, unless they are already loaded.
+        """
+        if "prices" not in self.stages:
+            self.load_prices()
+            self.stages.add("prices")
+
+    def ensure_averages(self):
+        """
+        Computes the monthly averages and sorts them by price, unless they
+        are already computed.
+        """
+        if "averages" not in self.stages:
+            self.ensure_prices()
+            self.calculate_average()
+            self.stages.add("averages")
+            self.sort_by_price()
+
+    def invalidate(self):
+        """
+        Forgets everything loaded or computed (including appended rows), so
+        that the next use reads stock_file_name again.
+        """
+        self.reset()
 
     def average(self):
         """
@@ -45,6 +114,7 @@ class Stock:
 
         :return: a list: monthly averages of the stock
         """
+        self.ensure_averages()
         return self.monthly_averages
 
     def name(self):
@@ -61,7 +131,27 @@ class Stock:
 
         :return: int, the span of the stock.
         """
-        return len(self.months)
+        self.ensure_prices()
+        return len(self.month_keys)
+
+    def load_prices(self):
+        """
+        Initializes prices and months, from the binary cache if there is an
+        up to date one, otherwise by parsing stock_file_name.
+        """
+        if self.cache_dir is not None:
+            prices = load_cached_prices(self.stock_file_name, self.cache_dir)
+            if prices is not None:
+                self.prices = prices
+                self.group_months()
+                return
+
+        stat = os.stat(self.stock_file_name)
+        self.prices = read_prices(self.stock_file_name)
+        self.group_months()
+        if self.cache_dir is not None:
+            save_cached_prices(self.prices, self.stock_file_name,
+                               self.cache_dir, stat)
 
     def read_json_from_file(self):
         """
@@ -74,69 +164,239 @@ class Stock:
 
     def initialize_months(self):
         """
-        Populates months (a dict where key being YYYY/MM and
-        value being a list of stock objects) with all data
-        associated with specific month found in the stock file.
+        Converts stock_data (a list of dicts, one per trading day) into the
+        structured array prices, with one typed column per attribute, and
+        groups the days by month: month_keys holds each month as YYYY/MM in
+        order of first appearance, and month_index the position of each
+        day's month in month_keys. stock_data is emptied afterwards.
         """
-        if type(self.stock_data) is not list:
-            raise TypeError("Invalid stock data")
+        self.prices = rows_to_prices(self.stock_data)
+        self.stock_data = []
+        self.group_months()
 
-        for stock in self.stock_data:
-            if type(stock) is not dict:
-                raise TypeError("Invalid stock in stock data")
-            if ("Date" in stock.keys() and
-               self.valid_date_format(stock["Date"])):
-                # format date to YYYY/mm
-                YYYY, mm, dd = stock["Date"].split("-")
-                date = YYYY + "/" + mm
-                self.months.setdefault(date, []).append(stock)
-            else:
-                raise ValueError("Date of stock not provided or invalid")
+    def group_months(self):
+        """
+        Groups the days in prices by month, keeping months in order of first
+        appearance.
+        """
+        months = self.prices["date"].astype("datetime64[M]")
+        unique_months, first_index, inverse = np.unique(
+            months, return_index=True, return_inverse=True)
+        order = np.argsort(first_index, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        self.month_index = rank[inverse.reshape(-1)]
+        self.month_keys = [month.replace("-", "/") for month in
+                           np.datetime_as_string(unique_months[order])]
+        self.month_positions = {month: position for position, month
+                                in enumerate(self.month_keys)}
 
     def calculate_average(self):
         """
-        Calculates average for each month in months dict, and
-        stores tuples (month, average) in monthly_averages list.
+        Calculates the volume weighted average closing price of each month,
+        and stores tuples (month, average) in monthly_averages list. The
+        sums behind each average are kept in numerators and denominators
+        so that append() can update them.
         """
-        if type(self.months) is not dict:
-            raise TypeError("Months is not of type dictionary")
-        if len(self.months) == 0:
+        self.ensure_prices()
+        if len(self.month_keys) == 0:
             raise ValueError("Months not initialized")
 
-        for (date, obj_list) in self.months.items():
-            numerator = 0       # will hold the sum (v1*c1 + ... + vn+cn)
-            denominator = 0     # will hold the sum (v1+...+vn)
-            if type(obj_list) is not list:
-                raise TypeError("Unexpected months value format")
-            for stock in obj_list:
-                # check if close and volume exist
-                if "Close" in stock.keys() and "Volume" in stock.keys():
-                    # check for type
-                    if (type(stock["Volume"]) is int
-                       and type(stock["Close"]) in [int, float]):
-                        numerator += stock["Volume"] * stock["Close"]
-                        denominator += stock["Volume"]
-                    else:
-                        raise TypeError("Invalid attribute type of stock")
-                else:
-                    raise ValueError("Data missing")
-
-            average = round(numerator / denominator, 2)
-            self.monthly_averages.append((date, average))
+        count = len(self.month_keys)
+        volume = self.prices["volume"].astype(np.float64)
+        # sums (v1*c1 + ... + vn*cn) and (v1+...+vn), added in file order
+        numerator = np.bincount(self.month_index,
+                                weights=volume * self.prices["close"],
+                                minlength=count)
+        denominator = np.bincount(self.month_index, weights=volume,
+                                  minlength=count)
+        if not denominator.all():
+            raise ZeroDivisionError("Total volume of a month is zero")
+
+        self.numerators = numerator
+        self.denominators = denominator
+        self.month_averages = [round(float(average), 2)
+                               for average in numerator / denominator]
+        self.monthly_averages = list(zip(self.month_keys,
+                                         self.month_averages))
+        self.order = None
+        self.views = {}
+
+    def append(self, rows):
+        """
+        Adds new trading days to the stock, as if they were at the end of
+        the stock file. Only the averages of the months the new days fall in
+        are computed again, and monthly_averages stays in its current order.
+
+        :param rows: a list of dicts in the format of the stock file
+        :raises: TypeError or ValueError if the rows are not valid (the
+            stock is left unchanged)
+        """
+        self.ensure_averages()
+        new_prices = rows_to_prices(rows)
+        if len(new_prices) == 0:
+            return
+
+        # positions of the new days' months, adding months not seen before
+        # in order of first appearance
+        new_months, first_index, inverse = np.unique(
+            new_prices["date"].astype("datetime64[M]"), return_index=True,
+            return_inverse=True)
+        month_keys = list(self.month_keys)
+        month_positions = dict(self.month_positions)
+        positions = np.empty(len(new_months), dtype=np.intp)
+        for unique in np.argsort(first_index, kind="stable"):
+            month = str(new_months[unique]).replace("-", "/")
+            if month not in month_positions:
+                month_positions[month] = len(month_keys)
+                month_keys.append(month)
+            positions[unique] = month_positions[month]
+        new_index = positions[inverse.reshape(-1)]
+
+        # add the new days to the sums, in order
+        added = len(month_keys) - len(self.month_keys)
+        numerators = np.concatenate([self.numerators, np.zeros(added)])
+        denominators = np.concatenate([self.denominators, np.zeros(added)])
+        volume = new_prices["volume"].astype(np.float64)
+        np.add.at(numerators, new_index, volume * new_prices["close"])
+        np.add.at(denominators, new_index, volume)
+        changed = sorted(set(positions.tolist()))
+        if not denominators[changed].all():
+            raise ZeroDivisionError("Total volume of a month is zero")
+
+        def price_key(item):
+            return item[1], month_positions[item[0]]
+
+        # the new state is built aside and only stored once it is complete
+        month_averages = self.month_averages + [None] * added
+        monthly_averages = None
+        if self.order == "price":
+            monthly_averages = list(self.monthly_averages)
+        for position in changed:
+            month = month_keys[position]
+            old_average = month_averages[position]
+            average = round(float(numerators[position] /
+                                  denominators[position]), 2)
+            month_averages[position] = average
+            if monthly_averages is None:
+                continue
+            # sort_by_price keeps monthly_averages ordered by price_key;
+            # if the old entry is not where it should be (e.g. the list was
+            # modified), the list is sorted again below instead
+            if old_average is not None:
+                index = bisect.bisect_left(monthly_averages,
+                                           (old_average, position),
+                                           key=price_key)
+                if index == len(monthly_averages) or \
+                        monthly_averages[index] != (month, old_average):
+                    monthly_averages = None
+                    continue
+                del monthly_averages[index]
+            bisect.insort(monthly_averages, (month, average), key=price_key)
+
+        if monthly_averages is None:
+            monthly_averages = list(zip(month_keys, month_averages))
+            if self.order == "price":
+                monthly_averages.sort(key=price_key)
+            elif self.order == "time":
+                monthly_averages.sort(key=lambda x: x[0])
+
+        self.prices = np.concatenate([self.prices, new_prices])
+        self.month_index = np.concatenate([self.month_index, new_index])
+        self.month_keys = month_keys
+        self.month_positions = month_positions
+        self.numerators = numerators
+        self.denominators = denominators
+        self.month_averages = month_averages
+        self.monthly_averages = monthly_averages
+        self.views = {}
+
+    def update_from_file(self, stock_file_name):
+        """
+        Appends the trading days in another stock file, e.g. the latest
+        rows fetched for the day
+
+        :param stock_file_name: name of a JSON file holding a list of rows
+        """
+        with open(stock_file_name) as file_handle:
+            rows = json.loads(file_handle.read())
+        if type(rows) is not list:
+            raise TypeError("Invalid stock data")
+        self.append(rows)
 
     def sort_by_price(self):
         """
         Sorts monthly_averages list of tuples of format (string, float) by
-        price in aescending order (lowest first).
+        price in aescending order (lowest first), months of the same price
+        in order of first appearance in the stock file (see price_key).
         """
-        self.monthly_averages.sort(key=lambda x: x[1])
+        self.ensure_averages()
+        self.monthly_averages.sort(
+            key=lambda x: (x[1], self.month_positions[x[0]]))
+        self.order = "price"
 
     def sort_by_time(self):
         """
         Sorts monthly_averages list of tuples of format (string, float) by
         time in aescending order (earliest first).
         """
+        self.ensure_averages()
         self.monthly_averages.sort(key=lambda x: x[0])
+        self.order = "time"
+
+    def monthly_stats(self):
+        """
+        Returns the statistics of the monthly averages, cached until the
+        averages change
+
+        :return: a RunningStats
+        """
+        self.ensure_averages()
+        if "stats" not in self.views:
+            self.views["stats"] = RunningStats().update(self.month_averages)
+        return self.views["stats"]
+
+    def best_months(self, k=6):
+        """
+        Retrieves the k highest monthly averages, found by partial selection
+        (a heap) without sorting or reordering monthly_averages.
+
+        :param k: number of months
+        :return: a list of tuples(date, float), highest first
+        """
+        self.ensure_averages()
+        if len(self.month_averages) < k:
+            raise ValueError("Not enough months")
+        # among equal averages, the month that comes later in the file first
+        positions = heapq.nlargest(k, range(len(self.month_averages)),
+                                   key=self.price_key)
+        return [(self.month_keys[i], self.month_averages[i])
+                for i in positions]
+
+    def worst_months(self, k=6):
+        """
+        Retrieves the k lowest monthly averages, found by partial selection
+        (a heap) without sorting or reordering monthly_averages.
+
+        :param k: number of months
+        :return: a list of tuples(date, float), lowest first
+        """
+        self.ensure_averages()
+        if len(self.month_averages) < k:
+            raise ValueError("Not enough months")
+        positions = heapq.nsmallest(k, range(len(self.month_averages)),
+                                    key=self.price_key)
+        return [(self.month_keys[i], self.month_averages[i])
+                for i in positions]
+
+    def price_key(self, position):
+        """
+        Sort key of the month at position in month_keys: its average, then
+        its position, the same order as a stable sort by price
+
+        :return: a tuple (float, int)
+        """
+        return self.month_averages[position], position
 
     def six_best_months(self):
         """
@@ -144,10 +404,7 @@ class Stock:
 
         :return: a list of tuples(date, float)
         """
-        if len(self.monthly_averages) < 6:
-            raise ValueError("Not enough months")
-        best_six = self.monthly_averages[-6:]
-        return best_six[::-1]   # reverse descending order
+        return self.best_months(6)
 
     def six_worst_months(self):
         """
@@ -155,9 +412,36 @@ class Stock:
 
         :return: a list of tuples(date, float)
         """
-        if len(self.monthly_averages) < 6:
-            raise ValueError("Not enough months")
-        return self.monthly_averages[:6]
+        return self.worst_months(6)
+
+    def by_time(self):
+        """
+        Returns the monthly averages in time order (earliest first). The
+        list is cached until the averages change; do not modify it.
+
+        :return: a list of tuples(date, float)
+        """
+        self.ensure_averages()
+        if "time" not in self.views:
+            self.views["time"] = sorted(zip(self.month_keys,
+                                            self.month_averages))
+        return self.views["time"]
+
+    def by_price(self):
+        """
+        Returns the monthly averages in price order (lowest first). The
+        list is cached until the averages change; do not modify it.
+
+        :return: a list of tuples(date, float)
+        """
+        self.ensure_averages()
+        if "price" not in self.views:
+            positions = sorted(range(len(self.month_averages)),
+                               key=self.price_key)
+            self.views["price"] = [(self.month_keys[i],
+                                    self.month_averages[i])
+                                   for i in positions]
+        return self.views["price"]
 
     @staticmethod
     def valid_date_format(date):
@@ -167,33 +451,39 @@ class Stock:
         :param date: date to be checked
         :return: Boolean True if the format is valid; False otherwise
         """
-        try:
-            datetime.datetime.strptime(date, '%Y-%m-%d')
-            return True
-        except ValueError:
-            return False
+        return isodates.valid_date(date)
 
     def visualize(self):
         """
         Visualizes the average monthly stock price over time, and also
         marks the best six months and worst six months.
         """
-        self.sort_by_time()     # sort by time for time series plot
-        time = [self.monthly_averages[i][0] for i in range(self.span())]
-        price = [self.monthly_averages[i][1] for i in range(self.span())]
+        self.plot(plt.gca())
 
-        datetime_list = list()
-        for i in range(len(time)):
-            YYYY, mm = time[i].split("/")
-            datetime_list.append(datetime.datetime(int(YYYY), int(mm), 15))
+    def plot(self, axes, max_points=None):
+        """
+        Draws the average monthly stock price over time, with markers on the
+        best six months and worst six months, on a matplotlib Axes (e.g. of
+        a Figure rendered without pyplot).
 
-        # numpy array
-        datetime_arr = np.array(datetime_list)
+        :param axes: the matplotlib Axes to draw on
+        :param max_points: if given, the price line is downsampled to at
+            most this many points (the markers are always exact)
+        """
+        time = [month for month, average in self.by_time()]
+        price = [average for month, average in self.by_time()]
+
+        # the 15th of each month, as numpy arrays
+        datetime_arr = np.array([month.replace("/", "-") + "-15"
+                                 for month in time], dtype="datetime64[D]")
         price_arr = np.array(price)
 
         # find indices of the best six and worse six months for markers
-        best_indices = sorted(range(len(price)), key=lambda i: price[i])[-6:]
-        worst_indices = sorted(range(len(price)), key=lambda i: price[i])[:6]
+        time_index = {month: i for i, month in enumerate(time)}
+        best_indices = [time_index[month] for month, average
+                        in self.best_months(min(6, len(time)))]
+        worst_indices = [time_index[month] for month, average
+                         in self.worst_months(min(6, len(time)))]
 
         # find the best six and worst six points
         best_six_time = datetime_arr[best_indices]
@@ -202,16 +492,21 @@ class Stock:
         worst_six_price = price_arr[worst_indices]
 
         # plot
-        plt.plot(datetime_arr, price)
-        plt.plot(best_six_time, best_six_price, "gD", label="Best six months")
-        plt.plot(worst_six_time, worst_six_price, "rD",
-                 label="Worst six months")
+        line_time, line_price = datetime_arr, price_arr
+        if max_points is not None:
+            line_time, line_price = downsample(datetime_arr, price_arr,
+                                               max_points)
+        axes.plot(line_time, line_price)
+        axes.plot(best_six_time, best_six_price, "gD",
+                  label="Best six months")
+        axes.plot(worst_six_time, worst_six_price, "rD",
+                  label="Worst six months")
 
-        plt.title(self.name() + " stock price over time")
-        plt.xlabel("Time")
-        plt.ylabel("Stock price ($)")
-        plt.grid()
-        plt.legend(loc="best", numpoints=1, prop={"size": 10})
+        axes.set_title(self.name() + " stock price over time")
+        axes.set_xlabel("Time")
+        axes.set_ylabel("Stock price ($)")
+        axes.grid(True)
+        axes.legend(loc="best", numpoints=1, prop={"size": 10})
 
     def gui(self):
         """
@@ -263,22 +558,430 @@ class Stock:
         self.root.destroy()
 
 
+def cache_file_name(stock_file_name, cache_dir, stat=None):
+    """
+    Names the binary cache file of a stock file. The name depends on the
+    full path, modification time and size of the stock file, so a modified
+    file never matches an old cache.
+
+    :param stock_file_name: name of a JSON stock file
+    :param cache_dir: directory holding cache files
+    :param stat: os.stat of the stock file (default: stat it now)
+    :return: the path of the cache file
+    """
+    path = os.path.abspath(stock_file_name)
+    if stat is None:
+        stat = os.stat(path)
+    source_key = hashlib.sha1(path.encode("utf-8")).hexdigest()[:16]
+    version_key = "{0:x}-{1:x}".format(stat.st_mtime_ns, stat.st_size)
+    return os.path.join(cache_dir, "{0}-{1}.npy".format(source_key,
+                                                        version_key))
+
+
+def load_cached_prices(stock_file_name, cache_dir):
+    """
+    Memory maps the cached prices of a stock file
+
+    :param stock_file_name: name of a JSON stock file
+    :param cache_dir: directory holding cache files
+    :return: a read-only structured array of PRICE_DTYPE; None if there is
+        no up to date cache
+    """
+    try:
+        prices = np.load(cache_file_name(stock_file_name, cache_dir),
+                         mmap_mode="r", allow_pickle=False)
+    except (FileNotFoundError, ValueError):
+        return None
+    if prices.dtype != PRICE_DTYPE or prices.ndim != 1:
+        return None
+    return prices
+
+
+def save_cached_prices(prices, stock_file_name, cache_dir, stat=None):
+    """
+    Writes the prices of a stock file to its binary cache, replacing caches
+    of older versions of the same file.
+
+    :param prices: a structured array of PRICE_DTYPE
+    :param stock_file_name: name of a JSON stock file
+    :param cache_dir: directory holding cache files
+    :param stat: os.stat of the stock file taken before the prices were read
+        from it, so that prices of a file modified meanwhile are cached for
+        the version they come from (default: stat it now)
+    :return: the path of the cache file
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_file = cache_file_name(stock_file_name, cache_dir, stat)
+    source_prefix = os.path.basename(cache_file).split("-")[0] + "-"
+    for old_file in os.listdir(cache_dir):
+        if old_file.startswith(source_prefix) and old_file.endswith(".npy"):
+            os.remove(os.path.join(cache_dir, old_file))
+
+    # write to a temporary file of this process first, so that readers never
+    # map a partial file and processes filling the same cache never write to
+    # the same file
+    file_descriptor, temporary_file = tempfile.mkstemp(
+        prefix=os.path.basename(cache_file) + ".", suffix=".tmp",
+        dir=cache_dir)
+    try:
+        with os.fdopen(file_descriptor, "wb") as file_handle:
+            np.save(file_handle, prices, allow_pickle=False)
+        # mkstemp makes the file private; keep the usual permissions
+        os.chmod(temporary_file, 0o644)
+        os.replace(temporary_file, cache_file)
+    except BaseException:
+        os.unlink(temporary_file)
+        raise
+    return cache_file
+
+
+def convert_to_cache(stock_file_names, cache_dir):
+    """
+    Parses stock files and writes their binary caches; files that already
+    have an up to date cache are loaded from it instead.
+
+    :param stock_file_names: an iterable of JSON stock file names
+    :param cache_dir: directory holding cache files
+    :return: a list of the cache file names
+    """
+    cache_files = []
+    for stock_file_name in stock_file_names:
+        Stock(stock_file_name, stock_file_name, cache_dir,
+              lazy=True).ensure_prices()
+        cache_files.append(cache_file_name(stock_file_name, cache_dir))
+    return cache_files
+
+
+def rows_to_prices(rows):
+    """
+    Validates and converts price rows, as found in stock files, into a
+    structured array of PRICE_DTYPE
+
+    :param rows: a list of dicts with "Date", "Close" and "Volume" (and
+        optionally "Open", "High" and "Low")
+    :return: a structured array with one row per dict
+    :raises: TypeError or ValueError if the rows are not valid
+    """
+    if type(rows) is not list:
+        raise TypeError("Invalid stock data")
+    return build_prices([rows])
+
+
+def read_prices(stock_file_name, chunk_size=1048576):
+    """
+    Reads a stock file into a structured array of PRICE_DTYPE in a single
+    pass: each chunk of rows is validated and converted as soon as it is
+    parsed, so neither the whole text nor the whole list of dicts is held in
+    memory. Errors are those of rows_to_prices(json.load(file)), except that
+    an invalid row is reported before a syntax error further on in the file.
+
+    :param stock_file_name: name of a stock file (a JSON array of rows)
+    :param chunk_size: number of characters to read from the file at a time
+    :return: a structured array with one row per trading day
+    :raises: TypeError or ValueError (including json.JSONDecodeError) if the
+        file is not valid
+    """
+    with open(stock_file_name) as file_handle:
+        return build_prices(iter_json_batches(file_handle, chunk_size))
+
+
+def build_prices(batches):
+    """
+    Converts batches of price rows into a structured array of PRICE_DTYPE,
+    so that only one batch of rows is held as Python objects at a time.
+
+    :param batches: an iterable of lists of dicts in the format of the stock
+        file
+    :return: a structured array with one row per dict
+    :raises: TypeError or ValueError if a row is not valid
+    """
+    blocks = [np.array([price_row(stock) for stock in rows],
+                       dtype=PRICE_DTYPE)
+              for rows in batches]
+    if len(blocks) == 1:
+        return blocks[0]
+    if not blocks:
+        return np.empty(0, dtype=PRICE_DTYPE)
+    return np.concatenate(blocks)
+
+
+def price_row(stock):
+    """
+    Validates and converts one price row
+
+    :param stock: a dict with "Date", "Close" and "Volume" (and optionally
+        "Open", "High" and "Low")
+    :return: a tuple in the order of PRICE_DTYPE, the date as days since
+        1970-01-01
+    :raises: TypeError or ValueError if the row is not valid
+    """
+    if type(stock) is not dict:
+        raise TypeError("Invalid stock in stock data")
+    date = stock.get("Date")
+    ordinal = isodates.parse_date(date) if type(date) is str else None
+    if ordinal is None:
+        raise ValueError("Date of stock not provided or invalid")
+
+    # check if close and volume exist, then for type
+    if "Close" not in stock or "Volume" not in stock:
+        raise ValueError("Data missing")
+    close = stock["Close"]
+    volume = stock["Volume"]
+    if type(volume) is not int or type(close) not in NUMBER_TYPES:
+        raise TypeError("Invalid attribute type of stock")
+
+    return (ordinal - UNIX_EPOCH, to_float(stock.get("Open")),
+            to_float(stock.get("High")), to_float(stock.get("Low")),
+            close, volume)
+
+
+def iter_json_batches(file_handle, chunk_size=1048576):
+    """
+    Parses a JSON array from an open file incrementally, yielding its items
+    in lists, one list per chunk of text read. Runs of items that end with
+    an object are parsed with a single json.loads call; items that cannot
+    be (e.g. a "}" inside a string ends the chunk) are parsed one at a
+    time. Only one chunk of text and its items are held in memory.
+
+    :param file_handle: a file open for reading text
+    :param chunk_size: number of characters to read at a time
+    :return: generator of lists of parsed items
+    :raises: TypeError if the file holds valid JSON that is not an array,
+        json.JSONDecodeError if it is not valid JSON
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+    while position == len(buffer) and not eof:
+        chunk = file_handle.read(chunk_size)
+        buffer = chunk
+        position = WHITESPACE.match(buffer).end()
+        eof = chunk == ""
+
+    if buffer[position:position + 1] != "[":
+        # not an array: parse it whole for the same error as json.loads
+        json.loads(buffer + file_handle.read())
+        raise TypeError("Invalid stock data")
+    position += 1
+    expect_item = True      # an item or "]" comes next, else "," or "]"
+    first = True
+    whole_objects = True    # whether to try json.loads on this buffer
+
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        if position == len(buffer):
+            if eof:
+                raise json.JSONDecodeError("Unterminated array", buffer,
+                                           position)
+            chunk = file_handle.read(chunk_size)
+            buffer = buffer[position:] + chunk
+            position = 0
+            eof = chunk == ""
+            whole_objects = True
+            continue
+
+        character = buffer[position]
+        if character == "]" and (first or not expect_item):
+            break
+        if not expect_item:
+            if character != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter",
+                                           buffer, position)
+            position += 1
+            expect_item = True
+            continue
+
+        # fast path: all items up to the last "}" in the buffer at once
+        end = buffer.rfind("}", position) + 1 if whole_objects else 0
+        if end > 0:
+            try:
+                items = json.loads("[" + buffer[position:end] + "]")
+            except json.JSONDecodeError:
+                whole_objects = False
+            else:
+                yield items
+                position = end
+                expect_item = False
+                first = False
+                continue
+
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            end = None
+        # an item that runs up to the end of the buffer may be cut short
+        # (e.g. a number), so only accept it once more text is read
+        if end is None or (end == len(buffer) and not eof):
+            chunk = file_handle.read(chunk_size)
+            buffer = buffer[position:] + chunk
+            position = 0
+            eof = chunk == ""
+            whole_objects = True
+            continue
+
+        yield [item]
+        position = end
+        expect_item = False
+        first = False
+
+    # nothing but whitespace may follow the array
+    rest = buffer[position + 1:] + file_handle.read()
+    if rest.strip():
+        raise json.JSONDecodeError("Extra data", rest, len(rest) -
+                                   len(rest.lstrip()))
+
+
+def downsample(x, y, max_points):
+    """
+    Reduces a series to at most max_points points for plotting, keeping the
+    shape: the series is cut into max_points // 2 buckets and the lowest
+    and highest point of each bucket are kept, in order.
+
+    :param x: an array of x values (e.g. dates)
+    :param y: an array of y values
+    :param max_points: maximum number of points to keep (at least 2)
+    :return: a tuple (x, y) of the kept points
+    """
+    if max_points < 2:
+        raise ValueError("Need at least 2 points")
+    if len(y) <= max_points:
+        return x, y
+
+    buckets = max_points // 2
+    starts = np.linspace(0, len(y), buckets + 1).astype(np.intp)[:-1]
+    bucket_of = np.repeat(np.arange(buckets), np.diff(np.append(starts,
+                                                                len(y))))
+    # index of the lowest and highest value of each bucket
+    order = np.lexsort((y, bucket_of))
+    counts = np.bincount(bucket_of, minlength=buckets)
+    ends = np.cumsum(counts)
+    lowest = order[ends - counts]
+    highest = order[ends - 1]
+    keep = np.unique(np.concatenate([lowest, highest]))
+    return x[keep], y[keep]
+
+
+def to_float(value):
+    """
+    Converts a price that may be a number or a numeric string to a float
+
+    :param value: the price, or None if it is missing
+    :return: the price as a float; NaN if missing or not numeric
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
 def stdev(alist):
     """
-    Given a list of numbers, computes its standard deviation.
+    Given a list of numbers, computes its standard deviation in one pass,
+    without keeping the numbers.
 
-    :param: alist: a list of numbers
+    :param: alist: a list (or any iterable) of numbers
     :return: the standard deviation of a list of numbers
     """
-    if len(alist) == 0:
-        raise ValueError("No value in the list")
+    stats = RunningStats()
     for stock_price in alist:
         if stock_price < 0:
             raise ValueError("Stock price can't be negative")
+        stats.add(stock_price)
+    if stats.count == 0:
+        raise ValueError("No value in the list")
+    return stats.stdev()
+
+
+class RunningStats:
+    """
+    Class for count, mean, variance, minimum and maximum of a stream of
+    numbers, updated in O(1) per number (Welford's method) in constant
+    memory. Statistics of separate parts of a stream, e.g. computed on
+    different processes, can be merged.
+    """
+
+    def __init__(self):
+        """
+        (RunningStats) -> NoneType
+        Creates a new RunningStats of no numbers.
+        """
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0   # sum of squared deviations from the mean
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def add(self, value):
+        """
+        Adds one number.
 
-    mean = sum(alist) / len(alist)
-    sum_square_deviation = sum((x - mean)**2 for x in alist)
-    return math.sqrt(sum_square_deviation / len(alist))
+        :param value: a number
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def update(self, values):
+        """
+        Adds an array (or iterable) of numbers at once, e.g. a column of
+        Stock.prices, using NumPy for the batch.
+
+        :param values: numbers
+        :return: this RunningStats
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return self
+        batch = RunningStats()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.minimum = float(values.min())
+        batch.maximum = float(values.max())
+        return self.merge(batch)
+
+    def merge(self, other):
+        """
+        Adds the numbers summarised by another RunningStats (Chan's
+        parallel formula).
+
+        :param other: a RunningStats
+        :return: this RunningStats
+        """
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    def variance(self, ddof=0):
+        """
+        :param ddof: 0 for the population variance (as stdev() uses), 1 for
+            the sample variance
+        :return: the variance of the numbers
+        """
+        if self.count <= ddof:
+            raise ValueError("Not enough values")
+        return self.m2 / (self.count - ddof)
+
+    def stdev(self, ddof=0):
+        """
+        :param ddof: 0 for the population standard deviation, 1 for the
+            sample standard deviation
+        :return: the standard deviation of the numbers
+        """
+        return math.sqrt(self.variance(ddof))
 
 
 def compare_stocks(stock1, stock2):
@@ -295,12 +998,191 @@ def compare_stocks(stock1, stock2):
     stock1_ave = [stock1.average()[i][1] for i in range(stock1.span())]
     stock2_ave = [stock2.average()[i][1] for i in range(stock2.span())]
 
-    if stdev(stock1_ave) > stdev(stock2_ave):
+    return volatility_message(stock1.name(), stdev(stock1_ave),
+                              stock2.name(), stdev(stock2_ave))
+
+
+def volatility_message(name1, stdev1, name2, stdev2):
+    """
+    Words the result of comparing the standard deviations of two stocks
+
+    :return: a message naming the stock with the higher standard deviation,
+        or saying that both are the same
+    """
+    if stdev1 > stdev2:
         return ("{0} stock has a higher standard deviation in monthly averages"
-                " than that of {1}".format(stock1.name(), stock2.name()))
-    elif stdev(stock1_ave) < stdev(stock2_ave):
+                " than that of {1}".format(name1, name2))
+    elif stdev1 < stdev2:
         return ("{0} stock has a higher standard deviation in monthly averages"
-                " than that of {1}".format(stock2.name(), stock1.name()))
+                " than that of {1}".format(name2, name1))
     else:
         return ("{0} and {1} stocks have the same standard deviation"
-                " in monthly averages".format(stock1.name(), stock2.name()))
+                " in monthly averages".format(name1, name2))
+
+
+class Universe:
+    """
+    Class for many stocks analysed together. The monthly averages of all
+    stocks are aligned in one matrix (one row per stock, one column per
+    month, NaN where a stock has no data), so that statistics for every
+    stock, or every pair of stocks, are computed in one vectorised pass.
+    """
+
+    def __init__(self, stock_files, workers=None, cache_dir=None):
+        """
+        (Universe, list, int, str) -> NoneType
+        Creates a new Universe from stock_files, a list of (stock_name,
+        stock_file_name) pairs, loading them on workers processes (in this
+        process if workers is 1). Stocks that cannot be loaded are left out
+        and their errors kept in errors.
+        """
+        self.errors = {}
+        stock_files = [tuple(stock_file) + (cache_dir,)
+                       for stock_file in stock_files]
+        if workers == 1:
+            results = [load_monthly_averages(stock_file)
+                       for stock_file in stock_files]
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                results = pool.map(load_monthly_averages, stock_files)
+
+        loaded = []
+        for stock_name, months, averages, error in results:
+            if error is None:
+                loaded.append((stock_name, months, averages))
+            else:
+                self.errors[stock_name] = error
+
+        self.stock_names = [stock_name for stock_name, m, a in loaded]
+        self.months = np.unique(np.array(
+            [month for s, months, a in loaded for month in months],
+            dtype="U7"))
+        self.averages = np.full((len(loaded), len(self.months)), np.nan)
+        for row, (stock_name, months, averages) in enumerate(loaded):
+            columns = np.searchsorted(self.months, np.array(months,
+                                                            dtype="U7"))
+            self.averages[row, columns] = averages
+
+        self.volatilities = None
+
+    @classmethod
+    def from_directory(cls, directory, workers=None, cache_dir=None):
+        """
+        Creates a Universe from every .json file in directory, named after
+        the file without its extension.
+
+        :return: a Universe
+        """
+        stock_files = [(os.path.splitext(file_name)[0],
+                        os.path.join(directory, file_name))
+                       for file_name in sorted(os.listdir(directory))
+                       if file_name.endswith(".json")]
+        return cls(stock_files, workers, cache_dir)
+
+    def names(self):
+        """
+        Getter: returns the names of the stocks, in row order
+
+        :return: a list of strings
+        """
+        return self.stock_names
+
+    def monthly_averages(self):
+        """
+        Getter: returns the aligned monthly averages
+
+        :return: a tuple (months, matrix): months as YYYY/MM strings, and
+            one row of averages per stock with NaN for missing months
+        """
+        return list(self.months), self.averages
+
+    def volatility(self):
+        """
+        Computes the standard deviation of each stock's monthly averages,
+        as stdev() does for one stock, ignoring missing months.
+
+        :return: an array with one standard deviation per stock
+        """
+        if self.volatilities is None:
+            self.volatilities = np.nanstd(self.averages, axis=1)
+        return self.volatilities
+
+    def ranking(self, descending=True):
+        """
+        Ranks the stocks by volatility
+
+        :param descending: Boolean True for the most volatile first
+        :return: a list of tuples (stock name, standard deviation)
+        """
+        volatility = self.volatility()
+        order = np.argsort(-volatility if descending else volatility,
+                           kind="stable")
+        return [(self.stock_names[i], float(volatility[i])) for i in order]
+
+    def compare_volatility(self):
+        """
+        Compares the volatility of every pair of stocks at once, the
+        vectorised form of compare_stocks()
+
+        :return: a matrix with 1 where the row stock has the higher standard
+            deviation, -1 where the column stock has, and 0 where they are
+            the same
+        """
+        volatility = self.volatility()
+        return np.sign(volatility[:, np.newaxis] -
+                       volatility[np.newaxis, :]).astype(np.int8)
+
+    def compare(self, stock_name1, stock_name2):
+        """
+        Compares the volatility of two stocks in the universe
+
+        :return: the same message as compare_stocks()
+        """
+        volatility = self.volatility()
+        stdev1 = volatility[self.stock_names.index(stock_name1)]
+        stdev2 = volatility[self.stock_names.index(stock_name2)]
+        return volatility_message(stock_name1, stdev1, stock_name2, stdev2)
+
+    def correlation(self):
+        """
+        Computes the Pearson correlation of the monthly averages of every
+        pair of stocks, over the months both have data for
+
+        :return: a square matrix of correlations, NaN where a pair has fewer
+            than two months in common or one of them is constant
+        """
+        present = (~np.isnan(self.averages)).astype(np.float64)
+        values = np.where(present > 0, self.averages, 0.0)
+
+        # sums over the months each pair has in common
+        count = present @ present.T
+        sum_x = values @ present.T
+        sum_xx = (values * values) @ present.T
+        sum_xy = values @ values.T
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            covariance = sum_xy - sum_x * sum_x.T / count
+            variance_x = sum_xx - sum_x ** 2 / count
+            correlation = covariance / np.sqrt(variance_x * variance_x.T)
+        correlation[count < 2] = np.nan
+        return np.clip(correlation, -1.0, 1.0)
+
+
+def load_monthly_averages(stock_file):
+    """
+    Loads one stock's monthly averages, sorted by month (used by Universe
+    on worker processes)
+
+    :param stock_file: a tuple (stock_name, stock_file_name, cache_dir)
+    :return: a tuple (stock_name, months, averages, error), error being
+        None or the message of the exception that stopped loading
+    """
+    stock_name, stock_file_name, cache_dir = stock_file
+    try:
+        stock = Stock(stock_name, stock_file_name, cache_dir)
+    except (TypeError, ValueError, ZeroDivisionError) as error:
+        return stock_name, [], [], "{0}: {1}".format(type(error).__name__,
+                                                     error)
+    monthly = sorted(stock.average())
+    return (stock_name, [month for month, average in monthly],
+            [average for month, average in monthly], None)
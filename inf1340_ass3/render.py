@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+""" Headless batch rendering of stock price charts to image files."""
+
+__author__ = 'Joanna Kolbe, Shuai Wang'
+__email__ = "joannakolbe@gmail.com, info.shuai@gmail.com"
+__copyright__ = "2014 Joanna Kolbe, Shuai Wang"
+__status__ = "Prototype"
+
+# imports one per line
+import argparse
+import multiprocessing
+import os
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from mining import Stock
+
+# formats the charts can be written in
+FORMATS = ("png", "svg", "pdf")
+
+
+def render_stock(stock, output_file, max_points=1000, size=(8, 5), dpi=100):
+    """
+    Renders the chart of Stock.visualize to a file, without pyplot or any
+    window: each chart gets its own Figure on an Agg canvas.
+
+    :param stock: a Stock
+    :param output_file: name of the image file; its extension (png, svg or
+        pdf) sets the format
+    :param max_points: maximum number of points of the price line
+    :param size: (width, height) of the chart in inches
+    :param dpi: resolution of raster formats
+    """
+    figure = Figure(figsize=size, dpi=dpi)
+    FigureCanvasAgg(figure)
+    stock.plot(figure.add_subplot(1, 1, 1), max_points)
+    figure.tight_layout()
+    figure.savefig(output_file)
+
+
+def render_job(job):
+    """
+    Loads and renders one stock (used by render_many on worker processes)
+
+    :param job: a tuple (stock_name, stock_file_name, output_file,
+        max_points, cache_dir)
+    :return: a tuple (stock_name, output_file, error), error being None or
+        the message of the exception that stopped rendering
+    """
+    stock_name, stock_file_name, output_file, max_points, cache_dir = job
+    try:
+        render_stock(Stock(stock_name, stock_file_name, cache_dir),
+                     output_file, max_points)
+    except (OSError, TypeError, ValueError, ZeroDivisionError) as error:
+        return stock_name, None, "{0}: {1}".format(type(error).__name__,
+                                                   error)
+    return stock_name, output_file, None
+
+
+def render_many(stock_files, output_dir, file_format="png", workers=None,
+                max_points=1000, cache_dir=None):
+    """
+    Renders the charts of many stocks on a pool of worker processes
+
+    :param stock_files: a list of (stock_name, stock_file_name) pairs
+    :param output_dir: directory the image files are written to, named
+        after the stocks
+    :param file_format: "png", "svg" or "pdf"
+    :param workers: number of worker processes (default: number of CPUs;
+        1 renders in this process)
+    :param max_points: maximum number of points of each price line
+    :param cache_dir: optional binary price cache directory (see Stock)
+    :return: a list of (stock_name, output_file, error) tuples, in the order
+        of stock_files
+    """
+    if file_format not in FORMATS:
+        raise ValueError("Unknown format: {0}".format(file_format))
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(stock_name, stock_file_name,
+             os.path.join(output_dir, stock_name + "." + file_format),
+             max_points, cache_dir)
+            for stock_name, stock_file_name in stock_files]
+
+    if workers == 1:
+        return [render_job(job) for job in jobs]
+    with multiprocessing.Pool(workers) as pool:
+        return pool.map(render_job, jobs, chunksize=8)
+
+
+def main():
+    """
+    Command line entry point: renders every .json stock file in a directory.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("data_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("--format", default="png", choices=FORMATS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-points", type=int, default=1000)
+    parser.add_argument("--cache-dir", default=None)
+    args = parser.parse_args()
+
+    stock_files = [(os.path.splitext(file_name)[0],
+                    os.path.join(args.data_dir, file_name))
+                   for file_name in sorted(os.listdir(args.data_dir))
+                   if file_name.endswith(".json")]
+    for stock_name, output_file, error in render_many(
+            stock_files, args.output_dir, args.format, args.workers,
+            args.max_points, args.cache_dir):
+        print("{0}: {1}".format(stock_name, output_file or error))
+
+
+if __name__ == "__main__":
+    main()
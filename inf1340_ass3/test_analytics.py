@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+""" Module to test analytics.py """
+
+__author__ = 'Joanna Kolbe, Shuai Wang'
+__email__ = "joannakolbe@gmail.com, info.shuai@gmail.com"
+__copyright__ = "2014 Joanna Kolbe, Shuai Wang"
+__status__ = "Prototype"
+
+# imports one per line
+from analytics import *
+from mining import Stock
+import numpy as np
+import pytest
+
+
+def test_resample():
+    """
+    Test volume weighted averages by calendar period
+    """
+    google = Stock("GOOG", "data/GOOG.json")
+    series = PriceSeries(google)
+    assert len(series) == 1030
+
+    # monthly averages agree with the Stock
+    starts, averages = series.resample_vwap("M")
+    monthly = dict(google.average())
+    assert len(starts) == google.span()
+    for start, average in zip(starts, averages):
+        month = str(start)[:7].replace("-", "/")
+        assert round(float(average), 2) == monthly[month]
+
+    # weeks start on Monday; quarters and years on their first day
+    starts, averages = series.resample_vwap("W")
+    assert starts[0] == np.datetime64("2004-08-16")
+    starts, averages = series.resample_vwap("Q")
+    assert list(starts[:2]) == [np.datetime64("2004-07-01"),
+                                np.datetime64("2004-10-01")]
+    starts, averages = series.resample_vwap("Y")
+    assert len(starts) == 5
+
+    with pytest.raises(ValueError):
+        series.resample_vwap("H")
+
+
+def test_rolling():
+    """
+    Test rolling windows against computing each window separately
+    """
+    series = PriceSeries(Stock("Tse-So", "data/TSE-SO.json"))
+    close = series.close
+    returns = series.returns()
+    result = series.analyse([1, 5, 20])
+
+    for window in [5, 20]:
+        moving_average = result["moving_average"][window]
+        assert np.isnan(moving_average[:window - 1]).all()
+        assert np.allclose(moving_average[window - 1:],
+                           [close[i - window + 1:i + 1].mean()
+                            for i in range(window - 1, len(close))])
+
+        volatility = result["rolling_volatility"][window]
+        assert np.isnan(volatility[:window]).all()
+        assert np.allclose(volatility[window:],
+                           [np.std(returns[i - window + 1:i + 1])
+                            for i in range(window, len(close))])
+
+    assert np.allclose(result["moving_average"][1], close)
+    assert np.isnan(result["rolling_vwap"][1][0])      # no volume that day
+
+    with pytest.raises(ValueError):
+        series.moving_average([0])
+
+
+def test_drawdown():
+    """
+    Test drawdowns from the running maximum
+    """
+    series = PriceSeries(Stock("GOOG", "data/GOOG.json"))
+    drawdowns, maximum = series.drawdown()
+    close = series.close
+    assert drawdowns.max() == 0.0
+    assert maximum == pytest.approx(max(1 - close[i] / close[:i + 1].max()
+                                        for i in range(len(close))))
+
+
+def run_tests():
+    """
+    Run all tests above.
+    """
+    test_resample()
+    test_rolling()
+    test_drawdown()
+
+run_tests()
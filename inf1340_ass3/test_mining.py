@@ -10,6 +10,10 @@ __status__ = "Prototype"
 # imports one per line
 from mining import *
 import pytest
+import numpy as np
+import os
+import json
+import mining
 
 
 def test_google():
@@ -124,6 +128,345 @@ def test_compare():
                                         " averages")
 
 
+def test_columns():
+    """
+    Test the typed columns of the price history
+    """
+    google = Stock("GOOG", "data/GOOG.json")
+    assert len(google.prices) == 1030
+    assert google.prices.dtype == PRICE_DTYPE
+    assert google.prices["date"][0] == np.datetime64("2008-09-19")
+    assert google.prices["close"][0] == 449.15
+    assert google.prices["volume"][0] == 10006000
+    assert google.month_keys[0] == "2008/09"
+    assert google.month_keys[google.month_index[-1]] == "2004/08"
+    assert google.stock_data == []
+
+    # open, high and low may be numeric strings
+    tse = Stock("Tse-So", "data/TSE-SO.json")
+    assert tse.prices["open"][0] == 6.76
+
+
+def test_cache(tmpdir, monkeypatch):
+    """
+    Test the binary price cache
+    """
+    cache_dir = str(tmpdir.join("cache"))
+    google = Stock("GOOG", "data/GOOG.json")
+    cached = Stock("GOOG", "data/GOOG.json", cache_dir)
+    assert os.path.exists(cache_file_name("data/GOOG.json", cache_dir))
+
+    # the second time prices are mapped from the cache
+    mapped = Stock("GOOG", "data/GOOG.json", cache_dir)
+    assert isinstance(mapped.prices, np.memmap)
+    assert mapped.average() == cached.average() == google.average()
+    assert mapped.six_best_months() == google.six_best_months()
+    assert mapped.span() == 50
+
+    # a modified stock file is parsed again and replaces the old cache
+    stock_file = tmpdir.join("stock.json")
+    with open("data/less_6.json") as file_handle:
+        stock_file.write(file_handle.read())
+    Stock("Test", str(stock_file), cache_dir)
+    stat = os.stat(str(stock_file))
+    os.utime(str(stock_file), ns=(stat.st_atime_ns,
+                                  stat.st_mtime_ns + 10 ** 9))
+    assert load_cached_prices(str(stock_file), cache_dir) is None
+    assert convert_to_cache([str(stock_file)], cache_dir) == \
+        [cache_file_name(str(stock_file), cache_dir)]
+    assert len(os.listdir(cache_dir)) == 2
+
+    # prices are cached for the version of the file they were read from,
+    # even when the file is modified while it is parsed
+    def read_modified(stock_file_name):
+        prices = read_prices(stock_file_name)
+        stat = os.stat(stock_file_name)
+        os.utime(stock_file_name, ns=(stat.st_atime_ns,
+                                      stat.st_mtime_ns + 10 ** 9))
+        return prices
+
+    monkeypatch.setattr(mining, "read_prices", read_modified)
+    stat = os.stat(str(stock_file))
+    os.utime(str(stock_file), ns=(stat.st_atime_ns,
+                                  stat.st_mtime_ns + 10 ** 9))
+    Stock("Test", str(stock_file), cache_dir)
+    assert load_cached_prices(str(stock_file), cache_dir) is None
+    assert not [name for name in os.listdir(cache_dir)
+                if not name.endswith(".npy")]
+
+
+def test_universe():
+    """
+    Test analysing several stocks together
+    """
+    universe = Universe.from_directory("data", workers=2)
+    assert universe.names() == ["GOOG", "TSE-SO", "less_6"]
+    assert sorted(universe.errors) == ["close_missing", "invalid_date",
+                                       "missing_date", "not_a_list",
+                                       "stock_not_object", "volume_type",
+                                       "volume_zero"]
+
+    google = Stock("GOOG", "data/GOOG.json")
+    tse = Stock("TSE-SO", "data/TSE-SO.json")
+    months, averages = universe.monthly_averages()
+    assert len(months) == 107
+    assert np.count_nonzero(~np.isnan(averages[0])) == google.span()
+    assert averages[0, months.index("2007/12")] == 693.76
+
+    # the same answers as comparing the stocks one pair at a time
+    google_ave = [average for month, average in google.average()]
+    assert universe.volatility()[0] == pytest.approx(stdev(google_ave))
+    assert universe.compare("GOOG", "TSE-SO") == compare_stocks(google, tse)
+    assert universe.compare("TSE-SO", "TSE-SO") == \
+        compare_stocks(tse, tse)
+    assert [name for name, volatility in universe.ranking()] == \
+        ["GOOG", "TSE-SO", "less_6"]
+    assert universe.compare_volatility()[0].tolist() == [0, 1, 1]
+
+    # correlation over the months both stocks have
+    common = ~np.isnan(averages[:2]).any(axis=0)
+    correlation = universe.correlation()
+    assert correlation[0, 1] == pytest.approx(
+        np.corrcoef(averages[:2, common])[0, 1])
+    assert correlation[0, 0] == pytest.approx(1.0)
+    assert np.isnan(correlation[0, 2])
+
+
+def test_append(tmpdir):
+    """
+    Test adding trading days to a stock
+    """
+    with open("data/GOOG.json") as file_handle:
+        rows = json.loads(file_handle.read())
+    google = Stock("GOOG", "data/GOOG.json")
+
+    # the first half of the file, then the rest a few days at a time
+    first_half = tmpdir.join("first_half.json")
+    first_half.write(json.dumps(rows[:500]))
+    partial = Stock("GOOG", str(first_half))
+    assert partial.span() == 25
+    for start in range(500, len(rows), 37):
+        partial.append(rows[start:start + 37])
+    assert partial.average() == google.average()
+    assert partial.six_best_months() == google.six_best_months()
+    assert partial.six_worst_months() == google.six_worst_months()
+    assert partial.span() == google.span()
+    assert len(partial.prices) == len(rows)
+
+    # order by time is kept too
+    partial = Stock("GOOG", str(first_half))
+    partial.sort_by_time()
+    second_half = tmpdir.join("second_half.json")
+    second_half.write(json.dumps(rows[500:]))
+    partial.update_from_file(str(second_half))
+    google.sort_by_time()
+    assert partial.average() == google.average()
+
+    # invalid rows leave the stock unchanged
+    with pytest.raises(ValueError):
+        partial.append([{"Date": "2015-01-02", "Volume": 10}])
+    with pytest.raises(ZeroDivisionError):
+        partial.append([{"Date": "2015-01-02", "Close": 1, "Volume": 0}])
+    assert partial.average() == google.average()
+
+
+def test_append_ties(tmpdir):
+    """
+    Test adding trading days to a stock with months of the same average
+    """
+    # three months of the same average, latest first like the stock files
+    rows = [{"Date": date, "Close": 10.0, "Volume": 100}
+            for date in ["2015-03-02", "2015-02-02", "2015-01-02"]]
+    stock_file = tmpdir.join("ties.json")
+    stock_file.write(json.dumps(rows))
+
+    for new_row, expected in [
+            ({"Date": "2015-01-05", "Close": 11.0, "Volume": 100},
+             [("2015/03", 10.0), ("2015/02", 10.0), ("2015/01", 10.5)]),
+            ({"Date": "2015-03-03", "Close": 11.0, "Volume": 100},
+             [("2015/02", 10.0), ("2015/01", 10.0), ("2015/03", 10.5)])]:
+        stock = Stock("TIE", str(stock_file))
+        stock.sort_by_time()
+        stock.sort_by_price()
+        assert stock.average() == [("2015/03", 10.0), ("2015/02", 10.0),
+                                   ("2015/01", 10.0)]
+        stock.append([new_row])
+        assert stock.average() == expected
+        assert stock.average() == stock.by_price()
+
+    # a list changed by hand is sorted again
+    stock = Stock("TIE", str(stock_file))
+    stock.average().reverse()
+    stock.append([{"Date": "2015-02-03", "Close": 7.0, "Volume": 100}])
+    assert stock.average() == [("2015/02", 8.5), ("2015/03", 10.0),
+                               ("2015/01", 10.0)]
+
+    # invalid rows leave the stock unchanged
+    stock = Stock("TIE", str(stock_file))
+    with pytest.raises(ZeroDivisionError):
+        stock.append([{"Date": "2015-01-05", "Close": 11.0, "Volume": 100},
+                      {"Date": "2015-04-01", "Close": 11.0, "Volume": 0}])
+    assert len(stock.prices) == 3
+    assert stock.span() == 3
+    assert stock.average() == [("2015/03", 10.0), ("2015/02", 10.0),
+                               ("2015/01", 10.0)]
+
+
+def test_top_months():
+    """
+    Test best and worst months for any k, and the ordered views
+    """
+    google = Stock("GOOG", "data/GOOG.json")
+    assert google.best_months(2) == [('2007/12', 693.76), ('2007/11', 676.55)]
+    assert google.worst_months(1) == [('2004/08', 104.66)]
+    assert google.best_months(50) == google.average()[::-1]
+    assert google.worst_months(50) == google.average()
+    with pytest.raises(ValueError):
+        google.best_months(51)
+
+    # the ordered views leave monthly_averages as it is
+    by_price = list(google.average())
+    assert google.by_time()[:2] == [('2004/08', 104.66), ('2004/09', 116.38)]
+    assert google.by_price() == by_price
+    assert google.average() == by_price
+    assert google.six_best_months()[0] == ('2007/12', 693.76)
+
+    # six best and worst do not depend on the order of monthly_averages
+    google.sort_by_time()
+    assert google.six_best_months()[0] == ('2007/12', 693.76)
+    assert google.six_worst_months()[0] == ('2004/08', 104.66)
+
+
+def test_running_stats():
+    """
+    Test streaming statistics
+    """
+    values = [5, 12, 2, 25, 56, 3.5]
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+    assert stats.count == 6
+    assert stats.mean == pytest.approx(np.mean(values))
+    assert stats.stdev() == pytest.approx(np.std(values))
+    assert stats.stdev(ddof=1) == pytest.approx(np.std(values, ddof=1))
+    assert (stats.minimum, stats.maximum) == (2, 56)
+    assert stdev(iter(values)) == pytest.approx(np.std(values))
+
+    # parts of a stream merge into the statistics of the whole
+    first = RunningStats().update(values[:2])
+    second = RunningStats().update(np.array(values[2:]))
+    first.merge(second).merge(RunningStats())
+    assert first.count == 6
+    assert first.stdev() == pytest.approx(stats.stdev())
+    assert first.minimum == 2
+
+    # no cancellation for large numbers with a small spread
+    assert stdev([1e9 + 1, 1e9 + 2, 1e9 + 3]) == pytest.approx(
+        np.std([1, 2, 3]))
+    with pytest.raises(ValueError):
+        RunningStats().variance()
+
+    google = Stock("GOOG", "data/GOOG.json")
+    google_ave = [average for month, average in google.average()]
+    assert google.monthly_stats().stdev() == pytest.approx(stdev(google_ave))
+    assert google.monthly_stats().count == 50
+
+
+def test_lazy(tmpdir):
+    """
+    Test lazy stocks, which read and compute only what is used
+    """
+    missing = Stock("Missing", "data/non-existing.json", lazy=True)
+    assert missing.name() == "Missing"
+    with pytest.raises(FileNotFoundError):
+        missing.span()
+
+    google = Stock("GOOG", "data/GOOG.json", lazy=True)
+    assert google.stages == set()
+    assert google.span() == 50
+    assert google.stages == {"prices"}
+    assert google.monthly_averages == []
+    assert google.six_best_months()[0] == ('2007/12', 693.76)
+    assert google.stages == {"prices", "averages"}
+    assert google.average() == Stock("GOOG", "data/GOOG.json").average()
+
+    # errors in the file come with the first use
+    zero = Stock("Goog", "data/volume_zero.json", lazy=True)
+    assert zero.span() == 1
+    with pytest.raises(ZeroDivisionError):
+        zero.average()
+
+    # invalidating reads the file again
+    stock_file = tmpdir.join("stock.json")
+    with open("data/less_6.json") as file_handle:
+        stock_file.write(file_handle.read())
+    test = Stock("Test", str(stock_file), lazy=True)
+    assert test.span() == 1
+    with open("data/GOOG.json") as file_handle:
+        stock_file.write(file_handle.read())
+    assert test.span() == 1
+    test.invalidate()
+    assert test.stages == set()
+    assert test.span() == 50
+
+
+def test_downsample():
+    """
+    Test downsampling a series for plotting
+    """
+    x = np.arange(100)
+    y = np.sin(x / 5.0)
+    small_x, small_y = downsample(x, y, 10)
+    assert len(small_x) <= 10
+    assert list(small_y) == list(y[small_x])
+    assert list(small_x) == sorted(small_x)
+    assert small_y.min() == y.min() and small_y.max() == y.max()
+
+    # short series are kept as they are
+    assert list(downsample(x[:5], y[:5], 10)[0]) == list(x[:5])
+    with pytest.raises(ValueError):
+        downsample(x, y, 1)
+
+
+def test_read_prices(tmpdir):
+    """
+    Test reading stock files in chunks against parsing them whole
+    """
+    for file_name in ["data/GOOG.json", "data/TSE-SO.json"]:
+        with open(file_name) as file_handle:
+            expected = rows_to_prices(json.load(file_handle))
+        for chunk_size in [1, 100, 1048576]:
+            assert read_prices(file_name, chunk_size).tobytes() == \
+                expected.tobytes()
+
+    # the same errors for files with bad rows, whatever the chunk size
+    for file_name, error in [("data/not_a_list.json", TypeError),
+                             ("data/stock_not_object.json", TypeError),
+                             ("data/invalid_date.json", ValueError),
+                             ("data/missing_date.json", ValueError),
+                             ("data/close_missing.json", ValueError),
+                             ("data/volume_type.json", TypeError)]:
+        for chunk_size in [7, 1048576]:
+            with pytest.raises(error):
+                read_prices(file_name, chunk_size)
+
+    # brackets inside strings, empty arrays and broken JSON
+    stock_file = tmpdir.join("stock.json")
+    rows = [{"Date": "2014-01-0" + str(day), "Close": day, "Volume": 1,
+             "Note": "}]" * day} for day in range(1, 10)]
+    stock_file.write(json.dumps(rows))
+    for chunk_size in [5, 60, 1048576]:
+        assert list(read_prices(str(stock_file), chunk_size)["close"]) == \
+            list(range(1, 10))
+    for text in [" [ ] ", "[]"]:
+        stock_file.write(text)
+        assert len(read_prices(str(stock_file), 2)) == 0
+    for text in ["[] []", "", "[{\"Date\"", "[{}"]:
+        stock_file.write(text)
+        with pytest.raises(ValueError):
+            read_prices(str(stock_file), 2)
+
+
 def run_tests():
     """
     Run all tests above.
@@ -134,5 +477,10 @@ def run_tests():
     test_file()
     test_math_errors()
     test_compare()
+    test_columns()
+    test_universe()
+    test_top_months()
+    test_running_stats()
+    test_downsample()
 
 run_tests()
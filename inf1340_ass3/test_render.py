@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+""" Module to test render.py """
+
+__author__ = 'Joanna Kolbe, Shuai Wang'
+__email__ = "joannakolbe@gmail.com, info.shuai@gmail.com"
+__copyright__ = "2014 Joanna Kolbe, Shuai Wang"
+__status__ = "Prototype"
+
+# imports one per line
+from render import *
+import os
+import pytest
+
+
+def test_render_many(tmpdir):
+    """
+    Test rendering charts on worker processes
+    """
+    output_dir = str(tmpdir.join("charts"))
+    results = render_many([("GOOG", "data/GOOG.json"),
+                           ("TSE-SO", "data/TSE-SO.json"),
+                           ("Bad", "data/not_a_list.json")],
+                          output_dir, workers=2, max_points=20)
+
+    assert [stock_name for stock_name, output_file, error in results] == \
+        ["GOOG", "TSE-SO", "Bad"]
+    for stock_name, output_file, error in results[:2]:
+        assert error is None
+        with open(output_file, "rb") as file_handle:
+            assert file_handle.read(8) == b"\x89PNG\r\n\x1a\n"
+    assert results[2][1] is None
+    assert results[2][2].startswith("TypeError")
+
+
+def test_render_job():
+    """
+    Test that a stock that cannot be loaded reports its error
+    """
+    assert render_job(("Goog", "data/volume_zero.json", "unused.png", None,
+                       None)) == \
+        ("Goog", None, "ZeroDivisionError: Total volume of a month is zero")
+
+
+def test_render_svg(tmpdir):
+    """
+    Test vector output in this process
+    """
+    output_dir = str(tmpdir)
+    results = render_many([("GOOG", "data/GOOG.json")], output_dir, "svg",
+                          workers=1)
+    assert results == [("GOOG", os.path.join(output_dir, "GOOG.svg"), None)]
+    with open(results[0][1]) as file_handle:
+        assert "<svg" in file_handle.read()
+
+    with pytest.raises(ValueError):
+        render_many([], output_dir, "bmp")
+
+
+def run_tests():
+    """
+    Run all tests above.
+    """
+    test_render_job()
+
+run_tests()